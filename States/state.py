@@ -1,8 +1,11 @@
 # States/state.py (updated)
 from langchain_core.messages import BaseMessage
-from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Any, Literal, Dict
+from array import array
+from pydantic import BaseModel, Field, ConfigDict, model_validator
+from typing import Annotated, Iterator, List, Optional, Any, Literal, Dict
 from services.git_services.get_pr_details import PRDetails
+from utils.path_utils import normalize_file_path
+from utils.run_store import RunContext, get_run
 
 
 class Change(BaseModel):
@@ -16,17 +19,109 @@ class Change(BaseModel):
 
 
 class Chunk(BaseModel):
-    """Represents a chunk/hunk in a diff."""
-    content: str = ""
-    changes: List[Change] = Field(default_factory=list)
+    """
+    Represents a chunk/hunk in a diff.
+
+    The diff text lives in ``buffer`` (shared by every chunk of a file); the chunk only stores
+    the offsets of its hunk and, per change line, its offsets plus target line number and diff
+    position in compact arrays. ``content``, ``changes`` and ``formatted_chunk`` are derived on access.
+    """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    buffer: str = ""
+    start: int = 0
+    end: int = 0
+    line_starts: array = Field(default_factory=lambda: array("I"))
+    line_ends: array = Field(default_factory=lambda: array("I"))
+    # 0 marks a removed line, which has no line number in the new file
+    line_numbers: array = Field(default_factory=lambda: array("I"))
+    diff_positions: array = Field(default_factory=lambda: array("I"))
     guidelines: str = ""
     source_start: int = 0
     source_length: int = 0
     target_start: int = 0
     target_length: int = 0
-    formatted_chunk: Optional[List[str]] = Field(default_factory=list)
     generated_code_snippet: Optional[str] = None
     generated_review_comment: Optional[str] = None
+    # Packed chunks hold several small hunks, possibly of different files, reviewed in one prompt:
+    # the member paths and hunks and, per change line, the index of the member it belongs to
+    member_paths: List[str] = Field(default_factory=list)
+    member_chunks: List["Chunk"] = Field(default_factory=list)
+    line_members: array = Field(default_factory=lambda: array("I"))
+
+    @model_validator(mode="before")
+    @classmethod
+    def _from_legacy_fields(cls, data: Any) -> Any:
+        """Accepts the former ``content``/``changes`` keyword arguments and packs them into a buffer."""
+        if not isinstance(data, dict) or ("content" not in data and "changes" not in data):
+            return data
+        data = dict(data)
+        content = data.pop("content", "") or ""
+        changes = [c if isinstance(c, Change) else Change(**c) for c in data.pop("changes", None) or []]
+        data.pop("formatted_chunk", None)
+
+        parts = [content]
+        offset = len(content) + 1
+        starts, ends, numbers, positions = array("I"), array("I"), array("I"), array("I")
+        for change in changes:
+            starts.append(offset)
+            ends.append(offset + len(change.content))
+            numbers.append(change.line_number or 0)
+            positions.append(change.diff_position or 0)
+            parts.append(change.content)
+            offset += len(change.content) + 1
+
+        data.update(buffer="\n".join(parts), start=0, end=len(content), line_starts=starts,
+                    line_ends=ends, line_numbers=numbers, diff_positions=positions)
+        return data
+
+    @property
+    def content(self) -> str:
+        return self.buffer[self.start:self.end]
+
+    def line_text(self, index: int) -> str:
+        return self.buffer[self.line_starts[index]:self.line_ends[index]]
+
+    def iter_changes(self) -> Iterator[Change]:
+        for index in range(len(self.line_starts)):
+            yield Change(
+                content=self.line_text(index),
+                line_number=self.line_numbers[index] or None,
+                diff_position=self.diff_positions[index] or None,
+            )
+
+    @property
+    def changes(self) -> List[Change]:
+        return list(self.iter_changes())
+
+    def line_path(self, index: int) -> Optional[str]:
+        """Path of the hunk the line belongs to in a packed chunk, None for a regular chunk."""
+        return self.member_paths[self.line_members[index]] if self.member_paths else None
+
+    def index_of(self, line_number: int, path: Optional[str] = None) -> Optional[int]:
+        """Index of the change line with ``line_number`` (in ``path`` when packed), if there is one."""
+        path = normalize_file_path(path) if path else None
+        for index, number in enumerate(self.line_numbers):
+            if number == line_number and (path is None or self.line_path(index) in (None, path)):
+                return index
+        return None
+
+    @property
+    def formatted_chunk(self) -> List[str]:
+        """
+        The change lines prefixed with their new-file line number, as sent to the reviewer. In a
+        packed chunk each hunk is introduced by a ``=== path ===`` line.
+        """
+        rendered = []
+        member = None
+        for index in range(len(self.line_starts)):
+            if self.member_paths and self.line_members[index] != member:
+                member = self.line_members[index]
+                rendered.append(f"=== {self.member_paths[member]} ===")
+            line_number = self.line_numbers[index]
+            text = self.line_text(index)
+            rendered.append(f"{line_number}{text}" if line_number else text)
+        return rendered
 
 
 class File(BaseModel):
@@ -34,11 +129,16 @@ class File(BaseModel):
     from_file: Optional[str] = None
     to_file: Optional[str] = None
     chunks: List[Chunk] = Field(default_factory=list)
+    status: Literal["added", "modified", "deleted", "renamed", "copied", "mode_change", "binary"] = "modified"
+    # Set when the file is generated/vendored and its hunks should not be sent for review
+    skip_reason: Optional[str] = None
 
 
 class ReviewComment(BaseModel):
     lineNumber: int = Field(..., description="Line number of the code to comment on")
     reviewComment: str = Field(..., description="Actual review comment")
+    filePath: Optional[str] = Field(default=None, description="Path of the file the line is in, from its "
+                                                              "'=== path ===' header when the diff covers several files")
 
 
 class ReviewResponse(BaseModel):
@@ -50,6 +150,8 @@ class ReviewFeedback(BaseModel):
     critique: Optional[str] = Field(default=None, description="Brief critique of the response, if any.")
     suggestions: Optional[List[str]] = Field(default_factory=list,
                                              description="List of specific suggestions for improvement.")
+    confidence: Optional[float] = Field(default=None, description="How sure you are of this evaluation, "
+                                                                  "from 0.0 (guessing) to 1.0 (certain).")
 
 
 # New models for conversation handling
@@ -64,17 +166,49 @@ class ConversationThread(BaseModel):
     needs_ai_response: bool = Field(default=False, description="Whether AI needs to respond")
 
 
+class CommentBatch(BaseModel):
+    """
+    Comments produced by one fanned-out chunk review, appended to ``ReviewState.comments``.
+    A model rather than a list so it is still told apart after a checkpoint round trip.
+    """
+    comments: List[dict] = Field(default_factory=list)
+
+
+def merge_comments(existing: List[dict], update: Any) -> List[dict]:
+    """Appends the batches of parallel chunk reviews; nodes returning the whole list replace it."""
+    if isinstance(update, CommentBatch):
+        return existing + update.comments
+    return update
+
+
 class ReviewState(BaseModel):
+    """
+    What is checkpointed between graph steps: cursors, the current chunk's working data and the
+    accumulated comments. The diff and the store handles live in the run store under ``run_id``
+    (see ``utils.run_store``) and are read through the properties below.
+    """
     model_config = ConfigDict(arbitrary_types_allowed=True)
+    run_id: str
     messages: List[BaseMessage] = Field(default_factory=list)
-    pr_details: PRDetails
-    files: List[File] = Field(default_factory=list)
     current_file_index: int = 0
     current_chunk_index: int = 0
     current_prompt: Optional[str] = None
     llm_response: Optional[ReviewResponse] = None
-    comments: List[dict] = Field(default_factory=list)
-    guidelines_store: Optional[Any] = None
+    comments: Annotated[List[dict], merge_comments] = Field(default_factory=list)
+    skipped_files: List[Dict[str, Any]] = Field(default_factory=list)
+    incremental_base_sha: Optional[str] = None
+    # Key to store the current chunk's final response under; None on a cache hit or failed review
+    review_cache_key: Optional[str] = None
+    # Fingerprint to record the current chunk's response under for its duplicates
+    hunk_fingerprint: Optional[str] = None
+    # Keys (see utils.run_store.chunk_key) of the chunks to fan out next, and of those held back
+    # until the first hunk of their duplicate group has been reviewed
+    chunk_queue: List[str] = Field(default_factory=list)
+    deferred_chunks: List[str] = Field(default_factory=list)
+    # "cheap" while the cascade's cheap model reviews the current chunk, "full" otherwise
+    model_tier: Literal["cheap", "full"] = "full"
+    # Why the current chunk was escalated from the cheap model, if it was
+    escalate_reason: Optional[str] = None
     done: bool = False
     retry_count: int = 0
     satisfied: bool = False
@@ -86,4 +220,60 @@ class ReviewState(BaseModel):
     mode: Literal["initial_review", "reply_mode"] = "initial_review"
     conversation_threads: List[ConversationThread] = Field(default_factory=list)
     current_thread_index: int = 0
-    pending_replies: List[Dict[str, Any]] = Field(default_factory=list)
\ No newline at end of file
+    pending_replies: List[Dict[str, Any]] = Field(default_factory=list)
+
+    @property
+    def run(self) -> RunContext:
+        return get_run(self.run_id)
+
+    @property
+    def pr_details(self) -> PRDetails:
+        return self.run.pr_details
+
+    @property
+    def files(self) -> List[File]:
+        return self.run.files
+
+    @property
+    def diff_stream(self) -> Optional[Iterator[File]]:
+        return self.run.diff_stream
+
+    @property
+    def previous_comments(self) -> List[Dict[str, Any]]:
+        """Earlier AI comments mapped onto the current head ({path, line, text}), not to be repeated."""
+        return self.run.previous_comments
+
+    @property
+    def guidelines_store(self) -> Optional[Any]:
+        return self.run.guidelines_store
+
+    @property
+    def review_cache(self) -> Optional[Any]:
+        return self.run.review_cache
+
+    @property
+    def hunk_dedup(self) -> Optional[Any]:
+        return self.run.hunk_dedup
+
+    @property
+    def review_budget(self) -> Optional[Any]:
+        """Per-PR token/request limit (utils.review_budget.ReviewBudget); chunks past it are not reviewed."""
+        return self.run.review_budget
+
+    @property
+    def review_deadline(self) -> Optional[Any]:
+        """Wall-clock limit (utils.review_deadline.ReviewDeadline); near it the review wraps up and posts."""
+        return self.run.review_deadline
+
+    @property
+    def model_cascade(self) -> Optional[Any]:
+        """Cheap-model-first review (utils.model_cascade.ModelCascade); None reviews every hunk with the full model."""
+        return self.run.model_cascade
+
+    @property
+    def head_watcher(self) -> Optional[Any]:
+        """Newer-push check (utils.head_watcher.HeadWatcher); once superseded the review stops without posting."""
+        return self.run.head_watcher
+
+    def superseded(self) -> bool:
+        return self.head_watcher is not None and self.head_watcher.superseded()
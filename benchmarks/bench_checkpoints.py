@@ -0,0 +1,110 @@
+# benchmarks/bench_checkpoints.py
+"""
+Measures what checkpointing costs a review: checkpoints written, bytes stored and run time with no
+checkpointer, the in-memory one and the SQLite one, on a synthetic PR with stubbed LLM chains.
+
+Usage: python -m benchmarks.bench_checkpoints [file_count]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+os.environ.setdefault("PACK_HUNKS", "false")
+
+from langgraph.checkpoint.memory import MemorySaver  # noqa: E402
+
+import nodes.feedback_agent as feedback_agent  # noqa: E402
+import nodes.git_comment_sender as git_comment_sender  # noqa: E402
+import nodes.reviewer_agent as reviewer_agent  # noqa: E402
+from States.state import ReviewComment, ReviewFeedback, ReviewResponse, ReviewState  # noqa: E402
+from graph import create_reviewer_graph  # noqa: E402
+from services.git_services.get_pr_details import PRDetails  # noqa: E402
+from utils.github_utils.diff_parser import iter_parse_diff  # noqa: E402
+from utils.run_store import RunContext, register_run, release_run  # noqa: E402
+
+
+class StubReviewer:
+    async def ainvoke(self, inputs):
+        return ReviewResponse(reviews=[ReviewComment(lineNumber=2, reviewComment="Consider a constant here.")])
+
+
+class StubFeedback:
+    async def ainvoke(self, inputs):
+        return ReviewFeedback(satisfied=True)
+
+
+def make_diff(file_count: int) -> str:
+    return "".join(
+        f"diff --git a/src/m{i}.py b/src/m{i}.py\n--- a/src/m{i}.py\n+++ b/src/m{i}.py\n"
+        f"@@ -1,3 +1,4 @@\n import os\n+LIMIT = {i} * 1024\n def run():\n     return LIMIT\n"
+        for i in range(file_count)
+    )
+
+
+@asynccontextmanager
+async def sqlite_checkpointer(directory: str):
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    async with AsyncSqliteSaver.from_conn_string(os.path.join(directory, "checkpoints.sqlite")) as saver:
+        yield saver
+
+
+def stored_bytes(checkpointer, directory: str) -> int:
+    if isinstance(checkpointer, MemorySaver):
+        checkpoints = sum(len(blob) for ns in checkpointer.storage.values() for saved in ns.values()
+                          for entry in saved.values() for blob in (entry[0][1], entry[1][1]))
+        blobs = sum(len(value[1]) for value in checkpointer.blobs.values())
+        writes = sum(len(write[2][1]) for saved in checkpointer.writes.values() for write in saved.values())
+        return checkpoints + blobs + writes
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+
+async def run(label: str, file_count: int, open_checkpointer) -> None:
+    files = iter_parse_diff(iter(make_diff(file_count).splitlines()))
+    run_id = register_run(RunContext(pr_details=PRDetails("o", "r", 1, "t", "d"), files=[next(files)],
+                                     diff_stream=files))
+    state = ReviewState(run_id=run_id, comments=[], mode="initial_review")
+    config = {"max_concurrency": 1, "configurable": {"thread_id": run_id}}
+    with tempfile.TemporaryDirectory() as directory:
+        async with open_checkpointer(directory) as checkpointer:
+            graph = create_reviewer_graph(checkpointer)
+            started = time.perf_counter()
+            final_state = await graph.ainvoke(state, config)
+            elapsed = time.perf_counter() - started
+            checkpoints = 0
+            size = 0
+            if checkpointer is not None:
+                checkpoints = len([c async for c in checkpointer.alist(None)])
+                size = stored_bytes(checkpointer, directory)
+    release_run(run_id)
+    print(f"{label:<8} comments={len(final_state['comments']):<5} checkpoints={checkpoints:<6} "
+          f"stored={size / 2**20:7.2f} MiB time={elapsed:6.2f}s")
+
+
+@asynccontextmanager
+async def no_checkpointer(directory: str):
+    yield None
+
+
+@asynccontextmanager
+async def memory_checkpointer(directory: str):
+    yield MemorySaver()
+
+
+def main() -> None:
+    file_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    reviewer_agent.reviewer_agent_chain = StubReviewer()
+    feedback_agent.feedback_agent_chain = StubFeedback()
+    git_comment_sender.create_review_comment = lambda pr_details, comments, body: 1
+    print(f"Synthetic PR: {file_count} files, one hunk each")
+    asyncio.run(run("none", file_count, no_checkpointer))
+    asyncio.run(run("memory", file_count, memory_checkpointer))
+    asyncio.run(run("sqlite", file_count, sqlite_checkpointer))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# benchmarks/bench_diff_memory.py
+"""
+Compares the memory held by a parsed diff using the compact offset-based Chunk against the
+previous one-pydantic-model-per-line representation.
+
+Usage: python -m benchmarks.bench_diff_memory [line_count]
+"""
+import re
+import sys
+import time
+import tracemalloc
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from utils.github_utils.diff_parser import parse_diff
+
+
+class LegacyChange(BaseModel):
+    content: str = ""
+    line_number: Optional[int] = None
+    diff_position: Optional[int] = None
+
+
+class LegacyChunk(BaseModel):
+    content: str = ""
+    changes: List[LegacyChange] = Field(default_factory=list)
+    source_start: int = 0
+    target_start: int = 0
+    formatted_chunk: Optional[List[str]] = Field(default_factory=list)
+
+
+class LegacyFile(BaseModel):
+    from_file: Optional[str] = None
+    to_file: Optional[str] = None
+    chunks: List[LegacyChunk] = Field(default_factory=list)
+
+
+def legacy_parse_diff(diff_text: str) -> List[LegacyFile]:
+    """The parsing loop as it was before the compact representation, kept for comparison."""
+    files, current_file, current_chunk, target_line_number = [], None, None, 0
+    for line in diff_text.splitlines():
+        if line.startswith("diff --git"):
+            if current_file:
+                if current_chunk:
+                    current_file.chunks.append(current_chunk)
+                    current_chunk = None
+                files.append(current_file)
+            current_file = LegacyFile()
+            parts = line.split()
+            current_file.to_file = parts[3]
+        elif line.startswith("--- ") or line.startswith("+++ "):
+            continue
+        elif line.startswith("@@") and current_file:
+            if current_chunk:
+                current_file.chunks.append(current_chunk)
+            current_chunk = LegacyChunk(content=line)
+            match = re.match(r'@@ -(\d+)(?:,\d+)? \+(\d+)(?:,\d+)? @@', line)
+            current_chunk.source_start = int(match.group(1))
+            current_chunk.target_start = target_line_number = int(match.group(2))
+        elif current_chunk:
+            current_chunk.content += "\n" + line
+            if line.startswith(" ") or line.startswith("+"):
+                current_chunk.changes.append(LegacyChange(content=line, line_number=target_line_number))
+                current_chunk.formatted_chunk.append(f"{target_line_number}{line}")
+                target_line_number += 1
+            elif line.startswith("-"):
+                current_chunk.changes.append(LegacyChange(content=line))
+                current_chunk.formatted_chunk.append(line)
+    if current_file:
+        if current_chunk:
+            current_file.chunks.append(current_chunk)
+        files.append(current_file)
+    for file in files:
+        position = 0
+        for chunk in file.chunks:
+            position += 1
+            for change in chunk.changes:
+                position += 1
+                change.diff_position = position
+    return files
+
+
+def make_diff(line_count: int, lines_per_hunk: int = 10, hunks_per_file: int = 10) -> str:
+    parts = []
+    written = 0
+    file_index = 0
+    while written < line_count:
+        path = f"src/module_{file_index}/service.py"
+        parts.append(f"diff --git a/{path} b/{path}\n--- a/{path}\n+++ b/{path}\n")
+        for hunk in range(hunks_per_file):
+            start = hunk * 40 + 1
+            parts.append(f"@@ -{start},{lines_per_hunk} +{start},{lines_per_hunk} @@ def handler_{hunk}():\n")
+            for i in range(lines_per_hunk):
+                prefix = "+-  "[i % 4]
+                parts.append(f"{prefix}        result = compute_value(item_{i}, config.get('key_{hunk}'))\n")
+            written += lines_per_hunk + 1
+        file_index += 1
+    return "".join(parts)
+
+
+def measure(label: str, parse, diff_text: str) -> None:
+    tracemalloc.start()
+    started = time.perf_counter()
+    files = parse(diff_text)
+    elapsed = time.perf_counter() - started
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    chunks = sum(len(f.chunks) for f in files)
+    print(f"{label:<10} files={len(files):<6} chunks={chunks:<6} retained={retained / 2**20:8.2f} MiB "
+          f"peak={peak / 2**20:8.2f} MiB time={elapsed:6.2f}s")
+    del files
+
+
+def main() -> None:
+    line_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    diff_text = make_diff(line_count)
+    print(f"Synthetic diff: {line_count} lines, {len(diff_text) / 2**20:.2f} MiB of text")
+    measure("legacy", legacy_parse_diff, diff_text)
+    measure("compact", parse_diff, diff_text)
+
+
+if __name__ == "__main__":
+    main()
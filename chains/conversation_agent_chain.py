@@ -1,9 +1,9 @@
 # chains/conversation_agent_chain.py (new file needed)
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from llm_config import get_llm
+from llm_config import lazy_llm
 
-llm = get_llm()
+llm = lazy_llm("conversation")
 
 conversation_prompt = ChatPromptTemplate.from_messages([
     ("system", """You are an AI code reviewer having a conversation with a developer about code quality. 
@@ -1,13 +1,10 @@
 # chains/feedback_agent_chain.py
-from dotenv import load_dotenv
 from States.state import ReviewFeedback
-
-load_dotenv()
 from langchain.output_parsers import PydanticOutputParser
 from langchain_core.prompts import PromptTemplate
-from llm_config import get_llm
+from llm_config import lazy_llm
 
-llm = get_llm()
+llm = lazy_llm("feedback")
 parser = PydanticOutputParser(pydantic_object=ReviewFeedback)
 format_instructions = parser.get_format_instructions()
 
@@ -33,6 +30,8 @@ You will be given:
 - It gives incorrect or misleading feedback
 - Comments violate or ignore shared guidelines
 
+Set `confidence` to how sure you are of your verdict, lower when the diff lacks the context to judge it.
+
 Always use this JSON output format:
 {format_instructions}
 
@@ -51,3 +50,5 @@ Final AI Reviewer Response:
 feedback_prompt = feedback_prompt.partial(format_instructions=format_instructions)
 
 feedback_agent_chain = feedback_prompt | llm | parser
+# Checks the cascade's cheap review; its verdict decides whether the hunk is escalated
+cheap_feedback_agent_chain = feedback_prompt | lazy_llm("cascade") | parser
@@ -1,14 +1,10 @@
 # chains/reviewer_agent_chain.py
-from dotenv import load_dotenv
 from States.state import ReviewResponse
-
-load_dotenv()
-
 from langchain.output_parsers import PydanticOutputParser
 from langchain_core.prompts import ChatPromptTemplate
-from llm_config import get_llm
+from llm_config import lazy_llm
 
-llm = get_llm()
+llm = lazy_llm("reviewer")
 parser = PydanticOutputParser(pydantic_object=ReviewResponse)
 format_instructions = parser.get_format_instructions()
 
@@ -27,6 +23,7 @@ reviewer_prompt = ChatPromptTemplate.from_messages([
 7. Keep each comment **under 50 words** and **actionable**.
 8. Align all comments with the provided team coding **guidelines**.
 9. If the code is good or only has minor issues, return an **empty reviews array**.
+10. When the diff covers several files, each starts with a `=== path ===` line; set `filePath` to that path.
 
 EXAMPLES OF WHAT TO COMMENT ON:
 ✅ SQL injection risk  
@@ -59,4 +56,6 @@ Code Diff:
 
 reviewer_prompt = reviewer_prompt.partial(format_instructions=format_instructions)
 reviewer_agent_chain = reviewer_prompt | llm | parser
+# First pass of the model cascade on low-risk hunks
+cheap_reviewer_agent_chain = reviewer_prompt | lazy_llm("cascade") | parser
 
@@ -1,39 +1,75 @@
 import os
-# import redis
-import urllib.parse
-import ssl
-from dotenv import load_dotenv
-
-from langgraph.checkpoint.memory import MemorySaver
-# from langgraph.checkpoint.redis import RedisSaver
-
-# Load environment variables from .env
-load_dotenv()
-redis_url = os.getenv("REDIS_URL", "local")
-
-def get_memory():
-    if redis_url == "local":
-        print("✅ Using InMemorySaver (local dev)")
-        return MemorySaver()
-
-    try:
-        parsed = urllib.parse.urlparse(redis_url)
-        ssl_context = ssl.create_default_context()
-        #
-        # redis_client = redis.Redis(
-        #     host=parsed.hostname,
-        #     port=parsed.port,
-        #     username=parsed.username,
-        #     password=parsed.password,
-        #     ssl=(parsed.scheme == "rediss"),
-        #     ssl_context=ssl_context
-        # )
-        #
-        # redis_client.ping()
-        # print(f"✅ Connected to Redis at {parsed.hostname}:{parsed.port}")
-        # return RedisSaver(redis_client)
-
-    except Exception as e:
-        print("❌ Redis connection failed. Falling back to InMemorySaver.")
-        print(f"Error: {e}")
-        return MemorySaver()
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, AsyncIterator
+from urllib.parse import quote
+
+from services.git_services.get_pr_details import PRDetails
+from utils.logger import get_logger
+
+if TYPE_CHECKING:
+    from langgraph.checkpoint.base import BaseCheckpointSaver
+
+log = get_logger()
+
+
+def review_thread_id(pr_details: PRDetails, mode: str = "initial_review") -> str:
+    """
+    Checkpoint thread of one review: the same repository, PR and head SHA always map to the same
+    thread, so a rerun after a crash finds the checkpoints of the run it replaces.
+    """
+    return f"{pr_details.owner}/{pr_details.repo}:{pr_details.pull_number}:{pr_details.head_sha or 'head'}:{mode}"
+
+
+async def delete_stale_review_threads(checkpointer: "BaseCheckpointSaver", pr_details: PRDetails) -> int:
+    """
+    Deletes the initial review threads of the PR's earlier heads, left behind by runs that crashed
+    and were never resumed; a newer push means they never will be. Returns how many were deleted.
+    """
+    path = os.getenv("REVIEW_CHECKPOINT_PATH", "")
+    if not path or not Path(path).exists() or not pr_details.head_sha:
+        # In-memory checkpoints do not outlive the process
+        return 0
+    import aiosqlite
+
+    prefix = f"{pr_details.owner}/{pr_details.repo}:{pr_details.pull_number}:"
+    pattern = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    # The saver has no API listing thread ids, so they are read on a connection of our own;
+    # deleting goes through the saver
+    async with aiosqlite.connect(f"file:{quote(Path(path).resolve().as_posix())}?mode=ro", uri=True) as conn:
+        try:
+            async with conn.execute("SELECT DISTINCT thread_id FROM checkpoints WHERE thread_id LIKE ? ESCAPE '\\'",
+                                    (pattern,)) as cursor:
+                thread_ids = [row[0] async for row in cursor]
+        except aiosqlite.OperationalError:
+            # No checkpoint written yet
+            return 0
+    stale = [thread_id for thread_id in thread_ids
+             if thread_id.split(":")[-1].startswith("initial_review")
+             and not thread_id.startswith(f"{prefix}{pr_details.head_sha}:")]
+    for thread_id in stale:
+        await checkpointer.adelete_thread(thread_id)
+    if stale:
+        log.info(f"Deleted {len(stale)} checkpoint threads of earlier heads of PR #{pr_details.pull_number}")
+    return len(stale)
+
+
+@asynccontextmanager
+async def open_checkpointer() -> AsyncIterator["BaseCheckpointSaver"]:
+    """
+    Checkpointer for the review graph: SQLite (WAL mode) at REVIEW_CHECKPOINT_PATH when set, so an
+    interrupted review resumes after its last completed chunk; in memory otherwise.
+    """
+    path = os.getenv("REVIEW_CHECKPOINT_PATH", "")
+    if not path:
+        from langgraph.checkpoint.memory import MemorySaver
+        yield MemorySaver()
+        return
+
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    log.info(f"Checkpointing the review graph to {path}")
+    async with AsyncSqliteSaver.from_conn_string(path) as checkpointer:
+        # The tables are created (and WAL mode set) on first use
+        yield checkpointer
@@ -1,58 +1,68 @@
 # graph.py (updated for conversation mode)
+from functools import lru_cache
+from typing import Optional
+
+from langchain_core.runnables import RunnableLambda
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import StateGraph, END
 from States.state import ReviewState
 from nodes.format_comments import format_comments_node
 from nodes.get_next_chunk import get_next_chunk
-from nodes.retrieve_guidelines import retrieve_guidelines
-from nodes.feedback_agent import feedback_agent
-from nodes.reviewer_agent import reviewer_agent
+from nodes.retrieve_guidelines import retrieve_guidelines, aretrieve_guidelines
+from nodes.feedback_agent import feedback_agent, afeedback_agent, MAX_RETRIES
+from nodes.reviewer_agent import reviewer_agent, areviewer_agent
 from nodes.git_comment_sender import git_comment_sender_node
 from nodes.reply_handler import reply_handler_node
-from nodes.conversation_agent import conversation_agent_node
+from nodes.conversation_agent import conversation_agent_node, aconversation_agent_node
 from nodes.reply_sender import reply_sender_node
+from nodes.dispatch_chunks import dispatch_chunks_node, collect_chunk_reviews_node, fan_out_chunks
+from nodes.review_chunk import make_review_chunk_node, make_review_in_order_node
 from utils.logger import get_logger
 import os
 
 log = get_logger()
-MAX_RETRIES = int(os.getenv("MAX_LOOP", "2"))
+# Chunks reviewed at the same time; 1 reviews them one after another, in diff order
+REVIEW_CONCURRENCY = int(os.getenv("REVIEW_CONCURRENCY", "1"))
 
 
-def create_reviewer_graph():
-    """Create and configure the LangGraph state machine for code review with conversation support."""
+def fans_out_chunks() -> bool:
+    """
+    Whether an initial review reads the whole diff and fans its chunks out. With REVIEW_CONCURRENCY=1
+    the chunks are reviewed in order while the diff streams in instead, unless the run is
+    checkpointed to REVIEW_CHECKPOINT_PATH: a resumed run picks up whole fanned-out chunk reviews.
+    """
+    return REVIEW_CONCURRENCY > 1 or bool(os.getenv("REVIEW_CHECKPOINT_PATH"))
 
-    def mode_router(state: ReviewState) -> str:
-        """Route based on current mode."""
-        if state.mode == "initial_review":
-            return "get_next_chunk"
-        elif state.mode == "reply_mode":
-            return "reply_handler"
-        return END
+
+def chunk_recursion_limit(max_retries: int = MAX_RETRIES) -> int:
+    """
+    Steps one chunk review may take: get_next_chunk, retrieve_guidelines, a reviewer and a
+    feedback step per round (MAX_LOOP + 1 rounds), the cheap reviewer and feedback steps of the
+    model cascade, format_comments and the final get_next_chunk.
+    """
+    return 2 * (max_retries + 1) + 8
+
+
+def add_review_loop(builder: StateGraph, done_target: str) -> None:
+    """
+    Adds the chunk review loop (get_next_chunk -> reviewer/feedback -> format_comments -> get_next_chunk)
+    to ``builder``; once no chunk is left it continues to ``done_target``.
+    """
 
     def get_next_chunk_branch(state: ReviewState) -> str:
         if state.done:
             if state.current_file_index >= len(state.files):
-                log.info("All files processed, sending comments to GitHub.")
-                return "git_comment_sender"
+                log.info("All files processed.")
+                return done_target
             else:
                 log.info("Current file processed, continuing to next.")
                 return "reviewer_agent"
+        elif state.next_agent == "format_comments":
+            # Cached review, no need to run the reviewer/feedback loop
+            return "format_comments"
         else:
             return "reviewer_agent"
 
-    def reply_handler_branch(state: ReviewState) -> str:
-        """Branch after reply handler."""
-        if state.done:
-            return END
-        else:
-            return "conversation_agent"
-
-    def conversation_agent_branch(state: ReviewState) -> str:
-        """Branch after conversation agent."""
-        if state.current_thread_index >= len(state.conversation_threads):
-            return "reply_sender"
-        else:
-            return "conversation_agent"  # Process next thread
-
     def guidelines_transition(state: ReviewState) -> str:
         next_agent = state.next_agent
         if next_agent in ["reviewer_agent", "feedback_agent"]:
@@ -65,51 +75,40 @@ def create_reviewer_graph():
 
         if satisfied or retry_count > MAX_RETRIES:
             return "format_comments"
+        elif state.review_deadline is not None and state.review_deadline.near():
+            # No time for another reviewer round; keep the response that was just critiqued
+            return "format_comments"
+        elif state.superseded():
+            return "format_comments"
         elif not satisfied and retry_count <= MAX_RETRIES:
             return "reviewer_agent"
         return END
 
     def reviewer_agent_transition(state: ReviewState) -> str:
+        if state.next_agent == "format_comments":
+            # The review was rate limited; the chunk ends without a feedback call
+            return "format_comments"
         retry_count = state.retry_count
-        if retry_count == 0 and state.guidelines_store is not None:
+        # A chunk escalated from the cascade's cheap model got its guidelines in the cheap pass
+        escalated = state.model_tier == "full" and state.escalate_reason is not None
+        if retry_count == 0 and state.guidelines_store is not None and not escalated:
             return "retrieve_guidelines"
         return "feedback_agent"
 
-    builder = StateGraph(ReviewState)
-
-    # Add all nodes
-    builder.add_node("mode_router", lambda state: state)  # Dummy node for routing
     builder.add_node("get_next_chunk", get_next_chunk)
-    builder.add_node("retrieve_guidelines", retrieve_guidelines)
-    builder.add_node("reviewer_agent", reviewer_agent)
-    builder.add_node("feedback_agent", feedback_agent)
+    # LLM nodes run their async variant under graph.ainvoke; the others are run in worker threads there
+    builder.add_node("retrieve_guidelines", RunnableLambda(retrieve_guidelines, afunc=aretrieve_guidelines))
+    builder.add_node("reviewer_agent", RunnableLambda(reviewer_agent, afunc=areviewer_agent))
+    builder.add_node("feedback_agent", RunnableLambda(feedback_agent, afunc=afeedback_agent))
     builder.add_node("format_comments", format_comments_node)
-    builder.add_node("git_comment_sender", git_comment_sender_node)
-    builder.add_node("reply_handler", reply_handler_node)
-    builder.add_node("conversation_agent", conversation_agent_node)
-    builder.add_node("reply_sender", reply_sender_node)
-
-    # Set entry point
-    builder.set_entry_point("mode_router")
 
-    # Add conditional edges
-    builder.add_conditional_edges(
-        "mode_router",
-        mode_router,
-        {
-            "get_next_chunk": "get_next_chunk",
-            "reply_handler": "reply_handler",
-            END: END
-        }
-    )
-
-    # Original review flow
     builder.add_conditional_edges(
         "get_next_chunk",
         get_next_chunk_branch,
         {
-            "git_comment_sender": "git_comment_sender",
+            done_target: done_target,
             "reviewer_agent": "reviewer_agent",
+            "format_comments": "format_comments",
         }
     )
 
@@ -128,7 +127,8 @@ def create_reviewer_graph():
         reviewer_agent_transition,
         {
             "feedback_agent": "feedback_agent",
-            "retrieve_guidelines": "retrieve_guidelines"
+            "retrieve_guidelines": "retrieve_guidelines",
+            "format_comments": "format_comments"
         }
     )
 
@@ -144,6 +144,86 @@ def create_reviewer_graph():
     )
 
     builder.add_edge("format_comments", "get_next_chunk")
+
+
+def create_chunk_review_graph():
+    """
+    The review loop on its own, ending after the last chunk; run once per fanned-out chunk.
+    Its steps are not checkpointed: a chunk review is the unit a resumed run picks up from.
+    """
+    builder = StateGraph(ReviewState)
+    add_review_loop(builder, END)
+    builder.set_entry_point("get_next_chunk")
+    return builder.compile(checkpointer=False)
+
+
+def create_reviewer_graph(checkpointer: Optional[BaseCheckpointSaver] = None):
+    """
+    Create and configure the LangGraph state machine for code review with conversation support.
+    With a ``checkpointer`` every finished chunk review is saved as a write of the fan-out step,
+    so an interrupted run resumed on the same thread only reviews the chunks still missing.
+    """
+
+    def mode_router(state: ReviewState) -> str:
+        """Route based on current mode."""
+        if state.mode == "initial_review":
+            return "dispatch_chunks" if fans_out_chunks() else "review_in_order"
+        elif state.mode == "reply_mode":
+            return "reply_handler"
+        return END
+
+    def reply_handler_branch(state: ReviewState) -> str:
+        """Branch after reply handler."""
+        if state.done:
+            return END
+        else:
+            return "conversation_agent"
+
+    def conversation_agent_branch(state: ReviewState) -> str:
+        """Branch after conversation agent."""
+        if state.current_thread_index >= len(state.conversation_threads):
+            return "reply_sender"
+        else:
+            return "conversation_agent"  # Process next thread
+
+    builder = StateGraph(ReviewState)
+
+    # Add all nodes
+    builder.add_node("mode_router", lambda state: state)  # Dummy node for routing
+    builder.add_node("dispatch_chunks", dispatch_chunks_node)
+    chunk_review_graph = create_chunk_review_graph()
+    builder.add_node("review_chunk", make_review_chunk_node(chunk_review_graph, chunk_recursion_limit(),
+                                                            REVIEW_CONCURRENCY))
+    builder.add_node("review_in_order", make_review_in_order_node(chunk_review_graph, chunk_recursion_limit()))
+    builder.add_node("collect_chunk_reviews", collect_chunk_reviews_node)
+    builder.add_node("git_comment_sender", git_comment_sender_node)
+    builder.add_node("reply_handler", reply_handler_node)
+    builder.add_node("conversation_agent", RunnableLambda(conversation_agent_node, afunc=aconversation_agent_node))
+    builder.add_node("reply_sender", reply_sender_node)
+
+    # Set entry point
+    builder.set_entry_point("mode_router")
+
+    # Add conditional edges
+    builder.add_conditional_edges(
+        "mode_router",
+        mode_router,
+        {
+            "dispatch_chunks": "dispatch_chunks",
+            "review_in_order": "review_in_order",
+            "reply_handler": "reply_handler",
+            END: END
+        }
+    )
+
+    # Review flow: fan the chunks out to review_chunk (at most REVIEW_CONCURRENCY at a time), join,
+    # repeat for deferred duplicates; or review them in order as the diff streams in (see
+    # fans_out_chunks). Each chunk loops in its own subgraph, so the steps taken here do not grow
+    # with the size of the PR.
+    builder.add_conditional_edges("dispatch_chunks", fan_out_chunks, ["review_chunk", "git_comment_sender"])
+    builder.add_edge("review_chunk", "collect_chunk_reviews")
+    builder.add_conditional_edges("collect_chunk_reviews", fan_out_chunks, ["review_chunk", "git_comment_sender"])
+    builder.add_edge("review_in_order", "git_comment_sender")
     builder.add_edge("git_comment_sender", END)
 
     # Conversation flow
@@ -167,7 +247,17 @@ def create_reviewer_graph():
 
     builder.add_edge("reply_sender", END)
 
-    return builder.compile()
+    return builder.compile(checkpointer=checkpointer)
+
+
+@lru_cache(maxsize=None)
+def get_reviewer_graph():
+    """The graph without a checkpointer, compiled on first use."""
+    return create_reviewer_graph()
 
 
-graph = create_reviewer_graph()
\ No newline at end of file
+def __getattr__(name: str):
+    # ``from graph import graph`` still works, but compiles the graph only when asked for
+    if name == "graph":
+        return get_reviewer_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,47 +1,91 @@
 # llm_config.py
 import os
-from langchain.chat_models import ChatOpenAI
-from langchain_anthropic import ChatAnthropic
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_community.chat_models import ChatOllama
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
 from utils.logger import get_logger
-from dotenv import load_dotenv
-load_dotenv()
+from utils.rate_limiter import estimate_tokens, get_rate_limiter
+
 log = get_logger()
 
-# Registry of all supported providers and models
+# Chains and nodes name the role they use the LLM for; each role can have its own model.
+# "cascade" is the cheap model reviewing low-risk hunks first (see utils.model_cascade).
+ROLES = ("reviewer", "feedback", "conversation", "guidelines", "cascade")
+
+
+@lru_cache(maxsize=None)
+def _openai_clients() -> Tuple[Any, Any]:
+    """One sync and one async OpenAI client (and so one connection pool each) for every OpenAI model."""
+    import openai
+    return openai.OpenAI(), openai.AsyncOpenAI()
+
+
+def _openai(model: str, temperature: float):
+    from langchain_community.chat_models import ChatOpenAI
+    client, async_client = _openai_clients()
+    return ChatOpenAI(model=model, temperature=temperature, client=client.chat.completions,
+                      async_client=async_client.chat.completions)
+
+
+def _ollama(model: str, temperature: float):
+    from langchain_community.chat_models import ChatOllama
+    return ChatOllama(model=model, temperature=temperature)
+
+
+def _gemini(model: str, temperature: float):
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(model=model, temperature=temperature)
+
+
+def _anthropic(model: str, temperature: float):
+    from langchain_anthropic import ChatAnthropic
+    return ChatAnthropic(model=model, temperature=temperature)
+
+
+# Registry of all supported providers and models; provider packages are imported on first use
 PROVIDER_REGISTRY = {
     "openai": {
-        "gpt-4o": lambda temperature: ChatOpenAI(model="gpt-4o", temperature=temperature),
-        "gpt-4o-mini": lambda temperature: ChatOpenAI(model="gpt-4o-mini", temperature=temperature),
-        "gpt-4-turbo": lambda temperature: ChatOpenAI(model="gpt-4-turbo", temperature=temperature),
+        "gpt-4o": lambda temperature: _openai("gpt-4o", temperature),
+        "gpt-4o-mini": lambda temperature: _openai("gpt-4o-mini", temperature),
+        "gpt-4-turbo": lambda temperature: _openai("gpt-4-turbo", temperature),
     },
     "ollama": {
-        "llama3": lambda temperature: ChatOllama(model="llama3", temperature=temperature),
-        "mistral": lambda temperature: ChatOllama(model="mistral", temperature=temperature),
-        "phi3:mini": lambda temperature: ChatOllama(model="phi3:mini", temperature=temperature),
+        "llama3": lambda temperature: _ollama("llama3", temperature),
+        "mistral": lambda temperature: _ollama("mistral", temperature),
+        "phi3:mini": lambda temperature: _ollama("phi3:mini", temperature),
     },
     "gemini": {
-        "gemini-pro": lambda temperature: ChatGoogleGenerativeAI(model="gemini-pro", temperature=temperature),
+        "gemini-pro": lambda temperature: _gemini("gemini-pro", temperature),
     },
     "anthropic": {
-        "claude-3-opus": lambda temperature: ChatAnthropic(model="claude-3-opus-20240229", temperature=temperature),
-        "claude-3-sonnet": lambda temperature: ChatAnthropic(model="claude-3-sonnet-20240229", temperature=temperature),
+        "claude-3-opus": lambda temperature: _anthropic("claude-3-opus-20240229", temperature),
+        "claude-3-sonnet": lambda temperature: _anthropic("claude-3-sonnet-20240229", temperature),
     },
 }
 
+_clients: Dict[Tuple[str, str, float], Any] = {}
+_clients_lock = threading.Lock()
+# Calls and seconds spent in the LLM per role, excluding rate limiter waits
+_role_stats: Dict[str, Dict[str, float]] = {}
+_role_stats_lock = threading.Lock()
 
-def get_llm():
-    """Returns an LLM instance based on provider, model, and temperature."""
-    provider = os.getenv("PROVIDER", "openai")
-    model = os.getenv("MODEL_NAME", "gpt-4o-mini")
-    temperature = float(os.getenv("TEMPERATURE", "0.7"))
 
-    provider = provider.lower()
-    model = model.lower()
+def llm_settings(role: Optional[str] = None) -> Tuple[str, str, float]:
+    """
+    (provider, model, temperature) of a role: ``<ROLE>_PROVIDER``, ``<ROLE>_MODEL_NAME`` and
+    ``<ROLE>_TEMPERATURE`` when set (e.g. ``FEEDBACK_MODEL_NAME``), else PROVIDER, MODEL_NAME and TEMPERATURE.
+    """
+    def setting(name: str, default: str) -> str:
+        value = os.getenv(f"{role.upper()}_{name}", "") if role else ""
+        return value or os.getenv(name, default)
 
-    log.info(f"LLM requested -> Provider: '{provider}', Model: '{model}', Temperature: {temperature}")
+    return (setting("PROVIDER", "openai").lower(), setting("MODEL_NAME", "gpt-4o-mini").lower(),
+            float(setting("TEMPERATURE", "0.7")))
 
+
+def _load_llm(provider: str, model: str, temperature: float):
     provider_models = PROVIDER_REGISTRY.get(provider)
     if not provider_models:
         supported = ", ".join(PROVIDER_REGISTRY.keys())
@@ -56,3 +100,64 @@ def get_llm():
 
     log.info(f"Loading model '{model}' from provider '{provider}' with temperature={temperature}")
     return model_loader(temperature)
+
+
+def get_llm(role: Optional[str] = None):
+    """
+    Returns the LLM of a role, created on first use and shared by every chain and call with the
+    same provider, model and temperature.
+    """
+    settings = llm_settings(role)
+    client = _clients.get(settings)
+    if client is not None:
+        return client
+    with _clients_lock:
+        if settings not in _clients:
+            provider, model, temperature = settings
+            log.info(f"LLM requested for {role or 'default'} -> Provider: '{provider}', Model: '{model}', "
+                     f"Temperature: {temperature}")
+            _clients[settings] = _load_llm(*settings)
+        return _clients[settings]
+
+
+def lazy_llm(role: str):
+    """
+    A runnable standing in for ``get_llm(role)`` in a chain, so building the chain at import time
+    creates no client; the first call does. Every call goes through the process-wide rate limiter.
+    """
+    from langchain_core.runnables import RunnableLambda
+
+    def invoke(messages, config):
+        def call():
+            started = time.perf_counter()
+            try:
+                return get_llm(role).invoke(messages, config)
+            finally:
+                _record_call(role, time.perf_counter() - started)
+
+        return get_rate_limiter().call(call, estimate_tokens(messages))
+
+    async def ainvoke(messages, config):
+        async def call():
+            started = time.perf_counter()
+            try:
+                return await get_llm(role).ainvoke(messages, config)
+            finally:
+                _record_call(role, time.perf_counter() - started)
+
+        return await get_rate_limiter().acall(call, estimate_tokens(messages))
+
+    return RunnableLambda(invoke, afunc=ainvoke, name=f"{role}_llm")
+
+
+def _record_call(role: str, seconds: float) -> None:
+    with _role_stats_lock:
+        counts = _role_stats.setdefault(role, {"calls": 0, "seconds": 0.0})
+        counts["calls"] += 1
+        counts["seconds"] += seconds
+
+
+def role_stats() -> Dict[str, Dict[str, float]]:
+    """LLM calls made and seconds spent per role so far in this process."""
+    with _role_stats_lock:
+        return {role: dict(counts) for role, counts in _role_stats.items()}
@@ -1,83 +1,314 @@
 # main.py
+import asyncio
 import sys
-from uuid import uuid4
 import time
+from concurrent.futures import ProcessPoolExecutor
 
-from langgraph.checkpoint.memory import MemorySaver
-from langgraph.errors import GraphRecursionError
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
-from States.state import ReviewState
-from utils.github_utils.diff_parser import parse_diff
-from services.git_services.get_diff import get_diff
+from configs.memory_config import delete_stale_review_threads, open_checkpointer, review_thread_id
+
+from States.state import Chunk, File, ReviewState
+from utils.github_utils.diff_parser import iter_parse_diff
+from services.git_services.get_diff import DiffTooLargeError, stream_compare_diff, stream_diff
+from services.git_services.get_file_content import get_file_content
+from services.git_services.get_pr_files import stream_pr_files
 from services.git_services.get_pr_details import PRDetails, get_pr_details
-from utils.file_filters import filter_files_by_exclude_patterns
+from services.git_services.review_history import find_last_reviewed_head, get_previous_ai_comments
+from utils.diff_cache import DiffCache
+from utils.file_filters import get_path_matcher_from_env
+from utils.generated_file_detector import iter_mark_generated_files
+from utils.head_watcher import HeadWatcher
+from utils.incremental_review import IncrementalScope
+from utils.model_cascade import ModelCascade
+from utils.hunk_dedup import HunkDeduplicator
+from utils.hunk_packer import iter_pack_small_hunks
+from utils.python_rechunker import iter_rechunk_python_files
+from utils.review_budget import ReviewBudget
+from utils.review_cache import ReviewCache, guideline_settings
+from utils.review_deadline import ReviewDeadline
+from utils.risk_scorer import prioritize_files
+from utils.rate_limiter import share_rate_limits
+from utils.run_store import RunContext, register_run, release_run
+from utils.sharding import ShardResult, iter_shard_files, load_shard_results, shard_from_env, write_shard_result
+from utils.github_utils.review_body import format_review_body
+from nodes.git_comment_sender import post_review
 from utils.logger import get_logger
 import os
-from utils.vectorstore_utils import ensure_vectorstore_exists_and_get
-from graph import graph
 
 log = get_logger()
 
 
-def run_initial_review():
-    """Run the initial code review process."""
+def load_pr_files(pr_details: PRDetails) -> Iterator[File]:
+    """
+    Yields the PR's parsed, path-filtered files.
+
+    Reads from the diff cache when the same base/head pair was seen before, otherwise streams
+    the .diff (or the paged file list when GitHub rejects the diff as too large) and records it.
+    """
+    path_filter = get_path_matcher_from_env()
+    source = os.environ.get("DIFF_SOURCE", "diff").lower()
+
+    cache = DiffCache.from_env()
+    cache_key = cache.key(pr_details) if cache else None
+    if cache_key:
+        parse_key = cache.parse_key(f"{source}|{path_filter.exclude_patterns}|{path_filter.include_patterns}")
+        cached_files = cache.load_files(cache_key, parse_key)
+        if cached_files is not None:
+            return iter(cached_files)
+
+    files = None
+    if source != "files":
+        raw_lines = cache.load_raw_lines(cache_key) if cache_key else None
+        if raw_lines is None:
+            try:
+                raw_lines = stream_diff(pr_details)
+                if cache_key:
+                    raw_lines = cache.record_raw_lines(cache_key, raw_lines)
+            except DiffTooLargeError as error:
+                log.warning(f"Diff endpoint rejected the PR ({error}), falling back to the paged file list")
+        if raw_lines is not None:
+            files = iter_parse_diff(raw_lines, path_filter=path_filter)
+    if files is None:
+        files = stream_pr_files(pr_details, path_filter=path_filter)
+
+    if cache_key:
+        files = cache.record_files(cache_key, parse_key, files)
+    return files
+
+
+def review_reuse_check(review_cache: Optional[ReviewCache], hunk_dedup: Optional[HunkDeduplicator],
+                       guidelines_store) -> Callable[[str, Chunk], bool]:
+    """
+    Tells the hunk packer which hunks already have a review to reuse: a cached one, or that of
+    an identical hunk earlier in the PR.
+    """
+    seen = set()
+    guidelines = guideline_settings(guidelines_store)
+
+    def has_review(path: str, chunk: Chunk) -> bool:
+        if hunk_dedup is not None:
+            fingerprint = hunk_dedup.fingerprint(chunk, path)
+            if fingerprint in seen:
+                return True
+            seen.add(fingerprint)
+        return review_cache is not None and review_cache.contains(review_cache.key(chunk, path, guidelines))
+
+    return has_review
+
+
+def load_incremental_scope(pr_details: PRDetails) -> Tuple[Optional[IncrementalScope], List[dict]]:
+    """
+    Finds the head SHA of the last AI review and the interdiff to the current head.
+
+    Returns no scope (full review) when incremental review is off, the PR was never reviewed or
+    the interdiff cannot be fetched, e.g. after a force push removed the old head.
+    """
+    if os.environ.get("INCREMENTAL_REVIEW", "true").lower() == "false" or not pr_details.head_sha:
+        return None, []
+    try:
+        last_sha, review_ids = find_last_reviewed_head(pr_details)
+    except Exception as error:
+        log.warning(f"Could not read earlier reviews ({error}), running a full review")
+        return None, []
+    if not last_sha:
+        return None, []
+
+    if last_sha == pr_details.head_sha:
+        return IncrementalScope(last_sha, pr_details.head_sha), []
+
+    scope = None
+    try:
+        scope = IncrementalScope.from_diff_lines(stream_compare_diff(pr_details, last_sha, pr_details.head_sha),
+                                                 last_sha, pr_details.head_sha)
+    except Exception as error:
+        log.warning(f"Could not fetch the changes since {last_sha[:12]} ({error}), running a full review")
+    return scope, get_previous_ai_comments(pr_details, review_ids, scope)
+
+
+async def run_review_graph(state: ReviewState, config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Runs the graph on the config's thread. A run of the thread that did not finish is resumed
+    instead, so chunks reviewed before a crash are not sent to the LLM again; a finished thread
+    is cleared, as its checkpoints are only needed to resume, and so are the unfinished threads of
+    the PR's earlier heads.
+    """
+    # The graph (langgraph, the chains and their nodes) is imported and compiled only for a run
+    from graph import create_reviewer_graph
+
+    thread_id = config["configurable"]["thread_id"]
+    async with open_checkpointer() as checkpointer:
+        review_graph = create_reviewer_graph(checkpointer)
+        if state.mode == "initial_review":
+            await delete_stale_review_threads(checkpointer, state.pr_details)
+        snapshot = await review_graph.aget_state(config)
+        if snapshot.next:
+            log.info(f"Resuming interrupted run {thread_id} at {', '.join(snapshot.next)}")
+            final_state = await review_graph.ainvoke(None, config)
+        else:
+            if snapshot.values:
+                await checkpointer.adelete_thread(thread_id)
+            final_state = await review_graph.ainvoke(state, config)
+        await checkpointer.adelete_thread(thread_id)
+    return final_state
+
+
+def run_initial_review(shard: Optional[Tuple[int, int]] = None):
+    """
+    Run the initial code review process. With ``shard`` (index, count) only that shard's files are
+    reviewed and the comments are written for the merge step instead of being posted.
+    """
+    from langgraph.errors import GraphRecursionError
+
     log.info("\n" + "=" * 100 + " STARTED INITIAL CODE REVIEW " + "=" * 100 + "\n")
+    # The clock starts now, so fetching the diff and guidelines counts against the deadline too
+    review_deadline = ReviewDeadline.from_env()
 
     try:
         # Initialize guideline store if enabled
         guideline_store = None
         if os.environ.get('USE_VECTORSTORE', 'false').lower() == 'true':
             log.info("Using vectorstore for coding guidelines")
+            from utils.vectorstore_utils import ensure_vectorstore_exists_and_get
             guideline_store = ensure_vectorstore_exists_and_get()
 
-        # Get PR details and diff
+        # Get PR details and stream the diff; excluded files are dropped while parsing
         pr_details: PRDetails = get_pr_details()
-        diff = get_diff(pr_details)
-
-        if not diff:
-            log.warning("No diff found, nothing to review")
+        scope, previous_comments = load_incremental_scope(pr_details)
+        if scope is not None and scope.base_sha == pr_details.head_sha:
+            log.info(f"Head {pr_details.head_sha[:12]} was already reviewed, nothing to do")
             return
 
-        # Parse and filter diff
-        parsed_diff = parse_diff(diff)
-        filtered_diff = filter_files_by_exclude_patterns(parsed_diff)
+        filtered_diff = load_pr_files(pr_details)
+        if scope is not None:
+            # Only hunks adding lines since the last reviewed head are sent for review again
+            filtered_diff = scope.iter_filter_files(filtered_diff)
+        # Generated, vendored and minified files are flagged so the graph skips their hunks
+        filtered_diff = iter_mark_generated_files(filtered_diff)
+        if shard is not None:
+            # Every shard computes the same split and keeps its own files
+            filtered_diff = iter_shard_files(filtered_diff, *shard)
+        # Python hunks are merged/split along function and class boundaries of the new file
+        filtered_diff = iter_rechunk_python_files(filtered_diff, lambda path: get_file_content(pr_details, path))
+        # Small hunks share one reviewer prompt instead of paying its fixed cost each; hunks with
+        # a cached or duplicate review are left out, as a pack's review depends on all its hunks
+        review_cache = ReviewCache.from_env()
+        hunk_dedup = HunkDeduplicator.from_env()
+        filtered_diff = iter_pack_small_hunks(filtered_diff,
+                                              review_reuse_check(review_cache, hunk_dedup, guideline_store))
+        review_budget = ReviewBudget.from_env()
+        if review_budget is not None:
+            # With a budget the riskiest hunks go first, so the whole diff is read up front
+            filtered_diff = iter(prioritize_files(filtered_diff))
 
-        if not filtered_diff:
+        first_file = next(filtered_diff, None)
+        if first_file is None:
             log.warning("No files to analyze after filtering")
+            if shard is not None:
+                write_shard_result(ShardResult(head_sha=pr_details.head_sha, shard_index=shard[0], shard_count=shard[1]))
             return
 
+        # The diff and the store handles stay in the run store; the graph state only references them.
+        # The run id is the checkpoint thread, so a resumed run finds its diff under the same id.
+        run_id = register_run(RunContext(
+            pr_details=pr_details,
+            files=[first_file],
+            diff_stream=filtered_diff,
+            previous_comments=previous_comments,
+            guidelines_store=guideline_store,
+            review_cache=review_cache,
+            hunk_dedup=hunk_dedup,
+            review_budget=review_budget,
+            review_deadline=review_deadline,
+            head_watcher=HeadWatcher.from_env(pr_details),
+            model_cascade=ModelCascade.from_env(),
+            shard=shard,
+        ), review_thread_id(pr_details, f"initial_review-shard-{shard[0]}-of-{shard[1]}" if shard else "initial_review"))
+
         # Initialize state for initial review
         initial_state = ReviewState(
-            pr_details=pr_details,
-            files=filtered_diff,
+            run_id=run_id,
             comments=[],
-            guidelines_store=guideline_store,
+            incremental_base_sha=scope.base_sha if scope is not None else None,
             mode="initial_review"
         )
 
-        # Run the graph
-        checkpointer = MemorySaver()
-        checkpoint_id = uuid4()
-
+        # Run the graph; review_chunk bounds how many chunks are reviewed at once
         config = {
-            "checkpointer": checkpointer,
             "configurable": {
-                "thread_id": checkpoint_id
+                "thread_id": run_id
             }
         }
+        if review_budget is not None:
+            # Counts the requests and token usage of every LLM call in the run
+            config["callbacks"] = [review_budget]
 
-        final_state = graph.invoke(initial_state, config)
+        # LLM calls, guideline lookups and GitHub I/O overlap on one event loop
+        try:
+            final_state = asyncio.run(run_review_graph(initial_state, config))
+        finally:
+            release_run(run_id)
 
         log.info("\n" + "=" * 100 + " COMPLETED INITIAL CODE REVIEW " + "=" * 100 + "\n")
         return final_state
 
+    except GraphRecursionError as error:
+        log.error(f"Review graph exceeded its step limit ({error}); "
+                  f"lower MAX_LOOP or report the diff that caused it")
+        sys.exit(1)
     except Exception as error:
         log.exception(f"Error in initial review: {error}")
         sys.exit(1)
 
 
+def run_shard_merge(shard_count: int):
+    """Posts the comments the shards of this head wrote as a single review."""
+    log.info("\n" + "=" * 100 + " MERGING REVIEW SHARDS " + "=" * 100 + "\n")
+    pr_details = get_pr_details()
+    results, missing = load_shard_results(shard_count, pr_details.head_sha)
+    if not results:
+        log.warning(f"No shard of {shard_count} wrote results for this head, nothing to post")
+        return
+    if missing:
+        log.warning(f"Shards {missing} of {shard_count} did not report, posting the others")
+
+    comments = [comment for result in results for comment in result.comments]
+    body = format_review_body(
+        # Without the head marker the next push is reviewed in full, covering the missing shards' files
+        None if missing else pr_details.head_sha,
+        skipped_files=[f for result in results for f in result.skipped_files],
+        budget_skipped=[s for result in results for s in result.budget_skipped],
+        deadline_uncovered={path: hunks for result in results for path, hunks in result.deadline_uncovered.items()},
+        rate_limited={path: hunks for result in results for path, hunks in result.rate_limited.items()},
+        incremental_base_sha=results[0].incremental_base_sha,
+        missing_shards=missing,
+    )
+    log.info(post_review(pr_details, comments, body))
+
+
+def _review_shard(shard_index: int, shard_count: int) -> None:
+    # Runs in a worker process; the final state stays there
+    run_initial_review((shard_index, shard_count))
+
+
+def run_local_shards(shard_count: int):
+    """Reviews every shard in its own process, then merges them into one review."""
+    # The workers share the quota of one key, so each gets its part of the rate limits
+    with ProcessPoolExecutor(max_workers=shard_count, initializer=share_rate_limits,
+                             initargs=(shard_count,)) as pool:
+        futures = [pool.submit(_review_shard, index, shard_count) for index in range(shard_count)]
+        for index, future in enumerate(futures):
+            try:
+                future.result()
+            except BaseException as error:
+                log.error(f"Shard {index} failed: {error!r}")
+    run_shard_merge(shard_count)
+
+
 def run_reply_monitoring():
     """Monitor for user replies and respond to them."""
+    from langgraph.errors import GraphRecursionError
+
     log.info("\n" + "=" * 100 + " STARTED REPLY MONITORING " + "=" * 100 + "\n")
 
     pr_details = get_pr_details()
@@ -85,24 +316,23 @@ def run_reply_monitoring():
     while True:
         try:
             # Initialize state for reply mode
+            run_id = register_run(RunContext(pr_details=pr_details), review_thread_id(pr_details, "reply_mode"))
             reply_state = ReviewState(
-                pr_details=pr_details,
-                files=[],  # Not needed for reply mode
+                run_id=run_id,
                 mode="reply_mode"
             )
 
-            checkpointer = MemorySaver()
-            checkpoint_id = uuid4()
-
             config = {
-                "checkpointer": checkpointer,
                 "configurable": {
-                    "thread_id": checkpoint_id
+                    "thread_id": run_id
                 }
             }
 
             # Run the graph in reply mode
-            final_state = graph.invoke(reply_state, config)
+            try:
+                final_state = asyncio.run(run_review_graph(reply_state, config))
+            finally:
+                release_run(run_id)
 
             # Wait before checking again
             time.sleep(60)  # Check every minute
@@ -110,6 +340,9 @@ def run_reply_monitoring():
         except KeyboardInterrupt:
             log.info("Reply monitoring stopped by user")
             break
+        except GraphRecursionError as error:
+            log.error(f"Reply graph exceeded its step limit: {error}")
+            time.sleep(60)
         except Exception as error:
             log.exception(f"Error in reply monitoring: {error}")
             time.sleep(60)  # Wait before retrying
@@ -119,8 +352,17 @@ def main():
     """Main function to handle both initial review and reply monitoring."""
     mode = os.environ.get("MODE", "initial_review")
 
-    if mode == "initial_review":
+    shard_count, shard_index = shard_from_env()
+
+    if mode == "initial_review" and shard_count > 1:
+        if shard_index is None:
+            run_local_shards(shard_count)
+        else:
+            run_initial_review((shard_index, shard_count))
+    elif mode == "initial_review":
         run_initial_review()
+    elif mode == "merge_shards":
+        run_shard_merge(shard_count)
     elif mode == "reply_monitor":
         run_reply_monitoring()
     elif mode == "both":
@@ -1,27 +1,30 @@
 # nodes/conversation_agent.py
+from typing import Any, Dict, Optional
+
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from States.state import ReviewState
 from chains.conversation_agent_chain import conversation_agent_chain  # New chain needed
+from utils.llm_concurrency import llm_slot
 from utils.logger import get_logger
 
 log = get_logger()
 
 
-def conversation_agent_node(state: ReviewState) -> ReviewState:
-    """Generate AI responses to user replies in conversation threads."""
+def _conversation_inputs(state: ReviewState) -> Optional[Dict[str, Any]]:
+    """Builds the conversation chain inputs for the current thread, or None if it needs no reply."""
 
     if (state.current_thread_index >= len(state.conversation_threads) or
             not state.conversation_threads):
         log.info("No more conversation threads to process")
         state.done = True
-        return state
+        return None
 
     thread = state.conversation_threads[state.current_thread_index]
 
     if not thread.needs_ai_response:
         log.info(f"Thread {thread.comment_id} doesn't need AI response")
         state.current_thread_index += 1
-        return state
+        return None
 
     log.info(f"Processing conversation thread {thread.comment_id}")
 
@@ -41,11 +44,8 @@ def conversation_agent_node(state: ReviewState) -> ReviewState:
         if file.to_file and thread.file_path in file.to_file:
             relevant_file = file
             for chunk in file.chunks:
-                for change in chunk.changes:
-                    if change.line_number == thread.line_number:
-                        relevant_chunk = chunk
-                        break
-                if relevant_chunk:
+                if thread.line_number in chunk.line_numbers:
+                    relevant_chunk = chunk
                     break
             break
 
@@ -53,32 +53,63 @@ def conversation_agent_node(state: ReviewState) -> ReviewState:
     if relevant_chunk:
         code_context = "\n".join(relevant_chunk.formatted_chunk or [relevant_chunk.content])
 
+    return {
+        "conversation_history": context_str,
+        "last_user_message": thread.last_user_reply,
+        "code_context": code_context,
+        "file_path": thread.file_path,
+        "line_number": thread.line_number,
+        "original_review": thread.original_comment
+    }
+
+
+def _conversation_done(state: ReviewState, response: str) -> ReviewState:
+    thread = state.conversation_threads[state.current_thread_index]
+
+    # Add response to pending replies
+    state.pending_replies.append({
+        'thread_id': thread.comment_id,
+        'response': response,
+        'file_path': thread.file_path,
+        'line_number': thread.line_number
+    })
+
+    # Mark thread as processed
+    thread.needs_ai_response = False
+
+    log.info(f"Generated response for thread {thread.comment_id}")
+    return state
+
+
+def conversation_agent_node(state: ReviewState) -> ReviewState:
+    """Generate AI responses to user replies in conversation threads."""
+    inputs = _conversation_inputs(state)
+    if inputs is None:
+        return state
+
     try:
         # Generate response using conversation chain
-        response = conversation_agent_chain.invoke({
-            "conversation_history": context_str,
-            "last_user_message": thread.last_user_reply,
-            "code_context": code_context,
-            "file_path": thread.file_path,
-            "line_number": thread.line_number,
-            "original_review": thread.original_comment
-        })
-
-        # Add response to pending replies
-        state.pending_replies.append({
-            'thread_id': thread.comment_id,
-            'response': response,
-            'file_path': thread.file_path,
-            'line_number': thread.line_number
-        })
-
-        # Mark thread as processed
-        thread.needs_ai_response = False
-
-        log.info(f"Generated response for thread {thread.comment_id}")
+        response = conversation_agent_chain.invoke(inputs)
+        _conversation_done(state, response)
+    except Exception as e:
+        log.error(f"Error generating conversation response: {e}")
 
+    state.current_thread_index += 1
+    return state
+
+
+async def aconversation_agent_node(state: ReviewState) -> ReviewState:
+    """Async variant of ``conversation_agent_node``; the LLM call waits for a slot of the shared LLM semaphore."""
+    inputs = _conversation_inputs(state)
+    if inputs is None:
+        return state
+
+    try:
+        async with llm_slot():
+            response = await conversation_agent_chain.ainvoke(inputs)
+        _conversation_done(state, response)
     except Exception as e:
         log.error(f"Error generating conversation response: {e}")
 
     state.current_thread_index += 1
-    return state
\ No newline at end of file
+    return state
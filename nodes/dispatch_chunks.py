@@ -0,0 +1,79 @@
+# nodes/dispatch_chunks.py
+from typing import Any, Dict, List, Union
+
+from langgraph.types import Send
+
+from States.state import ReviewState
+from nodes.get_next_chunk import has_file, skip_file
+from utils.logger import get_logger
+from utils.path_utils import normalize_file_path
+from utils.run_store import chunk_key, chunk_run_id
+
+log = get_logger()
+
+
+def dispatch_chunks_node(state: ReviewState) -> Dict[str, Any]:
+    """
+    Reads the rest of the diff and queues every reviewable chunk for fan-out.
+
+    With hunk dedup on, only the first hunk of each duplicate group is queued; the others are
+    deferred to a second wave where they reuse its review.
+    """
+    while has_file(state, len(state.files)):
+        pass
+
+    if state.superseded():
+        log.info("PR head moved while reading the diff, not dispatching any chunk")
+        return {"skipped_files": state.skipped_files, "chunk_queue": [], "deferred_chunks": []}
+
+    queue, deferred, fingerprints = [], [], set()
+    for file in state.files:
+        if file.skip_reason:
+            skip_file(state, file)
+            continue
+        for chunk in file.chunks:
+            if state.hunk_dedup is not None:
+                fingerprint = state.hunk_dedup.fingerprint(chunk, normalize_file_path(file.to_file))
+                if fingerprint in fingerprints:
+                    deferred.append(chunk_key(file, chunk))
+                    continue
+                fingerprints.add(fingerprint)
+                # A packed chunk's review is recorded per member, so their duplicates wait for it too
+                fingerprints.update(state.hunk_dedup.fingerprint(member, path)
+                                    for path, member in zip(chunk.member_paths, chunk.member_chunks))
+            queue.append(chunk_key(file, chunk))
+
+    log.info(f"Dispatching {len(queue)} chunks for parallel review, {len(deferred)} duplicates deferred")
+    return {
+        "skipped_files": state.skipped_files,
+        "chunk_queue": queue,
+        "deferred_chunks": deferred,
+    }
+
+
+def collect_chunk_reviews_node(state: ReviewState) -> Dict[str, Any]:
+    """Joins a fan-out wave and queues the deferred duplicates, if any, as the next wave."""
+    log.info(f"Chunk review wave finished, {len(state.comments)} comments so far")
+    if state.superseded():
+        return {"chunk_queue": [], "deferred_chunks": []}
+    return {"chunk_queue": state.deferred_chunks, "deferred_chunks": []}
+
+
+def chunk_review_state(state: ReviewState, key: str) -> ReviewState:
+    """
+    The state a single fanned-out chunk review starts from: a run over one file holding just that
+    chunk, referenced by its id so the Send carries no diff.
+    """
+    return ReviewState(
+        run_id=chunk_run_id(state.run_id, key),
+        comments=[],
+        incremental_base_sha=state.incremental_base_sha,
+        mode=state.mode,
+    )
+
+
+def fan_out_chunks(state: ReviewState) -> Union[str, List[Send]]:
+    if not state.chunk_queue:
+        log.info("All chunks reviewed, sending comments to GitHub.")
+        return "git_comment_sender"
+    return [Send("review_chunk", chunk_review_state(state, key)) for key in state.chunk_queue]
@@ -1,28 +1,58 @@
 # nodes/feedback_agent.py
 import os
+from typing import Any, Dict, Optional
+
 from langchain_core.messages import HumanMessage
-from chains.feedback_agent_chain import feedback_agent_chain, ReviewFeedback
+from chains.feedback_agent_chain import cheap_feedback_agent_chain, feedback_agent_chain, ReviewFeedback
 from States.state import ReviewState
+from utils.llm_concurrency import llm_slot
 from utils.path_utils import normalize_file_path
 from utils.logger import get_logger
 
 log = get_logger()
 MAX_RETRIES = int(os.getenv("MAX_LOOP", "2"))
 
-def feedback_agent(state: ReviewState) -> ReviewState:
+
+def _feedback_chain(state: ReviewState):
+    return cheap_feedback_agent_chain if state.model_tier == "cheap" else feedback_agent_chain
+
+
+def _escalate(state: ReviewState, reason: str) -> ReviewState:
+    """Restarts the current chunk's review loop with the full model."""
+    log.info(f"Escalating chunk {state.current_chunk_index + 1} to the full model: {reason}")
+    state.model_cascade.escalated(reason)
+    state.model_tier = "full"
+    state.escalate_reason = reason
+    state.retry_count = 0
+    state.satisfied = False
+    state.review_feedback = None
+    state.llm_response = None
     state.next_agent = "reviewer_agent"
+    # The full reviewer starts over; keep only the system message
+    state.messages = state.messages[:1]
+    return state
+
+
+def _feedback_inputs(state: ReviewState) -> Optional[Dict[str, Any]]:
+    """Builds the feedback chain inputs, or None (with ``satisfied`` set) when there is nothing to evaluate."""
+    state.next_agent = "reviewer_agent"
+
+    if state.model_tier == "cheap" and state.escalate_reason is not None:
+        # The cheap review failed
+        _escalate(state, state.escalate_reason)
+        return None
 
     if not state.files or state.current_file_index >= len(state.files):
         log.error("No valid file to process")
         state.satisfied = True
-        return state
+        return None
 
     file = state.files[state.current_file_index]
 
     if not file.chunks or state.current_chunk_index >= len(file.chunks):
         log.error("No valid chunk to process")
         state.satisfied = True
-        return state
+        return None
 
     chunk = file.chunks[state.current_chunk_index]
     normalized_path = normalize_file_path(file.to_file)
@@ -30,7 +60,7 @@ def feedback_agent(state: ReviewState) -> ReviewState:
     if not state.llm_response:
         log.error("No LLM response to evaluate")
         state.satisfied = True
-        return state
+        return None
 
     last_ai_response = state.llm_response.model_dump_json(indent=2)
 
@@ -40,7 +70,17 @@ def feedback_agent(state: ReviewState) -> ReviewState:
     if state.retry_count >= MAX_RETRIES:
         log.info("Max retries exceeded. Accepting final response")
         state.satisfied = True
-        return state
+        return None
+
+    if state.review_deadline is not None and state.review_deadline.near():
+        log.info("Review deadline near. Accepting current response")
+        state.satisfied = True
+        return None
+
+    if state.superseded():
+        log.info("PR head moved. Not evaluating a review that will not be posted")
+        state.satisfied = True
+        return None
 
     history_str = "\n".join(
         f"{msg.type.upper()}: {msg.content}\n"
@@ -50,14 +90,27 @@ def feedback_agent(state: ReviewState) -> ReviewState:
 
     formatted_chunk = "\n".join(chunk.formatted_chunk or [chunk.content])
 
-    try:
-        feedback: ReviewFeedback = feedback_agent_chain.invoke({
-            "history_messages": history_str,
-            "ai_response": last_ai_response,
-            "user_query": formatted_chunk
-        })
-    except Exception as e:
-        log.error(f"Error in feedback agent chain: {e}")
+    return {
+        "history_messages": history_str,
+        "ai_response": last_ai_response,
+        "user_query": formatted_chunk
+    }
+
+
+def _feedback_failed(state: ReviewState, e: Exception) -> ReviewState:
+    log.error(f"Error in feedback agent chain: {e}")
+    if state.model_tier == "cheap":
+        return _escalate(state, "cheap feedback failed")
+    state.satisfied = True
+    return state
+
+
+def _feedback_done(state: ReviewState, feedback: ReviewFeedback) -> ReviewState:
+    if state.model_tier == "cheap":
+        reason = state.model_cascade.escalation_reason(state.llm_response, feedback)
+        if reason is not None:
+            return _escalate(state, reason)
+        log.info("Cheap model found nothing to flag, accepting its review")
         state.satisfied = True
         return state
 
@@ -69,7 +122,33 @@ def feedback_agent(state: ReviewState) -> ReviewState:
         state.review_feedback = feedback
         state.retry_count += 1
         state.satisfied = False
-        state.final_response = last_ai_response
+        state.final_response = state.llm_response.model_dump_json(indent=2)
         log.info(f"Feedback Agent Response: \n{feedback.model_dump_json(indent=2)}")
 
     return state
+
+
+def feedback_agent(state: ReviewState) -> ReviewState:
+    inputs = _feedback_inputs(state)
+    if inputs is None:
+        return state
+
+    try:
+        feedback: ReviewFeedback = _feedback_chain(state).invoke(inputs)
+    except Exception as e:
+        return _feedback_failed(state, e)
+    return _feedback_done(state, feedback)
+
+
+async def afeedback_agent(state: ReviewState) -> ReviewState:
+    """Async variant of ``feedback_agent``; the LLM call waits for a slot of the shared LLM semaphore."""
+    inputs = _feedback_inputs(state)
+    if inputs is None:
+        return state
+
+    try:
+        async with llm_slot():
+            feedback: ReviewFeedback = await _feedback_chain(state).ainvoke(inputs)
+    except Exception as e:
+        return _feedback_failed(state, e)
+    return _feedback_done(state, feedback)
@@ -1,7 +1,10 @@
 from States.state import ReviewState
 from utils.github_utils.create_comment import create_comment
+from utils.hunk_packer import split_packed_review
+from utils.incremental_review import is_duplicate_comment
 from utils.logger import get_logger
 from utils.path_utils import normalize_file_path
+from utils.review_cache import guideline_settings
 log = get_logger()
 
 
@@ -11,9 +14,11 @@ def format_comments_node(state: ReviewState) -> ReviewState:
 
     comments = []
 
+    # Keyed by (path, line): a packed chunk holds hunks of several files
+    file_path = normalize_file_path(file.to_file)
     line_map = {
-        change.line_number: change
-        for change in chunk.changes
+        (chunk.line_path(index) or file_path, change.line_number): change
+        for index, change in enumerate(chunk.iter_changes())
         if change.line_number is not None
     }
     log.debug(f"Changes in {file.to_file} For  Chunk Content {chunk.content}: ")
@@ -29,18 +34,28 @@ def format_comments_node(state: ReviewState) -> ReviewState:
 
             line_number = int(ai_response.lineNumber)
 
-            if line_number not in line_map:
+            path = file_path
+            if chunk.member_paths:
+                path = normalize_file_path(ai_response.filePath or "")
+                if (path, line_number) not in line_map:
+                    # Without a usable filePath the line number must be unique across the packed hunks
+                    candidates = [key for key in line_map if key[1] == line_number]
+                    path = candidates[0][0] if len(candidates) == 1 else path
+
+            if (path, line_number) not in line_map:
                 log.warning(f"Line {line_number} which comment generated by ai not found in the diff so Ignoring...")
                 continue
 
-            change = line_map[line_number]
+            change = line_map[(path, line_number)]
 
             if not change.content.startswith("+"):
                 log.warning(f"Line {line_number} which ai commented is not an added line: {change.content} so Ignoring... ")
                 continue
 
+            if is_duplicate_comment(path, line_number, change.content[1:], state.previous_comments):
+                log.info(f"Line {line_number} of {path} was already commented on in an earlier review so Ignoring...")
+                continue
 
-            path = normalize_file_path(file.to_file)
             comment = {
                 "body": ai_response.reviewComment.strip(),
                 "path": path,
@@ -56,6 +71,23 @@ def format_comments_node(state: ReviewState) -> ReviewState:
 
     state.comments.extend(comments)
 
+    # A packed chunk's review is stored per member hunk, the unit the next lookups are made for
+    reviewed = split_packed_review(chunk, state.llm_response) if chunk.member_chunks else []
+    if state.review_cache is not None and state.review_cache_key:
+        guidelines = guideline_settings(state.guidelines_store)
+        for path, member, response in reviewed:
+            state.review_cache.put(state.review_cache.key(member, path, guidelines), member, response)
+        if not reviewed:
+            state.review_cache.put(state.review_cache_key, chunk, state.llm_response)
+        state.review_cache_key = None
+
+    if state.hunk_dedup is not None and state.hunk_fingerprint:
+        for path, member, response in reviewed:
+            state.hunk_dedup.record(state.hunk_dedup.fingerprint(member, path), member, response)
+        if not reviewed:
+            state.hunk_dedup.record(state.hunk_fingerprint, chunk, state.llm_response)
+        state.hunk_fingerprint = None
+
     state.current_chunk_index += 1
     state.done = True
 
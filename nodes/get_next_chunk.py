@@ -3,14 +3,67 @@ from langchain_core.messages import SystemMessage
 from States.state import ReviewState
 from utils.logger import get_logger
 from utils.path_utils import normalize_file_path
+from utils.review_cache import guideline_settings
 
 log = get_logger()
 
 
+def has_file(state: ReviewState, index: int) -> bool:
+    """Pulls files from the streamed diff until ``index`` is available or the stream is exhausted."""
+    return state.run.has_file(index)
+
+
+def skip_file(state: ReviewState, file) -> None:
+    """Records a generated/vendored file in ``skipped_files`` and releases its hunks."""
+    state.skipped_files = state.skipped_files + [{
+        "path": normalize_file_path(file.to_file),
+        "reason": file.skip_reason,
+        "hunks": len(file.chunks),
+    }]
+    file.chunks = []
+
+
+def _use_duplicate_review(state: ReviewState, file, chunk) -> bool:
+    """Reuses the review of an identical hunk seen earlier in this PR, skipping the reviewer/feedback loop."""
+    state.hunk_fingerprint = None
+    if state.hunk_dedup is None:
+        return False
+    fingerprint = state.hunk_dedup.fingerprint(chunk, normalize_file_path(file.to_file))
+    projected = state.hunk_dedup.lookup(fingerprint, chunk)
+    if projected is None:
+        state.hunk_fingerprint = fingerprint
+        return False
+    log.info(f"Reusing review of an identical hunk for {normalize_file_path(file.to_file)} chunk {state.current_chunk_index + 1}")
+    state.llm_response = projected
+    state.next_agent = "format_comments"
+    return True
+
+
+def _use_cached_review(state: ReviewState, file, chunk) -> bool:
+    """Looks the chunk up in the review cache; on a hit the reviewer/feedback loop is skipped."""
+    state.review_cache_key = None
+    if state.review_cache is None:
+        return False
+    key = state.review_cache.key(chunk, normalize_file_path(file.to_file), guideline_settings(state.guidelines_store))
+    cached = state.review_cache.get(key, chunk)
+    if cached is None:
+        state.review_cache_key = key
+        return False
+    log.info(f"Review cache hit for {normalize_file_path(file.to_file)} chunk {state.current_chunk_index + 1}")
+    state.llm_response = cached
+    state.next_agent = "format_comments"
+    return True
+
+
 def get_next_chunk(state: ReviewState) -> ReviewState:
     """Move to the next chunk/file for processing."""
-    while state.current_file_index < len(state.files):
+    while has_file(state, state.current_file_index):
         file = state.files[state.current_file_index]
+        if file.skip_reason:
+            skip_file(state, file)
+            state.current_chunk_index = 0
+            state.current_file_index += 1
+            continue
         if state.current_chunk_index < len(file.chunks):
             log.info(f"\n{'='*50} REVIEWING {normalize_file_path(file.to_file)} CHUNK {state.current_chunk_index+1} {'='*50}\n")
             log.info(f"Processing file: {file.to_file}, chunk index: {state.current_chunk_index}")
@@ -19,8 +72,30 @@ def get_next_chunk(state: ReviewState) -> ReviewState:
             state.review_feedback = None
             state.llm_response = None
             state.next_agent = "reviewer_agent"
+            state.model_tier = "full"
+            state.escalate_reason = None
             state.done = False
             state.messages = [SystemMessage(content="You are an AI assistant. Observe the conversation history between a git code reviewer and feedback agent.")]
+            chunk = file.chunks[state.current_chunk_index]
+            if state.superseded():
+                # A newer push will be reviewed by its own run; nothing of this one gets posted
+                state.head_watcher.skip()
+                state.current_chunk_index += 1
+                continue
+            if _use_duplicate_review(state, file, chunk) or _use_cached_review(state, file, chunk):
+                return state
+            if state.review_budget is not None and state.review_budget.exhausted():
+                log.info(f"Review budget reached, skipping {normalize_file_path(file.to_file)} chunk {state.current_chunk_index + 1}")
+                state.review_budget.skip(normalize_file_path(file.to_file), chunk)
+                state.current_chunk_index += 1
+                continue
+            if state.review_deadline is not None and state.review_deadline.near():
+                log.info(f"Review deadline near, skipping {normalize_file_path(file.to_file)} chunk {state.current_chunk_index + 1}")
+                state.review_deadline.skip(normalize_file_path(file.to_file), chunk)
+                state.current_chunk_index += 1
+                continue
+            if state.model_cascade is not None:
+                state.model_tier = state.model_cascade.start_tier(normalize_file_path(file.to_file), chunk)
             return state
         else:
             state.current_chunk_index = 0
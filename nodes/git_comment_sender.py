@@ -1,30 +1,103 @@
 # nodes/git_comment_sender.py
 from States.state import ReviewState
-from services.git_services.git_review_comment_sender import create_review_comment
+from services.git_services.git_review_comment_sender import (create_review_comment, create_summary_review,
+                                                             update_summary_review)
+from services.git_services.review_history import find_last_marker_review
+from utils.github_utils.review_body import build_review_body, find_head_marker
 from utils.logger import get_logger
+from utils.rate_limiter import get_rate_limiter
+from utils.sharding import ShardResult, write_shard_result
 import sys
 
 log = get_logger()
 
 
-def git_comment_sender_node(state: ReviewState) -> ReviewState:
-    """Node to send accumulated comments to GitHub PR."""
-    comments = state.comments
-    pr_details = state.pr_details
-
-    log.info(f"Sending {len(comments)} total comments to GitHub PR")
-
+def post_review(pr_details, comments, body: str) -> str:
+    """Posts the comments as one PR review (or just the summary when there are none); returns the outcome."""
     if comments:
         try:
-            review_id = create_review_comment(pr_details, comments)
+            review_id = create_review_comment(pr_details, comments, body=body)
             log.info(f"Successfully posted review with ID: {review_id}")
-            state.final_response = f"Successfully posted {len(comments)} comments to PR review {review_id}"
+            return f"Successfully posted {len(comments)} comments to PR review {review_id}"
         except Exception as e:
             log.error(f"Failed to post comments: {e}")
-            state.final_response = f"Failed to post comments: {str(e)}"
             # Don't exit here, let the graph handle the error state
+            return f"Failed to post comments: {str(e)}"
+    elif pr_details.head_sha:
+        # Still record the reviewed head so the next push is reviewed incrementally. Moving the
+        # marker of the last AI review keeps clean pushes from adding a review each to the timeline.
+        try:
+            previous = find_last_marker_review(pr_details) if find_head_marker(body) else None
+            if previous is not None:
+                log.info(f"No issues found, updating the head recorded by review {previous.id}")
+                update_summary_review(previous, body)
+                return f"No issues found, updated summary of review {previous.id}"
+            log.info("No issues found, posting summary review only")
+            create_summary_review(pr_details, body)
+            return "No issues found, posted summary review"
+        except Exception as e:
+            log.error(f"Failed to post summary review: {e}")
+            return f"Failed to post summary review: {str(e)}"
     else:
         log.info("No issues found, no comments to post")
-        state.final_response = "No issues found, no comments to post"
+        return "No issues found, no comments to post"
+
+
+def git_comment_sender_node(state: ReviewState) -> ReviewState:
+    """Node to send accumulated comments to GitHub PR."""
+    comments = state.comments
+    pr_details = state.pr_details
+
+    log.info(f"Sending {len(comments)} total comments to GitHub PR")
+
+    if state.skipped_files:
+        skipped_hunks = sum(f["hunks"] for f in state.skipped_files)
+        log.info(f"Skipped {len(state.skipped_files)} generated/vendored files, saving {skipped_hunks} hunk reviews")
+
+    if state.hunk_dedup is not None:
+        log.info(f"Hunk dedup: {state.hunk_dedup.stats()}")
+
+    if state.review_cache is not None:
+        log.info(f"Review cache: {state.review_cache.stats()}")
+        state.review_cache.evict()
+
+    if state.review_budget is not None:
+        log.info(f"Review budget: {state.review_budget.stats()}")
+
+    if state.review_deadline is not None:
+        log.info(f"Review deadline: {state.review_deadline.stats()}")
+
+    log.info(f"LLM rate limiter: {get_rate_limiter().stats()}")
+
+    if state.model_cascade is not None:
+        log.info(f"Model cascade: {state.model_cascade.stats()}")
+
+    if state.head_watcher is not None:
+        log.info(f"Head watcher: {state.head_watcher.stats()}")
+        if state.superseded():
+            # The run of the newer head posts its own review (and records its head)
+            state.final_response = f"PR head moved to {state.head_watcher.latest_sha[:12]}, review not posted"
+            log.info(state.final_response)
+            return state
+
+    if state.run.shard is not None:
+        # The merge step posts one review for all shards
+        shard_index, shard_count = state.run.shard
+        write_shard_result(ShardResult(
+            head_sha=pr_details.head_sha,
+            shard_index=shard_index,
+            shard_count=shard_count,
+            comments=comments,
+            skipped_files=state.skipped_files,
+            budget_skipped=state.review_budget.skipped if state.review_budget is not None else [],
+            deadline_uncovered=state.review_deadline.uncovered if state.review_deadline is not None else {},
+            rate_limited=get_rate_limiter().unreviewed,
+            incremental_base_sha=state.incremental_base_sha,
+        ))
+        state.final_response = f"Wrote {len(comments)} comments for shard {shard_index + 1}/{shard_count}"
+        return state
+
+    state.final_response = post_review(pr_details, comments,
+                                       build_review_body(state, rate_limited=get_rate_limiter().unreviewed))
 
     return state
\ No newline at end of file
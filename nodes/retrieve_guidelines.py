@@ -1,34 +1,33 @@
 # nodes/retrieve_guidelines.py
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from States.state import ReviewState
+import asyncio
+from typing import List, Optional, Tuple
+
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
+from States.state import Chunk, File, ReviewState
+from utils.llm_concurrency import llm_slot
 from utils.path_utils import normalize_file_path
 from utils.logger import get_logger
-from llm_config import get_llm
+from llm_config import lazy_llm
 
 log = get_logger()
-llm = get_llm()
+llm = lazy_llm("guidelines")
 
 
-def retrieve_guidelines(state: ReviewState) -> ReviewState:
-    """Retrieve and summarize relevant coding guidelines for the current chunk."""
+def _current_chunk(state: ReviewState) -> Optional[Tuple[File, Chunk]]:
     if not state.files or state.current_file_index >= len(state.files):
         log.warning("No valid file to process")
-        return state
+        return None
 
     file = state.files[state.current_file_index]
 
     if not file.chunks or state.current_chunk_index >= len(file.chunks):
         log.warning("No valid chunk to process")
-        return state
+        return None
 
-    chunk = file.chunks[state.current_chunk_index]
-    path = normalize_file_path(file.to_file)
-    guidelines_store = state.guidelines_store
+    return file, file.chunks[state.current_chunk_index]
 
-    if not guidelines_store:
-        chunk.guidelines = "No guidelines found for this chunk."
-        return state
 
+def _search_context(state: ReviewState, chunk: Chunk) -> str:
     # Build search context based on available information
     search_context_parts = [f"code chunk: {chunk.content}"]
 
@@ -38,39 +37,99 @@ def retrieve_guidelines(state: ReviewState) -> ReviewState:
     if state.review_feedback:
         search_context_parts.append(f"feedback: {state.review_feedback.model_dump_json()}")
 
-    search_context = "\n".join(search_context_parts)
+    return "\n".join(search_context_parts)
+
+
+def _summary_messages(path: str, chunk: Chunk) -> List[BaseMessage]:
+    return [
+        SystemMessage(
+            content="You're an expert AI assistant who summarizes coding guidelines concisely. "
+                    "Provide a summary in 200 words or less, focusing on the most relevant points."
+        ),
+        HumanMessage(
+            content=f"Code Path: {path}\nCode Chunk:\n{chunk.content}\n\nRelated Guidelines:\n{chunk.guidelines}"
+        )
+    ]
+
+
+def _set_guidelines(chunk: Chunk, guidelines: List[str]) -> bool:
+    """Stores the found guidelines on the chunk; True if they are worth summarizing."""
+    chunk.guidelines = "\n".join(guidelines) if guidelines else "No relevant guidelines found."
+    return bool(chunk.guidelines) and chunk.guidelines != "No relevant guidelines found."
+
+
+def _summary_done(state: ReviewState, file: File, chunk: Chunk, response_summary: AIMessage) -> None:
+    summary_text = response_summary.content.strip()
+    chunk.guidelines = summary_text
+
+    state.messages.append(HumanMessage(content=f"Guidelines to follow: {summary_text} in file: {file.to_file}"))
+    log.info(f"Retrieved and summarized guidelines for file {file.to_file}\nSummary: {summary_text}")
+
+
+def _no_guidelines(state: ReviewState, file: File) -> None:
+    state.messages.append(HumanMessage(content=f"No specific guidelines found for file: {file.to_file}"))
+    log.info(f"No guidelines found for file {file.to_file}")
+
+
+def retrieve_guidelines(state: ReviewState) -> ReviewState:
+    """Retrieve and summarize relevant coding guidelines for the current chunk."""
+    current = _current_chunk(state)
+    if current is None:
+        return state
+    file, chunk = current
+    path = normalize_file_path(file.to_file)
+    guidelines_store = state.guidelines_store
+
+    if not guidelines_store:
+        chunk.guidelines = "No guidelines found for this chunk."
+        return state
 
     log.info(f"Retrieving guidelines for file: {path}")
 
     try:
-        guidelines = guidelines_store.get_relevant_guidelines(search_context, path)
-        chunk.guidelines = "\n".join(guidelines) if guidelines else "No relevant guidelines found."
-
-        if chunk.guidelines and chunk.guidelines != "No relevant guidelines found.":
+        guidelines = guidelines_store.get_relevant_guidelines(_search_context(state, chunk), path)
+        if _set_guidelines(chunk, guidelines):
             log.info("Using AI to summarize guidelines")
+            _summary_done(state, file, chunk, llm.invoke(_summary_messages(path, chunk)))
+        else:
+            _no_guidelines(state, file)
+
+    except Exception as e:
+        log.error(f"Error retrieving guidelines: {e}")
+        chunk.guidelines = "Error retrieving guidelines."
+
+    return state
+
 
-            messages = [
-                SystemMessage(
-                    content="You're an expert AI assistant who summarizes coding guidelines concisely. "
-                            "Provide a summary in 200 words or less, focusing on the most relevant points."
-                ),
-                HumanMessage(
-                    content=f"Code Path: {path}\nCode Chunk:\n{chunk.content}\n\nRelated Guidelines:\n{chunk.guidelines}"
-                )
-            ]
-
-            response_summary: AIMessage = llm.invoke(messages)
-            summary_text = response_summary.content.strip()
-            chunk.guidelines = summary_text
-
-            state.messages.append(HumanMessage(content=f"Guidelines to follow: {summary_text} in file: {file.to_file}"))
-            log.info(f"Retrieved and summarized guidelines for file {file.to_file}\nSummary: {summary_text}")
+async def aretrieve_guidelines(state: ReviewState) -> ReviewState:
+    """Async variant of ``retrieve_guidelines``: the vector store lookup runs in a worker thread."""
+    current = _current_chunk(state)
+    if current is None:
+        return state
+    file, chunk = current
+    path = normalize_file_path(file.to_file)
+    guidelines_store = state.guidelines_store
+
+    if not guidelines_store:
+        chunk.guidelines = "No guidelines found for this chunk."
+        return state
+
+    log.info(f"Retrieving guidelines for file: {path}")
+
+    try:
+        guidelines = await asyncio.to_thread(
+            guidelines_store.get_relevant_guidelines, _search_context(state, chunk), path
+        )
+        if _set_guidelines(chunk, guidelines):
+            log.info("Using AI to summarize guidelines")
+            async with llm_slot():
+                response_summary = await llm.ainvoke(_summary_messages(path, chunk))
+            _summary_done(state, file, chunk, response_summary)
         else:
-            state.messages.append(HumanMessage(content=f"No specific guidelines found for file: {file.to_file}"))
-            log.info(f"No guidelines found for file {file.to_file}")
+            _no_guidelines(state, file)
 
     except Exception as e:
         log.error(f"Error retrieving guidelines: {e}")
         chunk.guidelines = "Error retrieving guidelines."
 
-    return state
\ No newline at end of file
+    return state
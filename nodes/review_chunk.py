@@ -0,0 +1,131 @@
+# nodes/review_chunk.py
+import asyncio
+import threading
+import weakref
+from typing import Any, AsyncIterator, Dict, Iterator
+
+from langchain_core.runnables import RunnableLambda
+
+from States.state import CommentBatch, ReviewState
+from nodes.dispatch_chunks import chunk_review_state
+from nodes.get_next_chunk import has_file, skip_file
+from utils.logger import get_logger
+from utils.run_store import chunk_key, register_run, release_run
+
+log = get_logger()
+
+
+def make_review_chunk_node(chunk_review_graph, recursion_limit: int, max_concurrency: int = 0) -> RunnableLambda:
+    """
+    Wraps the per-chunk review loop (get_next_chunk, reviewer, feedback, format) as the fan-out
+    target; its comments are returned as a batch the ``comments`` reducer appends.
+    ``recursion_limit`` bounds the steps of one chunk's loop, whatever the limit of the outer run.
+
+    At most ``max_concurrency`` chunks (0: no limit) are reviewed at once. The limit is kept here
+    rather than in the run's ``max_concurrency``: langgraph creates the task of every queued chunk
+    up front and drops those still waiting for a slot, unawaited, when the run is interrupted.
+    """
+    config = {"recursion_limit": recursion_limit}
+    slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency > 0 else None
+    # asyncio semaphores belong to one event loop, and each run has its own
+    async_slots = weakref.WeakKeyDictionary()
+
+    def review_chunk(state: ReviewState) -> Dict[str, Any]:
+        try:
+            if slots is not None:
+                with slots:
+                    result = chunk_review_graph.invoke(state, config)
+            else:
+                result = chunk_review_graph.invoke(state, config)
+        except Exception as e:
+            log.error(f"Chunk review of {state.files[0].to_file} failed: {e}")
+            return {"comments": CommentBatch()}
+        finally:
+            release_run(state.run_id)
+        return {"comments": CommentBatch(comments=result.get("comments", []))}
+
+    async def areview_chunk(state: ReviewState) -> Dict[str, Any]:
+        try:
+            if max_concurrency > 0:
+                loop = asyncio.get_running_loop()
+                if loop not in async_slots:
+                    async_slots[loop] = asyncio.Semaphore(max_concurrency)
+                async with async_slots[loop]:
+                    result = await chunk_review_graph.ainvoke(state, config)
+            else:
+                result = await chunk_review_graph.ainvoke(state, config)
+        except Exception as e:
+            log.error(f"Chunk review of {state.files[0].to_file} failed: {e}")
+            return {"comments": CommentBatch()}
+        finally:
+            release_run(state.run_id)
+        return {"comments": CommentBatch(comments=result.get("comments", []))}
+
+    return RunnableLambda(review_chunk, afunc=areview_chunk, name="review_chunk")
+
+
+def _chunk_state(state: ReviewState, file_index: int, chunk_index: int) -> ReviewState:
+    file = state.files[file_index]
+    chunk_state = chunk_review_state(state, chunk_key(file, file.chunks[chunk_index]))
+    register_run(state.run.chunk_run_at(file_index, chunk_index), chunk_state.run_id)
+    return chunk_state
+
+
+def _iter_chunk_states(state: ReviewState) -> Iterator[ReviewState]:
+    """
+    Yields the state of each chunk's review in diff order, pulling the next file from the diff
+    stream only once the chunks before it have been reviewed.
+    """
+    file_index = 0
+    while has_file(state, file_index):
+        file = state.files[file_index]
+        if file.skip_reason:
+            skip_file(state, file)
+        for chunk_index in range(len(file.chunks)):
+            if state.superseded():
+                log.info("PR head moved, not reviewing the rest of the diff")
+                return
+            yield _chunk_state(state, file_index, chunk_index)
+        file_index += 1
+
+
+async def _aiter_chunk_states(state: ReviewState) -> AsyncIterator[ReviewState]:
+    """
+    ``_iter_chunk_states`` on the event loop: fetching the next page of the diff and checking the
+    PR head are blocking GitHub calls, so they run in a worker thread while other coroutines go on.
+    """
+    file_index = 0
+    while await asyncio.to_thread(has_file, state, file_index):
+        file = state.files[file_index]
+        if file.skip_reason:
+            skip_file(state, file)
+        for chunk_index in range(len(file.chunks)):
+            if await asyncio.to_thread(state.superseded):
+                log.info("PR head moved, not reviewing the rest of the diff")
+                return
+            yield _chunk_state(state, file_index, chunk_index)
+        file_index += 1
+
+
+def make_review_in_order_node(chunk_review_graph, recursion_limit: int) -> RunnableLambda:
+    """
+    Reviews the chunks one after another while the diff is still streaming in, each in the same
+    per-chunk loop as ``review_chunk``; used instead of the fan-out when REVIEW_CONCURRENCY is 1,
+    so the first review does not wait for the whole diff. One step of the outer run, whatever the
+    size of the PR.
+    """
+    review_chunk = make_review_chunk_node(chunk_review_graph, recursion_limit)
+
+    def review_in_order(state: ReviewState) -> Dict[str, Any]:
+        comments = []
+        for chunk_state in _iter_chunk_states(state):
+            comments.extend(review_chunk.invoke(chunk_state)["comments"].comments)
+        return {"comments": CommentBatch(comments=comments), "skipped_files": state.skipped_files}
+
+    async def areview_in_order(state: ReviewState) -> Dict[str, Any]:
+        comments = []
+        async for chunk_state in _aiter_chunk_states(state):
+            comments.extend((await review_chunk.ainvoke(chunk_state))["comments"].comments)
+        return {"comments": CommentBatch(comments=comments), "skipped_files": state.skipped_files}
+
+    return RunnableLambda(review_in_order, afunc=areview_in_order, name="review_in_order")
@@ -1,22 +1,28 @@
 # nodes/reviewer_agent.py
+from typing import Any, Dict, Optional
+
 from langchain_core.messages import AIMessage
 from States.state import ReviewState, ReviewResponse
-from chains.reviewer_agent_chain import reviewer_agent_chain
+from chains.reviewer_agent_chain import cheap_reviewer_agent_chain, reviewer_agent_chain
+from utils.llm_concurrency import llm_slot
 from utils.path_utils import normalize_file_path
+from utils.rate_limiter import RateLimitExceeded, get_rate_limiter
 from utils.logger import get_logger
 
 log = get_logger()
 
-def reviewer_agent(state: ReviewState) -> ReviewState:
+
+def _reviewer_inputs(state: ReviewState) -> Optional[Dict[str, Any]]:
+    """Builds the reviewer chain inputs for the current chunk, or None if there is no chunk to review."""
     if not state.files or state.current_file_index >= len(state.files):
         log.error("No valid file to process")
-        return state
+        return None
 
     file = state.files[state.current_file_index]
 
     if not file.chunks or state.current_chunk_index >= len(file.chunks):
         log.error("No valid chunk to process")
-        return state
+        return None
 
     chunk = file.chunks[state.current_chunk_index]
     pr_details = state.pr_details
@@ -25,7 +31,8 @@ def reviewer_agent(state: ReviewState) -> ReviewState:
         content=f"Reviewing chunk: {chunk.content} in file: {file.to_file} for PR: {pr_details.title}"
     ))
 
-    normalized_path = normalize_file_path(file.to_file)
+    # A packed chunk spans several files, each introduced by its own header in the diff
+    normalized_path = ", ".join(chunk.member_paths) or normalize_file_path(file.to_file)
     formatted_chunk = "\n".join(chunk.formatted_chunk or [chunk.content])
     critique = state.review_feedback.critique if state.review_feedback else "None provided."
     suggestion_text = "\n".join(state.review_feedback.suggestions) if state.review_feedback else "None."
@@ -39,26 +46,78 @@ def reviewer_agent(state: ReviewState) -> ReviewState:
         if hasattr(msg, 'content') and msg.content
     )
 
-    try:
-        review = reviewer_agent_chain.invoke({
-            "pr_title": pr_details.title,
-            "pr_description": pr_details.description or "",
-            "file_path": normalized_path,
-            "code_diff": formatted_chunk,
-            # "history_messages": history_str,
-            "guidelines": chunk.guidelines or "No guidelines provided.",
-            "critique": critique,
-            "suggestion_text": suggestion_text,
-        })
-    except Exception as e:
-        log.error(f"Error in reviewer_agent_chain.invoke: {e}")
+    return {
+        "pr_title": pr_details.title,
+        "pr_description": pr_details.description or "",
+        "file_path": normalized_path,
+        "code_diff": formatted_chunk,
+        # "history_messages": history_str,
+        "guidelines": chunk.guidelines or "No guidelines provided.",
+        "critique": critique,
+        "suggestion_text": suggestion_text,
+    }
+
+
+def _reviewer_chain(state: ReviewState):
+    return cheap_reviewer_agent_chain if state.model_tier == "cheap" else reviewer_agent_chain
+
+
+def _review_failed(state: ReviewState, e: Exception) -> ReviewState:
+    log.error(f"Error in reviewer_agent_chain.invoke: {e}")
+    if state.model_tier == "cheap":
+        # The feedback step escalates the chunk to the full model, whose review is cached as usual
+        state.escalate_reason = "cheap review failed"
         state.llm_response = ReviewResponse(reviews=[])
         state.next_agent = "feedback_agent"
         return state
+    rate_limited = isinstance(e, RateLimitExceeded)
+    if rate_limited:
+        # Ends the chunk here: another LLM call for feedback would only be throttled too
+        state.next_agent = "format_comments"
+        if state.retry_count > 0 and state.llm_response is not None:
+            # Keep the previous round's review rather than dropping it
+            return state
+        # Never reviewed, which the summary says instead of passing it off as clean
+        get_rate_limiter().skip(normalize_file_path(state.files[state.current_file_index].to_file))
+    state.llm_response = ReviewResponse(reviews=[])
+    # An empty response after an error must not be cached as a clean review
+    state.review_cache_key = None
+    state.hunk_fingerprint = None
+    if not rate_limited:
+        state.next_agent = "feedback_agent"
+    return state
+
 
+def _review_done(state: ReviewState, review: ReviewResponse) -> ReviewState:
     state.messages.append(AIMessage(content=f"Git Reviewer Response: {review.model_dump_json(indent=2)}"))
     state.llm_response = review
     state.next_agent = "feedback_agent"
 
     log.info(f"Reviewer Agent Response: \n{review.model_dump_json(indent=2)}")
     return state
+
+
+def reviewer_agent(state: ReviewState) -> ReviewState:
+    inputs = _reviewer_inputs(state)
+    if inputs is None:
+        return state
+
+    try:
+        review = _reviewer_chain(state).invoke(inputs)
+    except Exception as e:
+        return _review_failed(state, e)
+    return _review_done(state, review)
+
+
+async def areviewer_agent(state: ReviewState) -> ReviewState:
+    """Async variant of ``reviewer_agent``; the LLM call waits for a slot of the shared LLM semaphore."""
+    inputs = _reviewer_inputs(state)
+    if inputs is None:
+        return state
+
+    try:
+        async with llm_slot():
+            review = await _reviewer_chain(state).ainvoke(inputs)
+    except Exception as e:
+        return _review_failed(state, e)
+    return _review_done(state, review)
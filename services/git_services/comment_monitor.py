@@ -2,7 +2,7 @@
 import os
 import time
 from typing import List, Dict, Any
-from services.git_services.github_client import gh
+from services.git_services.github_client import get_github
 from services.git_services.get_pr_details import PRDetails
 from utils.logger import get_logger
 
@@ -14,7 +14,7 @@ class CommentMonitor:
 
     def __init__(self, pr_details: PRDetails):
         self.pr_details = pr_details
-        self.repo = gh.get_repo(f"{pr_details.owner}/{pr_details.repo}")
+        self.repo = get_github().get_repo(f"{pr_details.owner}/{pr_details.repo}")
         self.pr = self.repo.get_pull(pr_details.pull_number)
         self.ai_comment_ids = set()  # Track AI-generated comment IDs
 
@@ -1,12 +1,43 @@
 # services/get_diff.py
 import os
+from typing import Iterator
+
 import requests
 from services.git_services.get_pr_details import PRDetails
+from services.git_services.github_client import github_api_url
 from utils.logger import get_logger
 
 log = get_logger()
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+STREAM_CHUNK_SIZE = 64 * 1024
+# Statuses GitHub answers with when a PR's diff is too large for the .diff endpoint
+DIFF_TOO_LARGE_STATUSES = (406, 413, 422)
+
 
+class DiffTooLargeError(Exception):
+    """Raised when GitHub refuses to render the PR's .diff because it is too large."""
+
+
+def _diff_request(pr_details: PRDetails, stream: bool = False, api_path: str = None) -> requests.Response:
+    full_repo_name = f"{pr_details.owner}/{pr_details.repo}"
+    log.info(f"Attempting to fetch diff for PR #{pr_details.pull_number} from {full_repo_name}")
+    api_path = api_path or f"pulls/{pr_details.pull_number}.diff"
+    api_url = f"{github_api_url()}/repos/{full_repo_name}/{api_path}"
+    headers = {
+        'Authorization': f'Bearer {GITHUB_TOKEN}',
+        'Accept': 'application/vnd.github.v3.diff'
+    }
+    log.debug(f"Making API request to: {api_url}")
+    response = requests.get(api_url, headers=headers, stream=stream)
+    log.debug(f"GitHub API response status code: {response.status_code}")
+    if response.status_code in DIFF_TOO_LARGE_STATUSES:
+        log.warning(f"GitHub could not render the diff. Status code: {response.status_code}")
+        raise DiffTooLargeError(f"GitHub API returned {response.status_code}: {response.text}")
+    if response.status_code != 200:
+        log.error(f"Failed to get diff. Status code: {response.status_code}")
+        log.error(f"Response content: {response.text}")
+        raise Exception(f"GitHub API returned {response.status_code}: {response.text}")
+    return response
 
 
 def get_diff(pr_details:PRDetails) -> str:
@@ -15,25 +46,52 @@ def get_diff(pr_details:PRDetails) -> str:
     """
     log.info(
         "\n---------------------------------------------------------------------------Fetching Git Diff for the PR---------------------------------------------------------\n")
-    full_repo_name = f"{pr_details.owner}/{pr_details.repo}"
-    log.info(f"Attempting to fetch diff for PR #{pr_details.pull_number} from {full_repo_name}")
     try:
-        api_url = f"https://api.github.com/repos/{full_repo_name}/pulls/{pr_details.pull_number}.diff"
-        headers = {
-            'Authorization': f'Bearer {GITHUB_TOKEN}',
-            'Accept': 'application/vnd.github.v3.diff'
-        }
-        log.debug(f"Making API request to: {api_url}")
-        response = requests.get(api_url, headers=headers)
-        log.debug(f"GitHub API response status code: {response.status_code}")
-        if response.status_code == 200:
-            diff = response.text
-            log.debug(f"Retrieved diff of length: {len(diff)} characters")
-            return diff
-        else:
-            log.error(f"Failed to get diff. Status code: {response.status_code}")
-            log.error(f"Response content: {response.text}")
-            raise Exception(f"GitHub API returned {response.status_code}: {response.text}")
+        diff = _diff_request(pr_details).text
+        log.debug(f"Retrieved diff of length: {len(diff)} characters")
+        return diff
+    except Exception as e:
+        log.exception(f"Exception occurred while getting diff: {str(e)}")
+        raise
+
+
+def stream_diff(pr_details: PRDetails) -> Iterator[str]:
+    """
+    Streams the raw .diff of a pull request from GitHub line by line.
+
+    The request is sent immediately, so HTTP errors (including DiffTooLargeError) are raised
+    here; the body is then read incrementally by the returned iterator, so the diff is never
+    held in memory as a whole and the caller can start working on the first file while the
+    rest is still downloading.
+    """
+    log.info(
+        "\n---------------------------------------------------------------------------Streaming Git Diff for the PR---------------------------------------------------------\n")
+    try:
+        response = _diff_request(pr_details, stream=True)
+    except DiffTooLargeError:
+        raise
     except Exception as e:
         log.exception(f"Exception occurred while getting diff: {str(e)}")
         raise
+    return _iter_response_lines(response)
+
+
+def _iter_response_lines(response: requests.Response) -> Iterator[str]:
+    with response:
+        response.encoding = response.encoding or "utf-8"
+        line_count = 0
+        for line in response.iter_lines(chunk_size=STREAM_CHUNK_SIZE, decode_unicode=True):
+            line_count += 1
+            yield line
+        log.debug(f"Streamed diff of {line_count} lines")
+
+
+def stream_compare_diff(pr_details: PRDetails, base_sha: str, head_sha: str) -> Iterator[str]:
+    """
+    Streams the diff between two commits of the PR's repository line by line.
+
+    Uses the three-dot compare, i.e. the changes on ``head_sha`` since its merge base with ``base_sha``.
+    """
+    log.info(f"Streaming diff between {base_sha[:12]} and {head_sha[:12]}")
+    response = _diff_request(pr_details, stream=True, api_path=f"compare/{base_sha}...{head_sha}")
+    return _iter_response_lines(response)
@@ -0,0 +1,28 @@
+# services/get_file_content.py
+import os
+from typing import Optional
+from urllib.parse import quote
+
+import requests
+from services.git_services.get_pr_details import PRDetails
+from services.git_services.github_client import github_api_url
+from utils.logger import get_logger
+
+log = get_logger()
+GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+
+
+def get_file_content(pr_details: PRDetails, path: str, ref: Optional[str] = None) -> Optional[str]:
+    """Returns the text of ``path`` at ``ref`` (the PR head by default), or None if it cannot be read."""
+    ref = ref or pr_details.head_sha
+    api_url = f"{github_api_url()}/repos/{pr_details.owner}/{pr_details.repo}/contents/{quote(path)}"
+    headers = {
+        'Authorization': f'Bearer {GITHUB_TOKEN}',
+        'Accept': 'application/vnd.github.raw'
+    }
+    log.debug(f"Fetching {path} at {ref}")
+    response = requests.get(api_url, headers=headers, params={"ref": ref} if ref else None)
+    if response.status_code != 200:
+        log.warning(f"Failed to get content of {path}. Status code: {response.status_code}")
+        return None
+    return response.text
@@ -1,12 +1,13 @@
 # services/get_pr_details.py
 import os
-from services.git_services.github_client import gh
+from services.git_services.github_client import get_github
 from utils.logger import get_logger
 
 log = get_logger()
 
 class PRDetails:
-    def __init__(self, owner: str, repo: str, pull_number: int, title: str, description: str,pr_obj=None,comment_id: int = None):
+    def __init__(self, owner: str, repo: str, pull_number: int, title: str, description: str,pr_obj=None,comment_id: int = None,
+                 base_sha: str = None, head_sha: str = None):
         self.owner = owner
         self.repo = repo
         self.pull_number = pull_number
@@ -15,6 +16,8 @@ class PRDetails:
         self.pr_obj = pr_obj
         #todo need to look
         self.comment_id = comment_id
+        self.base_sha = base_sha
+        self.head_sha = head_sha
 
 
 def get_pr_details() -> PRDetails:
@@ -22,8 +25,15 @@ def get_pr_details() -> PRDetails:
     pull_number = int(os.environ.get("PULL_NUMBER"))
     repo_full_name = os.environ.get("REPOSITORY")
     owner, repo = repo_full_name.split("/")
-    repo_obj = gh.get_repo(repo_full_name)
+    repo_obj = get_github().get_repo(repo_full_name)
     pr = repo_obj.get_pull(pull_number)
-    return PRDetails(owner, repo, pull_number, pr.title, pr.body,pr,pull_number)
+    return PRDetails(owner, repo, pull_number, pr.title, pr.body,pr,pull_number,
+                     base_sha=pr.base.sha, head_sha=pr.head.sha)
 
 
+
+
+def get_head_sha(pr_details: PRDetails) -> str:
+    """The PR's current head SHA, fetched with a single request."""
+    repo_obj = get_github().get_repo(f"{pr_details.owner}/{pr_details.repo}", lazy=True)
+    return repo_obj.get_pull(pr_details.pull_number).head.sha
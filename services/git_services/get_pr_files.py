@@ -0,0 +1,119 @@
+# services/get_pr_files.py
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from States.state import File
+from services.git_services.get_pr_details import PRDetails
+from services.git_services.github_client import github_api_url
+from utils.file_filters import PathMatcher
+from utils.github_utils.diff_parser import iter_parse_diff, quote_diff_path
+from utils.logger import get_logger
+
+log = get_logger()
+GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+PER_PAGE = 100
+# GitHub stops listing a pull request's files after 3000 entries
+MAX_PAGES = 30
+
+
+def _make_session(max_workers: int) -> requests.Session:
+    session = requests.Session()
+    session.headers.update({
+        'Authorization': f'Bearer {GITHUB_TOKEN}',
+        'Accept': 'application/vnd.github+json'
+    })
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _fetch_page(session: requests.Session, url: str, page: int) -> requests.Response:
+    log.debug(f"Fetching PR files page {page}: {url}")
+    response = session.get(url, params={"per_page": PER_PAGE, "page": page})
+    if response.status_code != 200:
+        log.error(f"Failed to get PR files page {page}. Status code: {response.status_code}")
+        raise Exception(f"GitHub API returned {response.status_code}: {response.text}")
+    return response
+
+
+def _last_page(response: requests.Response) -> int:
+    last = response.links.get("last", {}).get("url")
+    if not last:
+        return 1
+    query = requests.utils.urlparse(last).query
+    for param in query.split("&"):
+        name, _, value = param.partition("=")
+        if name == "page" and value.isdigit():
+            return min(int(value), MAX_PAGES)
+    return 1
+
+
+def _entry_to_diff_lines(entry: Dict[str, Any]) -> Iterator[str]:
+    """Rebuilds the git diff section of one entry from the files listing so the regular parser can read it."""
+    filename = entry["filename"]
+    previous = entry.get("previous_filename") or filename
+    status = entry.get("status", "modified")
+
+    source, target = quote_diff_path(f"a/{previous}"), quote_diff_path(f"b/{filename}")
+    yield f"diff --git {source} {target}"
+    if status == "added":
+        yield "new file mode 100644"
+    elif status == "removed":
+        yield "deleted file mode 100644"
+    elif status in ("renamed", "copied"):
+        verb = "rename" if status == "renamed" else "copy"
+        yield f"{verb} from {previous}"
+        yield f"{verb} to {filename}"
+
+    patch = entry.get("patch")
+    if patch is None:
+        # GitHub omits the patch for binary files and for very large ones
+        log.warning(f"No patch available for {filename}, it will not be reviewed")
+        return
+    yield "--- /dev/null" if status == "added" else f"--- {source}"
+    yield "+++ /dev/null" if status == "removed" else f"+++ {target}"
+    yield from patch.splitlines()
+
+
+def _parse_page(entries: List[Dict[str, Any]], path_filter: Optional[PathMatcher]) -> Iterator[File]:
+    lines = (line for entry in entries for line in _entry_to_diff_lines(entry))
+    return iter_parse_diff(lines, path_filter=path_filter)
+
+
+def stream_pr_files(pr_details: PRDetails, path_filter: Optional[PathMatcher] = None,
+                    max_workers: Optional[int] = None) -> Iterator[File]:
+    """
+    Builds File/Chunk objects from the paginated pull request files listing.
+
+    Used when the .diff endpoint refuses a large PR. The first page is fetched up front to
+    learn the page count and the remaining pages are fetched concurrently on a bounded pool.
+    Pages are parsed and yielded in page order, each as soon as it and the pages before it have
+    arrived, so the files come in the same order on every run (resume relies on it).
+    """
+    max_workers = max_workers or int(os.getenv("PR_FILES_WORKERS", "4"))
+    full_repo_name = f"{pr_details.owner}/{pr_details.repo}"
+    url = f"{github_api_url()}/repos/{full_repo_name}/pulls/{pr_details.pull_number}/files"
+    log.info(f"Fetching paginated file list for PR #{pr_details.pull_number} from {full_repo_name}")
+
+    session = _make_session(max_workers)
+    try:
+        first = _fetch_page(session, url, 1)
+        last_page = _last_page(first)
+        log.info(f"PR file list has {last_page} page(s), fetching with {max_workers} workers")
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {page: executor.submit(_fetch_page, session, url, page) for page in range(2, last_page + 1)}
+
+            yield from _parse_page(first.json(), path_filter)
+            # Pages that arrive early stay buffered in their futures until their turn
+            for page, future in futures.items():
+                entries = future.result().json()
+                log.debug(f"Parsing PR files page {page} with {len(entries)} entries")
+                yield from _parse_page(entries, path_filter)
+    finally:
+        session.close()
@@ -16,8 +16,22 @@ log = get_logger()
 #     print(response.status_code, response.json())
 
 
+def create_summary_review(pr_details: PRDetails, body: str):
+    """Creates a PR review without inline comments, e.g. to record the reviewed head when nothing was found."""
+    review = pr_details.pr_obj.create_review(body=body, event="COMMENT")
+    log.info(f"Successfully created summary PR review with ID: {review.id}")
+    return review.id
 
-def create_review_comment(pr_details: PRDetails,comments: List[Dict[str, Any]]):
+
+def update_summary_review(review, body: str):
+    """Replaces the body of an earlier review, e.g. to move its reviewed-head marker to the new head."""
+    if review.body != body:
+        review.edit(body)
+        log.info(f"Successfully updated PR review {review.id}")
+    return review.id
+
+
+def create_review_comment(pr_details: PRDetails,comments: List[Dict[str, Any]], body: str = "Code review by OpenAI"):
     """Creates a pull request review with comments on specific lines."""
     print(f"==============Creating PR review with {len(comments)} comments===================")
     if not comments:
@@ -44,16 +58,16 @@ def create_review_comment(pr_details: PRDetails,comments: List[Dict[str, Any]]):
         for comment in comments:
             path = comment.get('path')
             line = comment.get('line')
-            body = comment.get('body')
+            comment_body = comment.get('body')
 
-            if not path or not line or not body:
+            if not path or not line or not comment_body:
                 log.debug(f"Skipping comment with missing data: path={path}, line={line}")
                 continue
 
             formatted_comment = {
                 'path': path,
                 'line': line,
-                'body': body
+                'body': comment_body
             }
 
             log.info(f"Adding comment for {path}:{line}")
@@ -66,7 +80,7 @@ def create_review_comment(pr_details: PRDetails,comments: List[Dict[str, Any]]):
         # Create the pull request review with all comments
         pr=pr_details.pr_obj
         review = pr.create_review(
-            body="Code review by OpenAI",
+            body=body,
             event="COMMENT",
             comments=formatted_comments
         )
@@ -85,14 +99,14 @@ def create_review_comment(pr_details: PRDetails,comments: List[Dict[str, Any]]):
             for comment in comments:
                 path = comment.get('path')
                 line = comment.get('line')
-                body = comment.get('body')
+                comment_body = comment.get('body')
 
-                if not path or not line or not body:
+                if not path or not line or not comment_body:
                     continue
 
                 try:
                     pr_comment = pr.create_comment(
-                        body=body,
+                        body=comment_body,
                         path=path,
                         line=line
                     )
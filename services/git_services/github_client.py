@@ -1,5 +1,15 @@
 # services/github_client.py
 import os
-from github import Github
+from functools import lru_cache
 
-gh = Github(os.getenv("GITHUB_TOKEN"))
+
+@lru_cache(maxsize=None)
+def get_github():
+    """The GitHub client, created on first use; PyGithub is imported only then."""
+    from github import Github
+    return Github(os.getenv("GITHUB_TOKEN"))
+
+
+def github_api_url() -> str:
+    """Base URL of the REST API; GITHUB_API_URL points it at GitHub Enterprise Server."""
+    return os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
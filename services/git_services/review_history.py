@@ -0,0 +1,90 @@
+# services/git_services/review_history.py
+import os
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from services.git_services.get_pr_details import PRDetails
+from services.git_services.github_client import get_github
+from utils.github_utils.review_body import find_head_marker
+from utils.incremental_review import IncrementalScope, comment_line_text
+from utils.logger import get_logger
+
+log = get_logger()
+
+
+# Login of the token GitHub Actions provides, which cannot read its own user
+ACTIONS_BOT_LOGIN = "github-actions[bot]"
+
+
+@lru_cache(maxsize=None)
+def _authenticated_login() -> str:
+    try:
+        return get_github().get_user().login
+    except Exception as e:
+        log.debug(f"Could not read the authenticated user ({e}), assuming {ACTIONS_BOT_LOGIN}")
+        return ACTIONS_BOT_LOGIN
+
+
+def reviewer_logins() -> Set[str]:
+    """Logins whose reviews are the AI reviewer's own: REVIEWER_LOGIN (comma-separated) or the token's user."""
+    configured = {login.strip() for login in os.getenv("REVIEWER_LOGIN", "").split(",") if login.strip()}
+    return configured or {_authenticated_login()}
+
+
+def iter_marker_reviews(pr_details: PRDetails) -> Iterator[Tuple[Any, str]]:
+    """
+    Yields (review, head SHA) of the reviewer's own reviews carrying the head marker, oldest first.
+    Markers in anyone else's review are ignored: pasted by a PR author, they would narrow the next
+    run to the changes since a head that was never reviewed.
+    """
+    logins = reviewer_logins()
+    for review in pr_details.pr_obj.get_reviews():
+        sha = find_head_marker(review.body)
+        if sha and review.user is not None and review.user.login in logins:
+            yield review, sha
+
+
+def find_last_reviewed_head(pr_details: PRDetails) -> Tuple[Optional[str], List[int]]:
+    """
+    Returns the head SHA recorded by the latest AI review of the PR, plus the ids of every
+    review carrying the marker (their comments are the ones not to repeat).
+    """
+    last_sha = None
+    review_ids = []
+    for review, sha in iter_marker_reviews(pr_details):
+        last_sha = sha
+        review_ids.append(review.id)
+    return last_sha, review_ids
+
+
+def find_last_marker_review(pr_details: PRDetails) -> Optional[Any]:
+    """The latest of the reviewer's own reviews carrying the head marker, if any."""
+    last = None
+    for review, _ in iter_marker_reviews(pr_details):
+        last = review
+    return last
+
+
+def get_previous_ai_comments(pr_details: PRDetails, review_ids: List[int],
+                             scope: Optional[IncrementalScope] = None) -> List[Dict[str, Any]]:
+    """
+    Collects the inline comments of earlier AI reviews with their line mapped onto the current head.
+
+    Comments made against the last reviewed head are mapped through the interdiff; older ones use
+    the line GitHub itself re-anchored (None once outdated). The commented text is kept so moved
+    code still matches.
+    """
+    if not review_ids:
+        return []
+    review_ids = set(review_ids)
+    previous = []
+    for comment in pr_details.pr_obj.get_review_comments():
+        if comment.pull_request_review_id not in review_ids:
+            continue
+        path, line = comment.path, comment.line
+        if scope is not None and comment.original_commit_id == scope.base_sha and comment.original_line:
+            path, line = scope.map_line(comment.path, comment.original_line)
+        previous.append({"path": path, "line": line, "original_line": comment.original_line,
+                         "text": comment_line_text(comment.diff_hunk)})
+    log.info(f"Found {len(previous)} comments from earlier AI reviews")
+    return previous
@@ -0,0 +1,125 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+pytest.importorskip("langgraph.checkpoint.sqlite")
+
+from States.state import ReviewComment, ReviewFeedback, ReviewResponse, ReviewState
+from configs.memory_config import review_thread_id
+from services.git_services.get_pr_details import PRDetails
+from services.git_services.get_pr_files import _parse_page
+from utils.github_utils.diff_parser import iter_parse_diff
+from utils.run_store import RunContext, register_run, release_run
+
+DIFF = "".join(f"diff --git a/f{i}.py b/f{i}.py\n--- a/f{i}.py\n+++ b/f{i}.py\n"
+               f"@@ -1,1 +1,2 @@\n x = {i}\n+y = {i}\n" for i in range(6))
+
+
+class Preempted(BaseException):
+    """Stands in for the runner being killed: not caught by the per-chunk error handling."""
+
+
+class FakeReviewer:
+    def __init__(self, crash_at=None):
+        self.calls = []
+        self.crash_at = crash_at
+
+    async def ainvoke(self, inputs):
+        self.calls.append(inputs["file_path"])
+        if len(self.calls) == self.crash_at:
+            raise Preempted()
+        return ReviewResponse(reviews=[ReviewComment(lineNumber=2, reviewComment="x")])
+
+
+class FakeFeedback:
+    async def ainvoke(self, inputs):
+        return ReviewFeedback(satisfied=True)
+
+
+def _paged_files(order):
+    """The files as the paged files listing rebuilds them, in the order the pages arrived."""
+    return _parse_page([{"filename": f"f{i}.py", "status": "modified", "patch": f"@@ -1,1 +1,2 @@\n x = {i}\n+y = {i}"}
+                        for i in order], None)
+
+
+def _review(monkeypatch, pr_details, reviewer, files=None):
+    import main
+    import nodes.reviewer_agent as reviewer_agent
+    monkeypatch.setattr(reviewer_agent, "reviewer_agent_chain", reviewer)
+    files = files or iter_parse_diff(iter(DIFF.splitlines()))
+    run_id = register_run(RunContext(pr_details=pr_details, files=[next(files)], diff_stream=files),
+                          review_thread_id(pr_details))
+    state = ReviewState(run_id=run_id, comments=[], mode="initial_review")
+    try:
+        return asyncio.run(main.run_review_graph(state, {"configurable": {"thread_id": run_id}}))
+    finally:
+        release_run(run_id)
+
+
+@pytest.fixture
+def posted(monkeypatch, tmp_path):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("PACK_HUNKS", "false")
+    monkeypatch.setenv("REVIEW_CHECKPOINT_PATH", str(tmp_path / "checkpoints.sqlite"))
+    import nodes.feedback_agent as feedback_agent
+    import nodes.git_comment_sender as git_comment_sender
+    monkeypatch.setattr(feedback_agent, "feedback_agent_chain", FakeFeedback())
+    posted = []
+    monkeypatch.setattr(git_comment_sender, "create_review_comment",
+                        lambda pr_details, comments, body: posted.extend(comments) or 1)
+    return posted
+
+
+def test_interrupted_review_resumes_after_the_last_completed_chunk(monkeypatch, posted):
+    pr_details = PRDetails("o", "r", 1, "t", "d")
+    pr_details.head_sha = "abc123"
+
+    crashing = FakeReviewer(crash_at=4)
+    with pytest.raises(Preempted):
+        _review(monkeypatch, pr_details, crashing)
+    assert crashing.calls == ["f0.py", "f1.py", "f2.py", "f3.py"]
+
+    resumed = FakeReviewer()
+    _review(monkeypatch, pr_details, resumed)
+    assert resumed.calls == ["f3.py", "f4.py", "f5.py"]
+    assert sorted(comment["path"] for comment in posted) == [f"f{i}.py" for i in range(6)]
+
+    # A finished review leaves nothing to resume
+    fresh = FakeReviewer()
+    _review(monkeypatch, pr_details, fresh)
+    assert len(fresh.calls) == 6
+
+
+def test_resume_finds_its_chunks_when_the_files_come_in_another_order(monkeypatch, posted):
+    pr_details = PRDetails("o", "r", 1, "t", "d", head_sha="abc123")
+
+    with pytest.raises(Preempted):
+        _review(monkeypatch, pr_details, FakeReviewer(crash_at=4), _paged_files(range(6)))
+
+    # The pages of the re-downloaded listing arrive in another order
+    resumed = FakeReviewer()
+    _review(monkeypatch, pr_details, resumed, _paged_files([3, 4, 5, 0, 1, 2]))
+    assert sorted(resumed.calls) == ["f3.py", "f4.py", "f5.py"]
+    assert sorted(comment["path"] for comment in posted) == [f"f{i}.py" for i in range(6)]
+
+
+def test_threads_of_earlier_heads_are_deleted(monkeypatch, posted, tmp_path):
+    with pytest.raises(Preempted):
+        _review(monkeypatch, PRDetails("o", "r", 1, "t", "d", head_sha="old123"), FakeReviewer(crash_at=2))
+    other_pr = PRDetails("o", "r", 2, "t", "d", head_sha="old123")
+    with pytest.raises(Preempted):
+        _review(monkeypatch, other_pr, FakeReviewer(crash_at=2))
+
+    _review(monkeypatch, PRDetails("o", "r", 1, "t", "d", head_sha="new456"), FakeReviewer())
+
+    with sqlite3.connect(tmp_path / "checkpoints.sqlite") as conn:
+        threads = {row[0] for row in conn.execute("SELECT DISTINCT thread_id FROM checkpoints")}
+    assert threads == {review_thread_id(other_pr)}
+
+
+def test_thread_id_is_derived_from_repository_pr_and_head():
+    pr_details = PRDetails("octo", "app", 7, "t", "d")
+    pr_details.head_sha = "abc123"
+    assert review_thread_id(pr_details) == "octo/app:7:abc123:initial_review"
+    assert review_thread_id(pr_details, "reply_mode") != review_thread_id(pr_details)
@@ -0,0 +1,90 @@
+import os
+
+from services.git_services.get_pr_details import PRDetails
+from utils.diff_cache import DiffCache
+from utils.github_utils.diff_parser import iter_parse_diff
+
+DIFF = """diff --git a/app.py b/app.py
+--- a/app.py
++++ b/app.py
+@@ -1,2 +1,3 @@
+ import os
++import sys
+ x = 1
+"""
+
+
+def _pr(head_sha="h1"):
+    return PRDetails("octo", "repo", 1, "t", "d", base_sha="b1", head_sha=head_sha)
+
+
+def test_raw_and_parsed_entries_round_trip(tmp_path):
+    cache = DiffCache(str(tmp_path), max_bytes=10 * 1024 * 1024)
+    key = cache.key(_pr())
+    parse_key = cache.parse_key("diff|[]|[]")
+    assert cache.load_raw_lines(key) is None
+    assert cache.load_files(key, parse_key) is None
+
+    lines = cache.record_raw_lines(key, iter(DIFF.splitlines()))
+    files = list(cache.record_files(key, parse_key, iter_parse_diff(lines)))
+    files[0].skip_reason = "changed after it was cached"
+
+    assert list(cache.load_raw_lines(key)) == DIFF.splitlines()
+    cached = cache.load_files(key, parse_key)
+    assert [f.to_file for f in cached] == ["b/app.py"]
+    assert cached[0].skip_reason is None
+    assert cached[0].chunks[0].formatted_chunk == files[0].chunks[0].formatted_chunk
+    assert cache.key(_pr(head_sha="h2")) != key
+
+
+def test_partially_consumed_stream_is_not_committed(tmp_path):
+    cache = DiffCache(str(tmp_path), max_bytes=10 * 1024 * 1024)
+    key = cache.key(_pr())
+
+    lines = cache.record_raw_lines(key, iter(DIFF.splitlines()))
+    next(lines)
+    lines.close()
+
+    assert cache.load_raw_lines(key) is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = DiffCache(str(tmp_path), max_bytes=10 * 1024 * 1024)
+    keys = [cache.key(_pr(head_sha=f"h{i}")) for i in range(3)]
+    for i, key in enumerate(keys):
+        list(cache.record_raw_lines(key, iter(DIFF.splitlines())))
+        path = tmp_path / f"{key}.diff.gz"
+        os.utime(path, (1000 + i, 1000 + i))
+    # Reading the oldest entry makes it the most recently used
+    list(cache.load_raw_lines(keys[0]))
+
+    entry_size = (tmp_path / f"{keys[0]}.diff.gz").stat().st_size
+    cache.max_bytes = entry_size * 2
+    cache.evict()
+
+    assert cache.load_raw_lines(keys[1]) is None
+    assert cache.load_raw_lines(keys[0]) is not None
+    assert cache.load_raw_lines(keys[2]) is not None
+
+
+def test_parsed_entries_are_json_and_planted_pickles_are_not_loaded(tmp_path):
+    import pickle
+
+    cache = DiffCache(str(tmp_path), max_bytes=10 * 1024 * 1024)
+    key = cache.key(_pr())
+    parse_key = cache.parse_key("diff|[]|[]")
+    files = list(cache.record_files(key, parse_key, iter_parse_diff(iter(DIFF.splitlines()))))
+
+    cached = cache.load_files(key, parse_key)
+    chunk, original = cached[0].chunks[0], files[0].chunks[0]
+    assert (chunk.content, list(chunk.line_numbers), list(chunk.diff_positions)) == \
+        (original.content, list(original.line_numbers), list(original.diff_positions))
+
+    class Payload:
+        def __reduce__(self):
+            return (os.mkdir, (str(tmp_path / "pwned"),))
+
+    (tmp_path / f"{key}.{parse_key}.files.jsonl").write_bytes(pickle.dumps(Payload()))
+    assert cache.load_files(key, parse_key) is None
+    assert not (tmp_path / "pwned").exists()
@@ -0,0 +1,121 @@
+from utils.github_utils.diff_parser import iter_parse_diff, parse_diff
+
+DIFF = """diff --git a/app/main.py b/app/main.py
+index 111..222 100644
+--- a/app/main.py
++++ b/app/main.py
+@@ -1,3 +1,4 @@
+ import os
++import sys
+ def f():
+-    pass
++    return 1
+diff --git a/app/util.py b/app/util.py
+index 111..222 100644
+--- a/app/util.py
++++ b/app/util.py
+@@ -10,2 +10,3 @@ def g():
+     x = 1
++    y = 2
+     return x
+"""
+
+
+def test_parse_diff_line_numbers_and_positions():
+    files = parse_diff(DIFF)
+
+    assert [f.to_file for f in files] == ["b/app/main.py", "b/app/util.py"]
+    chunk = files[0].chunks[0]
+    assert chunk.formatted_chunk == ["1 import os", "2+import sys", "3 def f():", "-    pass", "4+    return 1"]
+    assert [c.diff_position for c in chunk.changes] == [2, 3, 4, 5, 6]
+    assert files[1].chunks[0].changes[1].line_number == 11
+
+
+def test_iter_parse_diff_yields_files_before_input_is_exhausted():
+    consumed = []
+
+    def lines():
+        for line in DIFF.splitlines():
+            consumed.append(line)
+            yield line
+
+    parsed = iter_parse_diff(lines())
+    first = next(parsed)
+
+    assert first.to_file == "b/app/main.py"
+    assert len(consumed) < len(DIFF.splitlines())
+    assert [f.to_file for f in parsed] == ["b/app/util.py"]
+
+
+def test_chunks_share_one_buffer_per_file():
+    main_py, util_py = parse_diff(DIFF)
+
+    assert main_py.chunks[0].buffer is not util_py.chunks[0].buffer
+    assert main_py.chunks[0].content.startswith("@@ -1,3 +1,4 @@")
+    assert main_py.chunks[0].content.endswith("+    return 1")
+    assert list(main_py.chunks[0].line_numbers) == [1, 2, 3, 0, 4]
+
+
+NON_REVIEWABLE_DIFF = """diff --git a/old.py b/old.py
+deleted file mode 100644
+index 111..000
+--- a/old.py
++++ /dev/null
+@@ -1,2 +0,0 @@
+-a = 1
+-b = 2
+diff --git a/img.png b/img.png
+index 111..222 100644
+Binary files a/img.png and b/img.png differ
+diff --git a/run.sh b/run.sh
+old mode 100644
+new mode 100755
+diff --git a/a.txt b/b.txt
+similarity index 100%
+rename from a.txt
+rename to b.txt
+diff --git a/src/moved.py b/src/renamed.py
+similarity index 90%
+rename from src/moved.py
+rename to src/renamed.py
+index 111..222 100644
+--- a/src/moved.py
++++ b/src/renamed.py
+@@ -1,3 +1,2 @@
+ a = 1
+-b = 2
+ c = 3
+@@ -10,2 +9,3 @@
+ d = 4
++e = 5
+ f = 6
+diff --git a/src/new.py b/src/new.py
+new file mode 100644
+--- /dev/null
++++ b/src/new.py
+@@ -0,0 +1 @@
++x = 1
+"""
+
+
+def test_unreviewable_files_and_hunks_are_dropped():
+    files = parse_diff(NON_REVIEWABLE_DIFF)
+
+    assert [(f.to_file, f.status) for f in files] == [("b/src/renamed.py", "renamed"), ("b/src/new.py", "added")]
+    renamed = files[0]
+    assert len(renamed.chunks) == 1
+    # Positions still count the dropped removal-only hunk, as GitHub does
+    assert list(renamed.chunks[0].diff_positions) == [6, 7, 8]
+
+
+def test_git_quoted_and_spaced_paths_in_headers():
+    from utils.github_utils.diff_parser import _split_git_header, quote_diff_path
+
+    assert _split_git_header("a/my notes.py b/my notes.py") == ("a/my notes.py", "b/my notes.py")
+    assert _split_git_header("a/old name.py b/new name.py") == ("a/old name.py", "b/new name.py")
+    assert _split_git_header('"a/say \\"hi\\".py" "b/say \\"hi\\".py"') == ('a/say "hi".py', 'b/say "hi".py')
+    assert _split_git_header(quote_diff_path("a/t\tx.py") + " " + quote_diff_path("b/t\tx.py")) == ("a/t\tx.py", "b/t\tx.py")
+
+    diff = ('diff --git "a/t\\303\\251st.py" "b/t\\303\\251st.py"\n'
+            '--- "a/t\\303\\251st.py"\n+++ "b/t\\303\\251st.py"\n@@ -1 +1,2 @@\n a = 1\n+b = 2\n')
+    assert [f.to_file for f in iter_parse_diff(iter(diff.splitlines()))] == ["b/tést.py"]
@@ -0,0 +1,52 @@
+from utils.file_filters import PathMatcher, get_path_matcher_from_env
+from utils.github_utils.diff_parser import parse_diff, iter_parse_diff
+
+
+def _diff_for(*paths):
+    parts = []
+    for path in paths:
+        parts.append(f"diff --git a/{path} b/{path}\n--- a/{path}\n+++ b/{path}\n@@ -1,1 +1,2 @@\n x\n+y\n")
+    return "".join(parts)
+
+
+def test_basename_patterns_match_at_any_depth():
+    matcher = PathMatcher(["*.md", "package-lock.json"])
+
+    assert not matcher.should_review("b/docs/guide/readme.md")
+    assert not matcher.should_review("b/web/package-lock.json")
+    assert matcher.should_review("b/src/app.py")
+
+
+def test_double_star_and_anchored_patterns():
+    matcher = PathMatcher(["dist/**", "src/**/generated_*.py"])
+
+    assert not matcher.should_review("dist/bundle/app.js")
+    assert not matcher.should_review("src/generated_api.py")
+    assert not matcher.should_review("src/a/b/generated_models.py")
+    assert matcher.should_review("src/a/models.py")
+    assert matcher.should_review("lib/dist/app.js")
+
+
+def test_include_patterns_restrict_review():
+    matcher = PathMatcher(exclude_patterns=["**/test_*.py"], include_patterns=["src/**/*.py"])
+
+    assert matcher.should_review("src/pkg/service.py")
+    assert not matcher.should_review("src/pkg/test_service.py")
+    assert not matcher.should_review("docs/conf.py")
+
+
+def test_parser_skips_excluded_files():
+    diff = _diff_for("README.md", "src/app.py", "dist/app.min.js")
+
+    files = list(iter_parse_diff(diff.splitlines(), path_filter=PathMatcher(["*.md", "dist/"])))
+
+    assert [f.to_file for f in files] == ["b/src/app.py"]
+    assert len(parse_diff(diff)) == 3
+
+
+def test_matcher_reads_environment_at_call_time(monkeypatch):
+    monkeypatch.setenv("INPUT_EXCLUDE", "*.md")
+    assert not get_path_matcher_from_env().should_review("README.md")
+
+    monkeypatch.setenv("INPUT_EXCLUDE", "")
+    assert get_path_matcher_from_env().should_review("README.md")
@@ -0,0 +1,58 @@
+import random
+import string
+
+from utils.generated_file_detector import GitAttributes, detect_generated_file
+from utils.github_utils.diff_parser import parse_diff
+
+
+def _file(path, added_lines, start=1):
+    body = "".join(f"+{line}\n" for line in added_lines)
+    diff = (f"diff --git a/{path} b/{path}\n--- a/{path}\n+++ b/{path}\n"
+            f"@@ -{start},0 +{start},{len(added_lines)} @@\n{body}")
+    return parse_diff(diff)[0]
+
+
+def test_lockfiles_and_build_output_are_detected_by_path():
+    assert detect_generated_file(_file("web/package-lock.json", ['"a": 1'])) is not None
+    assert detect_generated_file(_file("dist/app.js", ["var a = 1;"])) is not None
+    assert detect_generated_file(_file("api/service_pb2.py", ["x = 1"])) is not None
+    assert detect_generated_file(_file("src/app.py", ["x = 1"])) is None
+    assert detect_generated_file(_file("build/lib/app.py", ["x = 1"])) is not None
+    assert detect_generated_file(_file("src/tools/build/steps.py", ["x = 1"])) is None
+    assert detect_generated_file(_file("src/out/report.py", ["x = 1"])) is None
+
+
+def test_linguist_markers_from_gitattributes():
+    attributes = GitAttributes.parse(
+        "*.gen.ts linguist-generated\n"
+        "third/** linguist-vendored=true\n"
+        "third/ours/** -linguist-vendored\n"
+    )
+
+    assert "linguist-generated" in detect_generated_file(_file("src/api.gen.ts", ["x"]), attributes)
+    assert "linguist-vendored" in detect_generated_file(_file("third/lib/a.c", ["x"]), attributes)
+    assert detect_generated_file(_file("third/ours/a.c", ["x"]), attributes) is None
+
+
+def test_content_sniffing():
+    header = _file("src/models.py", ["# Code generated by sqlc. DO NOT EDIT.", "x = 1"])
+    minified = _file("static/app.js", ["var a=1;" * 200])
+    rng = random.Random(0)
+    blob = ["".join(rng.choice(string.ascii_letters + string.digits + "+/") for _ in range(76)) for _ in range(40)]
+    encoded = _file("src/fixtures.py", blob)
+
+    assert "header" in detect_generated_file(header)
+    assert "minified" in detect_generated_file(minified)
+    assert "entropy" in detect_generated_file(encoded)
+
+
+def test_header_text_deep_in_a_file_is_not_a_generated_marker():
+    assert detect_generated_file(_file("src/app.py", ["# do not edit the cache directly"], start=120)) is None
+
+
+def test_only_standard_generator_markers_count_as_headers():
+    for marker in ("// @generated", "// Code generated by protoc-gen-go. DO NOT EDIT.", "// <auto-generated>"):
+        assert "header" in detect_generated_file(_file("src/api.go", [marker, "x := 1"]))
+    for line in ("# Do not modify without review", "token = fetch()  # token generated by server",
+                 "# DO NOT EDIT below this line by hand"):
+        assert detect_generated_file(_file("src/app.py", [line, "x = 1"])) is None
@@ -0,0 +1,92 @@
+from States.state import ReviewState
+from nodes.get_next_chunk import get_next_chunk
+from nodes.git_comment_sender import git_comment_sender_node
+from services.git_services.get_pr_details import PRDetails
+from utils.github_utils.diff_parser import parse_diff
+from utils.head_watcher import HeadWatcher
+from utils.run_store import RunContext, register_run
+
+DIFF = """diff --git a/a.py b/a.py
+--- a/a.py
++++ b/a.py
+@@ -1,1 +1,2 @@
+ import os
++import sys
+diff --git a/b.py b/b.py
+--- a/b.py
++++ b/b.py
+@@ -1,1 +1,2 @@
+ x = 1
++y = 2
+"""
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeHead:
+    def __init__(self, sha):
+        self.sha = sha
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if isinstance(self.sha, Exception):
+            raise self.sha
+        return self.sha
+
+
+def test_head_is_fetched_at_most_once_per_interval():
+    clock, head = FakeClock(), FakeHead("abc")
+    watcher = HeadWatcher("abc", head, 30, clock=clock)
+
+    assert not any(watcher.superseded() for _ in range(50))
+    assert head.calls == 0
+
+    clock.now += 31
+    assert not any(watcher.superseded() for _ in range(50))
+    assert head.calls == 1
+
+    head.sha = "def"
+    clock.now += 31
+    assert watcher.superseded()
+    head.sha = RuntimeError("rate limited")
+    clock.now += 31
+    # Stays superseded without fetching again
+    assert watcher.superseded() and head.calls == 2
+
+
+def test_failed_fetch_keeps_reviewing():
+    clock = FakeClock()
+    watcher = HeadWatcher("abc", FakeHead(RuntimeError("502")), 30, clock=clock)
+    clock.now += 31
+    assert not watcher.superseded()
+
+
+def test_superseded_review_skips_chunks_and_posts_nothing(monkeypatch):
+    posted = []
+    monkeypatch.setattr("nodes.git_comment_sender.create_review_comment", lambda *a, **k: posted.append(a))
+    monkeypatch.setattr("nodes.git_comment_sender.create_summary_review", lambda *a, **k: posted.append(a))
+    clock = FakeClock()
+    watcher = HeadWatcher("abc", FakeHead("def"), 30, clock=clock)
+    state = ReviewState(
+        run_id=register_run(RunContext(
+            pr_details=PRDetails(owner="o", repo="r", pull_number=1, title="", description="", head_sha="abc"),
+            files=parse_diff(DIFF),
+            head_watcher=watcher,
+        )),
+        comments=[{"path": "a.py", "line": 2, "body": "x"}],
+    )
+
+    clock.now += 31
+    state = get_next_chunk(state)
+    assert state.done and watcher.skipped == 2
+
+    state = git_comment_sender_node(state)
+    assert posted == []
+    assert "not posted" in state.final_response
@@ -0,0 +1,50 @@
+from States.state import ReviewComment, ReviewResponse
+from utils.github_utils.diff_parser import parse_diff
+from utils.hunk_dedup import HunkDeduplicator
+
+DIFF = """diff --git a/a.py b/a.py
+--- a/a.py
++++ b/a.py
+@@ -3,2 +3,2 @@
+ import os
+-from api import old_call
++from api import new_call
+diff --git a/b.py b/b.py
+--- a/b.py
++++ b/b.py
+@@ -40,2 +40,2 @@
+ import os
+-from api import old_call
++from api import new_call
+diff --git a/c.py b/c.py
+--- a/c.py
++++ b/c.py
+@@ -1,2 +1,2 @@
+ import sys
+-from api import old_fetch
++from api import new_fetch
+"""
+
+
+def _chunks():
+    return [file.chunks[0] for file in parse_diff(DIFF)]
+
+
+def test_identical_hunks_reuse_the_review_on_their_own_lines():
+    dedup = HunkDeduplicator()
+    a, b, c = _chunks()
+    fingerprint = dedup.fingerprint(a, "a.py")
+    assert dedup.lookup(fingerprint, a) is None
+    dedup.record(fingerprint, a, ReviewResponse(reviews=[ReviewComment(lineNumber=4, reviewComment="check callers")]))
+
+    assert dedup.fingerprint(b, "b.py") == fingerprint
+    projected = dedup.lookup(fingerprint, b)
+    assert [(r.lineNumber, r.reviewComment) for r in projected.reviews] == [(41, "check callers")]
+    assert dedup.fingerprint(c, "c.py") != fingerprint
+    assert dedup.fingerprint(b, "b.js") != fingerprint
+
+
+def test_masked_identifiers_group_renames_together():
+    a, _, c = _chunks()
+    dedup = HunkDeduplicator(mask_identifiers=True)
+    assert dedup.fingerprint(a, "a.py") == dedup.fingerprint(c, "c.py")
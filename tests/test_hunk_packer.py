@@ -0,0 +1,88 @@
+from States.state import ReviewComment, ReviewResponse, ReviewState
+from nodes.format_comments import format_comments_node
+from services.git_services.get_pr_details import PRDetails
+from utils.github_utils.diff_parser import parse_diff
+from utils.hunk_packer import iter_pack_small_hunks
+from utils.run_store import RunContext, register_run
+
+DIFF = """diff --git a/a.py b/a.py
+--- a/a.py
++++ b/a.py
+@@ -1,1 +1,2 @@
+ import os
++import sys
+diff --git a/b.py b/b.py
+--- a/b.py
++++ b/b.py
+@@ -1,1 +1,2 @@
+ x = 1
++y = eval(x)
+@@ -30,1 +31,2 @@
+ def f():
++    return 2
+"""
+
+
+def test_small_hunks_across_files_are_packed_with_path_headers(monkeypatch):
+    monkeypatch.setenv("PACK_MAX_HUNK_LINES", "5")
+    files = list(iter_pack_small_hunks(parse_diff(DIFF)))
+    assert len(files) == 1 and len(files[0].chunks) == 1
+    packed = files[0].chunks[0]
+    assert packed.member_paths == ["a.py", "b.py", "b.py"]
+    assert packed.formatted_chunk == [
+        "=== a.py ===", "1 import os", "2+import sys",
+        "=== b.py ===", "1 x = 1", "2+y = eval(x)",
+        "=== b.py ===", "31 def f():", "32+    return 2",
+    ]
+
+
+def test_token_budget_splits_packs(monkeypatch):
+    monkeypatch.setenv("PACK_TOKEN_BUDGET", "15")
+    files = list(iter_pack_small_hunks(parse_diff(DIFF)))
+    assert [len(f.chunks[0].member_paths) for f in files] == [2, 0]
+
+
+def test_comments_on_a_packed_chunk_map_back_to_their_file():
+    files = list(iter_pack_small_hunks(parse_diff(DIFF)))
+    state = ReviewState(run_id=register_run(RunContext(pr_details=PRDetails("o", "r", 1, "t", "d"), files=files)),
+                        comments=[],
+                        llm_response=ReviewResponse(reviews=[
+                            ReviewComment(lineNumber=2, filePath="b.py", reviewComment="avoid eval"),
+                            ReviewComment(lineNumber=32, reviewComment="unique line, no path needed"),
+                            ReviewComment(lineNumber=2, reviewComment="ambiguous without a path"),
+                        ]))
+    state = format_comments_node(state)
+    assert [(c["path"], c["line"], c["body"]) for c in state.comments] == [
+        ("b.py", 2, "avoid eval"),
+        ("b.py", 32, "unique line, no path needed"),
+    ]
+
+
+def test_hunks_with_a_review_to_reuse_are_not_packed():
+    files = list(iter_pack_small_hunks(parse_diff(DIFF), lambda path, chunk: chunk.target_start == 31))
+    # The pending pack comes first, so a duplicate is reviewed after the hunk it duplicates
+    assert [(f.to_file, [c.target_start for c in f.chunks]) for f in files] == [("b/a.py", [1]), ("b/b.py", [31])]
+    assert files[0].chunks[0].member_paths == ["a.py", "b.py"]
+
+
+def test_packed_review_is_cached_per_hunk_and_reused_by_the_next_run(tmp_path):
+    from main import review_reuse_check
+    from utils.review_cache import ReviewCache
+
+    cache = ReviewCache(str(tmp_path / "reviews.sqlite"), ttl_seconds=3600, max_entries=100)
+    files = list(iter_pack_small_hunks(parse_diff(DIFF)))
+    state = ReviewState(run_id=register_run(RunContext(pr_details=PRDetails("o", "r", 1, "t", "d"), files=files,
+                                                       review_cache=cache)),
+                        comments=[], review_cache_key="packed",
+                        llm_response=ReviewResponse(reviews=[
+                            ReviewComment(lineNumber=2, filePath="b.py", reviewComment="avoid eval")]))
+    format_comments_node(state)
+
+    # A new hunk next to them does not change what the reviewed hunks are cached under
+    diff = DIFF + "diff --git a/c.py b/c.py\n--- a/c.py\n+++ b/c.py\n@@ -1,1 +1,2 @@\n z = 1\n+w = 2\n"
+    files = list(iter_pack_small_hunks(parse_diff(diff), review_reuse_check(cache, None, None)))
+    assert [(f.to_file, len(f.chunks)) for f in files] == [("b/a.py", 1), ("b/b.py", 2), ("b/c.py", 1)]
+    assert not any(chunk.member_paths for f in files for chunk in f.chunks)
+    b = files[1]
+    assert cache.get(cache.key(b.chunks[0], "b.py", "none"), b.chunks[0]).reviews[0].reviewComment == "avoid eval"
+    assert cache.get(cache.key(b.chunks[1], "b.py", "none"), b.chunks[1]).reviews == []
@@ -0,0 +1,134 @@
+from types import SimpleNamespace
+
+from services.git_services.get_pr_details import PRDetails
+from services.git_services.git_review_comment_sender import create_review_comment
+from services.git_services.review_history import find_last_reviewed_head
+from utils.github_utils.diff_parser import parse_diff
+from utils.github_utils.review_body import find_head_marker, format_head_marker, format_review_body
+from utils.incremental_review import IncrementalScope, comment_line_text, is_duplicate_comment
+
+# PR diff at the new head: two hunks in app.py plus an untouched util.py
+PR_DIFF = """diff --git a/app.py b/app.py
+--- a/app.py
++++ b/app.py
+@@ -1,3 +1,4 @@
+ import os
++import sys
+ x = 1
+ y = 2
+@@ -20,2 +21,4 @@
+ def run():
++    check()
++    return go()
+ pass
+diff --git a/util.py b/util.py
+--- a/util.py
++++ b/util.py
+@@ -1,1 +1,2 @@
+ a = 1
++b = 2
+"""
+
+# Changes since the last reviewed head: only the second hunk of app.py was touched
+INTERDIFF = """diff --git a/app.py b/app.py
+--- a/app.py
++++ b/app.py
+@@ -21,2 +21,3 @@
+ def run():
++    check()
+     return go()
+@@ -30,1 +30,0 @@
+-z = 3
+"""
+
+
+def _scope():
+    return IncrementalScope.from_diff_lines(INTERDIFF.splitlines(), "aaaaaaa", "bbbbbbb")
+
+
+def test_only_hunks_changed_since_last_review_are_kept():
+    files = list(_scope().iter_filter_files(parse_diff(PR_DIFF)))
+    assert [f.to_file for f in files] == ["b/app.py"]
+    assert len(files[0].chunks) == 1
+    assert "+    check()" in files[0].chunks[0].content
+
+
+def test_lines_are_mapped_onto_the_new_head():
+    scope = _scope()
+    assert scope.map_line("app.py", 2) == ("app.py", 2)
+    assert scope.map_line("app.py", 22) == ("app.py", 23)
+    assert scope.map_line("app.py", 25) == ("app.py", 26)
+    assert scope.map_line("app.py", 30) == ("app.py", None)
+    assert scope.map_line("app.py", 40) == ("app.py", 40)
+    assert scope.map_line("util.py", 7) == ("util.py", 7)
+
+
+def test_duplicate_comments_match_on_mapped_line_or_nearby_moved_text():
+    previous = [{"path": "app.py", "line": 22, "original_line": 21, "text": "    return go()"},
+                {"path": "app.py", "line": None, "original_line": 30, "text": "    pass"}]
+    assert is_duplicate_comment("app.py", 22, "anything", previous)
+    assert not is_duplicate_comment("app.py", 21, "    check()", previous)
+    assert not is_duplicate_comment("util.py", 22, "    return go()", previous)
+    # Text only matches for a comment whose line is gone, and only near where it was
+    assert not is_duplicate_comment("app.py", 40, "    return go()", previous)
+    assert is_duplicate_comment("app.py", 35, "    pass", previous)
+    assert not is_duplicate_comment("app.py", 90, "    pass", previous)
+
+
+def test_head_marker_round_trips_and_comment_text_comes_from_diff_hunk():
+    body = "Code review by OpenAI\n\n" + format_head_marker("0123456789abcdef0123456789abcdef01234567")
+    assert find_head_marker(body) == "0123456789abcdef0123456789abcdef01234567"
+    assert find_head_marker("Code review by OpenAI") is None
+    assert comment_line_text("@@ -1,2 +1,3 @@\n import os\n+import sys") == "import sys"
+
+
+class FakePR:
+    """Reviews created through it are the bot's own."""
+
+    def __init__(self):
+        self.reviews = []
+
+    def create_review(self, body, event, comments=None, login="review-bot"):
+        review = SimpleNamespace(id=len(self.reviews) + 7, body=body, user=SimpleNamespace(login=login))
+        review.edit = lambda body: setattr(review, "body", body)
+        self.reviews.append(review)
+        return review
+
+    def get_reviews(self):
+        return list(self.reviews)
+
+
+def test_head_marker_posted_with_inline_comments_is_found_by_the_next_run(monkeypatch):
+    monkeypatch.setenv("REVIEWER_LOGIN", "review-bot")
+    pr = FakePR()
+    pr_details = PRDetails("o", "r", 1, "t", "d", pr_obj=pr, head_sha="0123456789abcdef")
+
+    create_review_comment(pr_details, [{"path": "app.py", "line": 2, "body": "nit"}],
+                          body=format_review_body(pr_details.head_sha))
+
+    assert find_last_reviewed_head(pr_details) == ("0123456789abcdef", [7])
+
+
+def test_head_markers_in_other_users_reviews_are_ignored(monkeypatch):
+    monkeypatch.setenv("REVIEWER_LOGIN", "review-bot")
+    pr = FakePR()
+    pr_details = PRDetails("o", "r", 1, "t", "d", pr_obj=pr, head_sha="fedcba9876543210")
+    pr.create_review(format_review_body("0123456789abcdef"), "COMMENT")
+    pr.create_review(format_review_body("fedcba9876543210"), "COMMENT", login="pr-author")
+
+    assert find_last_reviewed_head(pr_details) == ("0123456789abcdef", [7])
+
+
+def test_clean_push_moves_the_marker_of_the_last_review_instead_of_posting(monkeypatch):
+    from nodes.git_comment_sender import post_review
+
+    monkeypatch.setenv("REVIEWER_LOGIN", "review-bot")
+    pr = FakePR()
+    post_review(PRDetails("o", "r", 1, "t", "d", pr_obj=pr, head_sha="0123456789abcdef"), [],
+                format_review_body("0123456789abcdef"))
+    pr_details = PRDetails("o", "r", 1, "t", "d", pr_obj=pr, head_sha="fedcba9876543210")
+    post_review(pr_details, [], format_review_body(pr_details.head_sha))
+    post_review(pr_details, [], format_review_body(pr_details.head_sha))
+
+    assert len(pr.reviews) == 1
+    assert find_last_reviewed_head(pr_details) == ("fedcba9876543210", [7])
@@ -0,0 +1,26 @@
+import asyncio
+
+from utils import llm_concurrency
+from utils.llm_concurrency import llm_slot
+
+
+def test_llm_slot_caps_concurrent_calls_per_event_loop(monkeypatch):
+    monkeypatch.setattr(llm_concurrency, "LLM_CONCURRENCY", 2)
+    running, peak = 0, 0
+
+    async def call():
+        nonlocal running, peak
+        async with llm_slot():
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    async def main():
+        await asyncio.gather(*(call() for _ in range(6)))
+
+    asyncio.run(main())
+    assert peak == 2
+    # A fresh event loop gets its own semaphore
+    asyncio.run(main())
+    assert peak == 2
@@ -0,0 +1,61 @@
+import asyncio
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models import FakeListChatModel
+
+import llm_config
+from llm_config import get_llm, lazy_llm, llm_settings
+
+
+class CountingHandler(BaseCallbackHandler):
+    def __init__(self):
+        self.starts = 0
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.starts += 1
+
+
+def _fake_provider(monkeypatch):
+    created = []
+
+    def load(temperature):
+        created.append(temperature)
+        return FakeListChatModel(responses=["looks fine"] * 10)
+
+    monkeypatch.setitem(llm_config.PROVIDER_REGISTRY, "fake", {"small": load, "large": load})
+    monkeypatch.setattr(llm_config, "_clients", {})
+    monkeypatch.setenv("PROVIDER", "fake")
+    monkeypatch.setenv("MODEL_NAME", "small")
+    return created
+
+
+def test_roles_share_one_client_created_on_first_use(monkeypatch):
+    created = _fake_provider(monkeypatch)
+    chain = lazy_llm("reviewer")
+    assert created == []
+
+    assert chain.invoke("hi").content == "looks fine"
+    assert get_llm("feedback") is get_llm("reviewer") is get_llm()
+    assert len(created) == 1
+
+
+def test_role_overrides_pick_their_own_model(monkeypatch):
+    created = _fake_provider(monkeypatch)
+    monkeypatch.setenv("FEEDBACK_MODEL_NAME", "large")
+    monkeypatch.setenv("FEEDBACK_TEMPERATURE", "0")
+
+    assert llm_settings("reviewer") == ("fake", "small", 0.7)
+    assert llm_settings("feedback") == ("fake", "large", 0.0)
+    assert get_llm("feedback") is not get_llm("reviewer")
+    assert sorted(created) == [0.0, 0.7]
+
+
+def test_lazy_llm_passes_callbacks_to_the_client(monkeypatch):
+    _fake_provider(monkeypatch)
+    handler = CountingHandler()
+    chain = lazy_llm("reviewer")
+
+    chain.invoke("one", {"callbacks": [handler]})
+    asyncio.run(chain.ainvoke("two", {"callbacks": [handler]}))
+
+    assert handler.starts == 2
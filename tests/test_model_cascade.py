@@ -0,0 +1,89 @@
+from States.state import ReviewComment, ReviewFeedback, ReviewResponse, ReviewState
+from services.git_services.get_pr_details import PRDetails
+from utils.github_utils.diff_parser import iter_parse_diff
+from utils.model_cascade import ModelCascade
+from utils.run_store import RunContext, register_run, release_run
+
+DIFF = """diff --git a/clean.py b/clean.py
+--- a/clean.py
++++ b/clean.py
+@@ -1,1 +1,2 @@
+ x = 1
++y = 2
+diff --git a/flagged.py b/flagged.py
+--- a/flagged.py
++++ b/flagged.py
+@@ -1,1 +1,2 @@
+ x = 1
++y = x / 0
+diff --git a/auth.py b/auth.py
+--- a/auth.py
++++ b/auth.py
+@@ -1,1 +1,2 @@
+ import os
++PASSWORD = os.environ["SECRET_TOKEN"]
+"""
+
+
+class FakeChain:
+    def __init__(self, respond):
+        self.respond = respond
+        self.files = []
+
+    def invoke(self, inputs):
+        self.files.append(inputs.get("file_path") or inputs["user_query"])
+        return self.respond(inputs)
+
+
+def _comment_on_added_line(inputs):
+    if "x / 0" in inputs["code_diff"] or "PASSWORD" in inputs["code_diff"]:
+        return ReviewResponse(reviews=[ReviewComment(lineNumber=2, reviewComment="Check this line.")])
+    return ReviewResponse(reviews=[])
+
+
+def test_escalation_reasons():
+    cascade = ModelCascade(risk_threshold=6, min_confidence=0.7)
+    clean = ReviewResponse(reviews=[])
+    flagged = ReviewResponse(reviews=[ReviewComment(lineNumber=2, reviewComment="x")])
+
+    assert cascade.escalation_reason(clean, ReviewFeedback(satisfied=True)) is None
+    assert cascade.escalation_reason(clean, ReviewFeedback(satisfied=True, confidence=0.9)) is None
+    assert cascade.escalation_reason(flagged, ReviewFeedback(satisfied=True)) == "issues flagged"
+    assert cascade.escalation_reason(clean, ReviewFeedback(satisfied=False)) == "feedback not satisfied"
+    assert cascade.escalation_reason(clean, ReviewFeedback(satisfied=True, confidence=0.4)) == "low confidence"
+
+
+def test_only_flagged_and_risky_hunks_reach_the_full_model(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    import nodes.feedback_agent as feedback_agent
+    import nodes.git_comment_sender as git_comment_sender
+    import nodes.reviewer_agent as reviewer_agent
+    from graph import graph
+
+    cheap_reviewer = FakeChain(_comment_on_added_line)
+    full_reviewer = FakeChain(_comment_on_added_line)
+    monkeypatch.setattr(reviewer_agent, "cheap_reviewer_agent_chain", cheap_reviewer)
+    monkeypatch.setattr(reviewer_agent, "reviewer_agent_chain", full_reviewer)
+    monkeypatch.setattr(feedback_agent, "cheap_feedback_agent_chain",
+                        FakeChain(lambda inputs: ReviewFeedback(satisfied=True, confidence=0.9)))
+    monkeypatch.setattr(feedback_agent, "feedback_agent_chain",
+                        FakeChain(lambda inputs: ReviewFeedback(satisfied=True)))
+    posted = []
+    monkeypatch.setattr(git_comment_sender, "create_review_comment",
+                        lambda pr_details, comments, body: posted.extend(comments) or 1)
+
+    cascade = ModelCascade(risk_threshold=6, min_confidence=0.7)
+    files = iter_parse_diff(iter(DIFF.splitlines()))
+    run_id = register_run(RunContext(pr_details=PRDetails("o", "r", 1, "t", "d"), files=[next(files)],
+                                     diff_stream=files, model_cascade=cascade))
+    try:
+        graph.invoke(ReviewState(run_id=run_id, comments=[], mode="initial_review"))
+    finally:
+        release_run(run_id)
+
+    assert sorted(cheap_reviewer.files) == ["clean.py", "flagged.py"]
+    # flagged.py was escalated by its cheap review, auth.py started on the full model
+    assert sorted(full_reviewer.files) == ["auth.py", "flagged.py"]
+    assert cascade.started == {"cheap": 2, "full": 1}
+    assert cascade.escalations == {"issues flagged": 1}
+    assert sorted(comment["path"] for comment in posted) == ["auth.py", "flagged.py"]
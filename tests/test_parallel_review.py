@@ -0,0 +1,198 @@
+from States.state import CommentBatch, ReviewState, merge_comments
+from nodes.dispatch_chunks import dispatch_chunks_node, fan_out_chunks
+from services.git_services.get_pr_details import PRDetails
+from utils.github_utils.diff_parser import iter_parse_diff
+from utils.hunk_dedup import HunkDeduplicator
+from utils.run_store import RunContext, chunk_key, register_run
+
+DIFF = """diff --git a/a.py b/a.py
+--- a/a.py
++++ b/a.py
+@@ -1,1 +1,2 @@
+ import os
++import sys
+@@ -9,1 +10,2 @@
+ x = 1
++y = 2
+diff --git a/b.py b/b.py
+--- a/b.py
++++ b/b.py
+@@ -1,1 +1,2 @@
+ import os
++import sys
+"""
+
+
+def test_batches_are_appended_and_whole_lists_replace():
+    assert merge_comments([{"line": 1}], CommentBatch(comments=[{"line": 2}])) == [{"line": 1}, {"line": 2}]
+    assert merge_comments([{"line": 1}], [{"line": 1}, {"line": 3}]) == [{"line": 1}, {"line": 3}]
+
+
+def test_dispatch_queues_every_chunk_and_defers_duplicates():
+    files = iter_parse_diff(iter(DIFF.splitlines()))
+    run_id = register_run(RunContext(pr_details=PRDetails("o", "r", 1, "t", "d"), files=[next(files)],
+                                     diff_stream=files, hunk_dedup=HunkDeduplicator()))
+    state = ReviewState(run_id=run_id, comments=[])
+    update = dispatch_chunks_node(state)
+    a, b = state.files
+    assert update["chunk_queue"] == [chunk_key(a, a.chunks[0]), chunk_key(a, a.chunks[1])]
+    assert update["deferred_chunks"] == [chunk_key(b, b.chunks[0])]
+
+    state = state.model_copy(update=update)
+    sends = fan_out_chunks(state)
+    assert [send.node for send in sends] == ["review_chunk", "review_chunk"]
+    assert [list(send.arg.files[0].chunks[0].line_numbers) for send in sends] == [[1, 2], [10, 11]]
+    assert fan_out_chunks(state.model_copy(update={"chunk_queue": []})) == "git_comment_sender"
+
+
+def test_review_steps_do_not_grow_with_the_number_of_chunks(monkeypatch):
+    # The chains build their model on import
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    import nodes.feedback_agent as feedback_agent
+    import nodes.git_comment_sender as git_comment_sender
+    import nodes.reviewer_agent as reviewer_agent
+    from States.state import ReviewComment, ReviewFeedback, ReviewResponse
+    from graph import graph
+
+    class FakeChain:
+        def __init__(self, result):
+            self.result = result
+
+        def invoke(self, inputs):
+            return self.result
+
+    monkeypatch.setenv("PACK_HUNKS", "false")
+    monkeypatch.setattr(reviewer_agent, "reviewer_agent_chain",
+                        FakeChain(ReviewResponse(reviews=[ReviewComment(lineNumber=2, reviewComment="x")])))
+    monkeypatch.setattr(feedback_agent, "feedback_agent_chain", FakeChain(ReviewFeedback(satisfied=True)))
+    posted = []
+    monkeypatch.setattr(git_comment_sender, "create_review_comment",
+                        lambda pr_details, comments, body: posted.extend(comments) or 1)
+
+    diff = "".join(f"diff --git a/f{i}.py b/f{i}.py\n--- a/f{i}.py\n+++ b/f{i}.py\n"
+                   f"@@ -1,1 +1,2 @@\n x = {i}\n+y = {i} * {i}\n" for i in range(40))
+    files = iter_parse_diff(iter(diff.splitlines()))
+    run_id = register_run(RunContext(pr_details=PRDetails("o", "r", 1, "t", "d"), files=[next(files)],
+                                     diff_stream=files))
+    state = ReviewState(run_id=run_id, comments=[], mode="initial_review")
+    graph.invoke(state)  # default recursion_limit of 25
+    assert len(posted) == 40
+
+
+def test_chunk_sends_reference_the_diff_by_run_id():
+    import pytest
+    from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+    from utils.run_store import get_run, release_run
+
+    files = iter_parse_diff(iter(DIFF.splitlines()))
+    run_id = register_run(RunContext(pr_details=PRDetails("o", "r", 1, "t", "d"), files=[next(files)],
+                                     diff_stream=files))
+    state = ReviewState(run_id=run_id, comments=[])
+    state = state.model_copy(update=dispatch_chunks_node(state))
+    sends = fan_out_chunks(state)
+    assert [send.arg.run_id for send in sends] == [f"{run_id}/chunk/{key}" for key in state.chunk_queue]
+    assert [send.arg.files[0].to_file for send in sends] == ["b/a.py", "b/a.py", "b/b.py"]
+    assert "files" not in sends[0].arg.model_dump()
+    JsonPlusSerializer().dumps_typed(sends[0].arg)  # checkpointable without a pickle fallback
+
+    release_run(run_id)
+    with pytest.raises(KeyError):
+        get_run(sends[0].arg.run_id)
+
+
+def test_sequential_review_starts_before_the_diff_is_read(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.delenv("REVIEW_CHECKPOINT_PATH", raising=False)
+    import nodes.feedback_agent as feedback_agent
+    import nodes.git_comment_sender as git_comment_sender
+    import nodes.reviewer_agent as reviewer_agent
+    from States.state import ReviewFeedback, ReviewResponse
+    from graph import graph
+
+    events = []
+
+    class RecordingReviewer:
+        def invoke(self, inputs):
+            events.append(f"review {inputs['file_path']}")
+            return ReviewResponse(reviews=[])
+
+    def streamed_files():
+        for file in iter_parse_diff(iter(DIFF.splitlines())):
+            events.append(f"read {file.to_file}")
+            yield file
+
+    monkeypatch.setattr(reviewer_agent, "reviewer_agent_chain", RecordingReviewer())
+    monkeypatch.setattr(feedback_agent, "feedback_agent_chain",
+                        type("Satisfied", (), {"invoke": lambda self, inputs: ReviewFeedback(satisfied=True)})())
+    monkeypatch.setattr(git_comment_sender, "create_review_comment", lambda pr_details, comments, body: 1)
+
+    files = streamed_files()
+    run_id = register_run(RunContext(pr_details=PRDetails("o", "r", 1, "t", "d"), files=[next(files)],
+                                     diff_stream=files))
+    graph.invoke(ReviewState(run_id=run_id, comments=[], mode="initial_review"))
+
+    assert events == ["read b/a.py", "review a.py", "review a.py", "read b/b.py", "review b.py"]
+
+
+def test_async_sequential_review_reads_the_diff_off_the_event_loop(monkeypatch):
+    import asyncio
+    import time
+
+    from langchain_core.runnables import RunnableLambda
+
+    from nodes.review_chunk import make_review_in_order_node
+
+    def slow_files():
+        for file in iter_parse_diff(iter(DIFF.splitlines())):
+            time.sleep(0.05)  # a blocking page fetch
+            yield file
+
+    async def main():
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.005)
+
+        files = slow_files()
+        run_id = register_run(RunContext(pr_details=PRDetails("o", "r", 1, "t", "d"), files=[next(files)],
+                                         diff_stream=files))
+        node = make_review_in_order_node(RunnableLambda(lambda state: {"comments": []}), 10)
+        task = asyncio.create_task(ticker())
+        await asyncio.sleep(0)
+        await node.ainvoke(ReviewState(run_id=run_id, comments=[]))
+        task.cancel()
+        return ticks
+
+    ticks = asyncio.run(main())
+    # The loop kept running while the second file was fetched
+    assert len(ticks) >= 5
+
+
+def test_review_chunk_bounds_concurrent_chunk_reviews():
+    import asyncio
+
+    from nodes.review_chunk import make_review_chunk_node
+
+    in_flight, peak = 0, 0
+
+    class SlowChunkGraph:
+        async def ainvoke(self, state, config):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return {"comments": []}
+
+    node = make_review_chunk_node(SlowChunkGraph(), 10, max_concurrency=2)
+    states = [ReviewState(run_id=register_run(RunContext(pr_details=PRDetails("o", "r", 1, "t", "d"))), comments=[])
+              for _ in range(5)]
+
+    async def main():
+        await asyncio.gather(*(node.ainvoke(state) for state in states))
+
+    asyncio.run(main())
+    asyncio.run(main())  # a second run on a new event loop gets its own slots
+    assert peak == 2
@@ -0,0 +1,115 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from services.git_services.get_pr_details import PRDetails
+from services.git_services import get_diff
+from services.git_services.get_pr_files import stream_pr_files
+from utils.file_filters import PathMatcher
+
+PAGES = {
+    1: [
+        {"filename": "src/app.py", "status": "modified",
+         "patch": "@@ -1,2 +1,3 @@\n import os\n+import sys\n x = 1"},
+        {"filename": "logo.png", "status": "modified"},
+    ],
+    2: [
+        {"filename": "src/new.py", "status": "added", "patch": "@@ -0,0 +1,2 @@\n+a = 1\n+b = 2"},
+        {"filename": "src/old.py", "status": "removed", "patch": "@@ -1 +0,0 @@\n-a = 1"},
+    ],
+    3: [
+        {"filename": "lib/renamed.py", "previous_filename": "lib/original.py", "status": "renamed",
+         "patch": "@@ -5,2 +5,3 @@\n c = 3\n+d = 4\n e = 5"},
+        {"filename": "README.md", "status": "modified", "patch": "@@ -1 +1,2 @@\n # t\n+more"},
+    ],
+}
+
+
+class _CannedGitHub(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        page = int(parse_qs(url.query).get("page", ["1"])[0])
+        self.server.requested_pages.append(page)
+        time.sleep(self.server.delays.get(page, 0))
+        body = json.dumps(PAGES.get(page, [])).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Link", f'<http://{self.headers["Host"]}{url.path}?per_page=100&page=3>; rel="last"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def github_stand_in(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _CannedGitHub)
+    server.requested_pages = []
+    server.delays = {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("GITHUB_API_URL", f"http://127.0.0.1:{server.server_port}")
+    yield server
+    server.shutdown()
+
+
+def test_stream_pr_files_parses_every_page(github_stand_in):
+    pr_details = PRDetails("octo", "repo", 7, "title", "body")
+
+    files = list(stream_pr_files(pr_details, path_filter=PathMatcher(["*.md"]), max_workers=2))
+
+    assert sorted(github_stand_in.requested_pages) == [1, 2, 3]
+    by_path = {f.to_file: f for f in files}
+    assert sorted(by_path) == ["b/lib/renamed.py", "b/src/app.py", "b/src/new.py"]
+    assert by_path["b/src/app.py"].chunks[0].formatted_chunk == ["1 import os", "2+import sys", "3 x = 1"]
+    assert by_path["b/src/new.py"].status == "added"
+    assert by_path["b/lib/renamed.py"].status == "renamed"
+    assert list(by_path["b/lib/renamed.py"].chunks[0].line_numbers) == [5, 6, 7]
+
+
+def test_pages_are_yielded_in_page_order_whatever_order_they_arrive_in(github_stand_in):
+    github_stand_in.delays = {2: 0.3}
+
+    files = list(stream_pr_files(PRDetails("octo", "repo", 7, "title", "body"), max_workers=2))
+
+    assert [f.to_file for f in files] == ["b/src/app.py", "b/src/new.py", "b/lib/renamed.py", "b/README.md"]
+
+
+def test_diff_is_requested_from_the_configured_api_url(monkeypatch):
+    requested = []
+
+    def fake_get(url, **kwargs):
+        requested.append(url)
+        return type("Response", (), {"status_code": 200, "text": "diff"})()
+
+    monkeypatch.setattr(get_diff.requests, "get", fake_get)
+    monkeypatch.setenv("GITHUB_API_URL", "https://ghe.example.com/api/v3/")
+
+    assert get_diff.get_diff(PRDetails("octo", "repo", 7, "title", "body")) == "diff"
+    assert requested == ["https://ghe.example.com/api/v3/repos/octo/repo/pulls/7.diff"]
+
+
+def test_paths_with_spaces_and_quotes_survive_the_rebuilt_header():
+    from services.git_services.get_pr_files import _parse_page
+
+    entries = [
+        {"filename": "docs/my notes.py", "status": "modified", "patch": "@@ -1 +1,2 @@\n a = 1\n+b = 2"},
+        {"filename": "src/new name.py", "previous_filename": "src/old name.py", "status": "renamed",
+         "patch": "@@ -1 +1,2 @@\n a = 1\n+b = 2"},
+        {"filename": 'src/say "hi".py', "status": "modified", "patch": "@@ -1 +1,2 @@\n a = 1\n+b = 2"},
+        {"filename": "big data/dump.json", "status": "modified"},
+    ]
+
+    files = list(_parse_page(entries, PathMatcher(["big data/**"])))
+
+    assert [(f.from_file, f.to_file) for f in files] == [
+        ("a/docs/my notes.py", "b/docs/my notes.py"),
+        ("a/src/old name.py", "b/src/new name.py"),
+        ('a/src/say "hi".py', 'b/src/say "hi".py'),
+    ]
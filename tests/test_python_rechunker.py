@@ -0,0 +1,58 @@
+from utils.github_utils.diff_parser import parse_diff
+from utils.python_rechunker import iter_rechunk_python_files, split_chunk, definition_ranges
+
+SOURCE = "\n".join([
+    "import os",              # 1
+    "",                       # 2
+    "def load(path):",        # 3
+    "    path = path.strip()",  # 4
+    "    data = open(path)",  # 5
+    "    size = 0",           # 6
+    "    size += 1",          # 7
+    "    return data",        # 8
+    "",                       # 9
+    "def save(path):",        # 10
+    "    return path",        # 11
+]) + "\n"
+
+DIFF = """diff --git a/app.py b/app.py
+--- a/app.py
++++ b/app.py
+@@ -3,2 +3,2 @@
+ def load(path):
++    path = path.strip()
+@@ -6,2 +6,3 @@
+     size = 0
++    size += 1
+     return data
+@@ -9,2 +10,2 @@
+ def save(path):
++    return path
+"""
+
+
+def test_hunks_in_the_same_function_are_merged_with_the_lines_between():
+    files = list(iter_rechunk_python_files(parse_diff(DIFF), lambda path: SOURCE))
+    chunks = files[0].chunks
+    assert len(chunks) == 2
+    merged = chunks[0]
+    assert list(merged.line_numbers) == [3, 4, 5, 6, 7, 8]
+    assert merged.formatted_chunk[2] == "5     data = open(path)"
+    # Diff positions of the original lines are kept, the filled-in lines have none
+    assert [c.diff_position for c in merged.changes] == [2, 3, None, 5, 6, 7]
+    assert list(chunks[1].line_numbers) == [10, 11]
+
+
+def test_unparseable_source_leaves_hunks_untouched():
+    files = list(iter_rechunk_python_files(parse_diff(DIFF), lambda path: "def broken(:\n"))
+    assert len(files[0].chunks) == 3
+
+
+def test_oversized_chunk_is_split_before_a_definition():
+    lines = ["@@ -0,0 +1,11 @@"] + ["+" + line for line in SOURCE.splitlines()]
+    diff = "diff --git a/new.py b/new.py\n--- /dev/null\n+++ b/new.py\n" + "\n".join(lines) + "\n"
+    chunk = parse_diff(diff)[0].chunks[0]
+    parts = split_chunk(chunk, definition_ranges(SOURCE), max_lines=10)
+    assert [list(p.line_numbers) for p in parts] == [list(range(1, 10)), [10, 11]]
+    assert parts[1].content == "+def save(path):\n+    return path"
+    assert [p.target_start for p in parts] == [1, 10]
@@ -0,0 +1,169 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from States.state import ReviewState
+from nodes import reviewer_agent
+from services.git_services.get_pr_details import PRDetails
+from utils import rate_limiter
+from utils.github_utils.diff_parser import parse_diff
+from utils.github_utils.review_body import find_head_marker, format_review_body
+from utils.rate_limiter import RateLimiter, rate_limit_delay
+from utils.run_store import RunContext, register_run, release_run
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    async def asleep(self, seconds):
+        self.sleep(seconds)
+
+
+class TooManyRequests(Exception):
+    def __init__(self, retry_after=None):
+        super().__init__("429 Too Many Requests")
+        self.status_code = 429
+        self.response = SimpleNamespace(headers={"retry-after": retry_after} if retry_after else {})
+
+
+def _fake_time(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, "sleep", clock.sleep)
+    monkeypatch.setattr(rate_limiter.asyncio, "sleep", clock.asleep)
+    monkeypatch.setattr(rate_limiter.random, "uniform", lambda low, high: 0.0)
+    return clock
+
+
+def test_requests_and_tokens_per_minute_are_spread_out():
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_minute=2, tokens_per_minute=1000, clock=clock)
+
+    assert limiter.reserve(100) == 0
+    assert limiter.reserve(100) == 0
+    # The third request of the minute waits for one to refill
+    assert limiter.reserve(100) == pytest.approx(30)
+
+    clock.now += 120
+    # Reported usage far above the estimate is charged afterwards
+    limiter.record(SimpleNamespace(usage_metadata={"total_tokens": 1600}), 100)
+    assert limiter.reserve(100) == pytest.approx(36)
+    assert limiter.counters()["tokens"] == 1600
+
+
+def test_retry_after_is_honored_and_throttled_calls_are_retried(monkeypatch):
+    clock = _fake_time(monkeypatch)
+    limiter = RateLimiter(clock=clock)
+    errors = [TooManyRequests("7"), TooManyRequests()]
+
+    def call():
+        if errors:
+            raise errors.pop(0)
+        return "review"
+
+    assert limiter.call(call, 10) == "review"
+    # Retry-After first, then the exponential backoff of the second attempt
+    assert [s for s in clock.sleeps if s] == [7, 2]
+    counters = limiter.counters()
+    assert (counters["throttled"], counters["retries"], counters["failures"]) == (2, 2, 0)
+
+    errors.extend([TooManyRequests("1")])
+
+    async def acall():
+        if errors:
+            raise errors.pop(0)
+        return "async review"
+
+    assert asyncio.run(limiter.acall(acall, 10)) == "async review"
+
+
+def test_other_errors_are_not_retried():
+    assert rate_limit_delay(ValueError("bad output")) is None
+    with pytest.raises(ValueError):
+        RateLimiter().call(lambda: (_ for _ in ()).throw(ValueError("bad output")), 10)
+
+
+def test_review_still_throttled_is_reported_not_clean(monkeypatch):
+    clock = _fake_time(monkeypatch)
+    limiter = RateLimiter(max_retries=2, clock=clock)
+    monkeypatch.setattr(reviewer_agent, "get_rate_limiter", lambda: limiter)
+
+    class ThrottledChain:
+        def invoke(self, inputs):
+            return limiter.call(lambda: (_ for _ in ()).throw(TooManyRequests()), 10)
+
+    monkeypatch.setattr(reviewer_agent, "reviewer_agent_chain", ThrottledChain())
+    diff = "diff --git a/a.py b/a.py\n--- a/a.py\n+++ b/a.py\n@@ -1,1 +1,2 @@\n x = 1\n+y = 2\n"
+    state = ReviewState(run_id=register_run(RunContext(
+        pr_details=PRDetails(owner="o", repo="r", pull_number=1, title="", description=""),
+        files=parse_diff(diff),
+    )))
+
+    state = reviewer_agent.reviewer_agent(state)
+
+    assert state.review_cache_key is None
+    assert state.next_agent == "format_comments"
+    assert limiter.unreviewed == {"a.py": 1}
+    assert limiter.counters()["failures"] == 1
+    assert "1 hunks in these files were not reviewed:\n- `a.py`" in format_review_body(
+        None, rate_limited=limiter.unreviewed)
+    # The throttled hunk is retried by the next run, so the head is not marked as reviewed
+    assert find_head_marker(format_review_body("abc1234", rate_limited=limiter.unreviewed)) is None
+
+
+def test_throttled_review_ends_the_chunk_without_a_feedback_call(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    import nodes.feedback_agent as feedback_agent
+    import nodes.git_comment_sender as git_comment_sender
+    from graph import graph
+
+    clock = _fake_time(monkeypatch)
+    limiter = RateLimiter(max_retries=1, clock=clock)
+    monkeypatch.setattr(reviewer_agent, "get_rate_limiter", lambda: limiter)
+    monkeypatch.setattr(git_comment_sender, "get_rate_limiter", lambda: limiter)
+
+    class ThrottledChain:
+        def invoke(self, inputs):
+            return limiter.call(lambda: (_ for _ in ()).throw(TooManyRequests()), 10)
+
+    feedback_calls = []
+    monkeypatch.setattr(reviewer_agent, "reviewer_agent_chain", ThrottledChain())
+    monkeypatch.setattr(feedback_agent, "feedback_agent_chain",
+                        SimpleNamespace(invoke=lambda inputs: feedback_calls.append(inputs)))
+    bodies = []
+    monkeypatch.setattr(git_comment_sender, "create_summary_review", lambda pr_details, body: bodies.append(body))
+
+    diff = "diff --git a/a.py b/a.py\n--- a/a.py\n+++ b/a.py\n@@ -1,1 +1,2 @@\n x = 1\n+y = 2\n"
+    run_id = register_run(RunContext(pr_details=PRDetails("o", "r", 1, "t", "d", head_sha="abc1234"),
+                                     files=parse_diff(diff)))
+    try:
+        graph.invoke(ReviewState(run_id=run_id, comments=[], mode="initial_review"))
+    finally:
+        release_run(run_id)
+
+    assert feedback_calls == []
+    assert limiter.unreviewed == {"a.py": 1}
+    assert "- `a.py` (1 hunks)" in bodies[0] and find_head_marker(bodies[0]) is None
+
+
+def test_local_shard_workers_share_the_quota(monkeypatch):
+    from utils.rate_limiter import get_rate_limiter, share_rate_limits
+
+    monkeypatch.setenv("LLM_REQUESTS_PER_MINUTE", "500")
+    monkeypatch.setenv("LLM_TOKENS_PER_MINUTE", "200000")
+    get_rate_limiter.cache_clear()
+    try:
+        share_rate_limits(4)
+        limiter = get_rate_limiter()
+        assert (limiter.requests_per_minute, limiter.tokens_per_minute) == (125, 50000)
+    finally:
+        get_rate_limiter.cache_clear()
@@ -0,0 +1,82 @@
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from States.state import ReviewState
+from nodes.get_next_chunk import get_next_chunk
+from services.git_services.get_pr_details import PRDetails
+from utils.github_utils.diff_parser import parse_diff
+from utils.github_utils.review_body import build_review_body, find_head_marker
+from utils.path_utils import normalize_file_path
+from utils.review_budget import ReviewBudget
+from utils.risk_scorer import prioritize_files, score_chunk
+from utils.run_store import RunContext, register_run
+
+DIFF = """diff --git a/README.md b/README.md
+--- a/README.md
++++ b/README.md
+@@ -1,1 +1,2 @@
+ # Title
++Some docs
+diff --git a/tests/test_app.py b/tests/test_app.py
+--- a/tests/test_app.py
++++ b/tests/test_app.py
+@@ -1,1 +1,2 @@
+ import app
++assert app.run()
+diff --git a/app.py b/app.py
+--- a/app.py
++++ b/app.py
+@@ -1,1 +1,3 @@
+ import os
++password = os.getenv("PASSWORD")
++os.system("login " + password)
+"""
+
+
+def _usage(tokens):
+    message = AIMessage(content="", usage_metadata={"input_tokens": tokens, "output_tokens": 0, "total_tokens": tokens})
+    return LLMResult(generations=[[ChatGeneration(message=message)]])
+
+
+def test_security_sensitive_code_outranks_tests_and_docs():
+    files = parse_diff(DIFF)
+    scores = {normalize_file_path(f.to_file): score_chunk(normalize_file_path(f.to_file), f.chunks[0]) for f in files}
+    assert scores["app.py"] > scores["tests/test_app.py"] > scores["README.md"]
+    assert [normalize_file_path(f.to_file) for f in prioritize_files(files)] == ["app.py", "tests/test_app.py", "README.md"]
+
+
+def test_budget_counts_requests_and_tokens():
+    budget = ReviewBudget(max_tokens=100)
+    budget.on_chat_model_start({}, [[]])
+    budget.on_llm_end(_usage(60))
+    assert not budget.exhausted()
+    budget.on_llm_end(_usage(40))
+    assert budget.exhausted() and budget.requests == 1 and budget.tokens == 100
+
+
+def test_budget_from_env_is_off_by_default(monkeypatch):
+    monkeypatch.delenv("REVIEW_TOKEN_BUDGET", raising=False)
+    monkeypatch.delenv("REVIEW_REQUEST_BUDGET", raising=False)
+    assert ReviewBudget.from_env() is None
+    monkeypatch.setenv("REVIEW_REQUEST_BUDGET", "3")
+    assert ReviewBudget.from_env().max_requests == 3
+
+
+def test_exhausted_budget_skips_remaining_chunks_and_lists_them():
+    budget = ReviewBudget(max_requests=1)
+    budget.on_chat_model_start({}, [[]])
+    state = ReviewState(
+        run_id=register_run(RunContext(
+            pr_details=PRDetails(owner="o", repo="r", pull_number=1, title="", description="", head_sha="abc1234"),
+            files=prioritize_files(parse_diff(DIFF)),
+            review_budget=budget,
+        )),
+        comments=[],
+    )
+    state = get_next_chunk(state)
+    assert state.done
+    assert [s["path"] for s in budget.skipped] == ["app.py", "tests/test_app.py", "README.md"]
+    body = build_review_body(state)
+    assert "- `app.py` line 2" in body
+    # The skipped hunks are reviewed by the next run, so the head is not marked as reviewed
+    assert find_head_marker(body) is None
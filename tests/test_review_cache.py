@@ -0,0 +1,43 @@
+import time
+
+from States.state import Chunk, Change, ReviewComment, ReviewResponse
+from utils.review_cache import ReviewCache
+
+
+def _chunk(target_start):
+    return Chunk(
+        content=f"@@ -1,1 +{target_start},2 @@",
+        changes=[Change(content=" x = 1", line_number=target_start),
+                 Change(content="+y = eval(x)", line_number=target_start + 1)],
+        target_start=target_start,
+    )
+
+
+def test_hit_is_rebased_onto_the_new_line_numbers(tmp_path):
+    cache = ReviewCache(str(tmp_path / "reviews.sqlite"), ttl_seconds=3600, max_entries=100)
+    first, moved = _chunk(10), _chunk(40)
+    key = cache.key(first, "app.py")
+    assert cache.key(moved, "app.py") == key
+    assert cache.key(first, "app.js") != key
+    assert cache.get(key, first) is None
+
+    cache.put(key, first, ReviewResponse(reviews=[ReviewComment(lineNumber=11, reviewComment="avoid eval")]))
+    reopened = ReviewCache(cache.path, ttl_seconds=3600, max_entries=100)
+    cached = reopened.get(key, moved)
+    assert [(r.lineNumber, r.reviewComment) for r in cached.reviews] == [(41, "avoid eval")]
+    assert (cache.hits, cache.misses, reopened.hits) == (0, 1, 1)
+
+
+def test_expired_and_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ReviewCache(str(tmp_path / "reviews.sqlite"), ttl_seconds=3600, max_entries=2)
+    chunk = _chunk(1)
+    for key in ("a", "b", "c"):
+        cache.put(key, chunk, ReviewResponse())
+        time.sleep(0.01)
+    cache.get("a", chunk)
+    cache.evict()
+    assert cache.get("b", chunk) is None
+    assert cache.get("a", chunk) is not None
+
+    cache.ttl_seconds = 0
+    assert cache.get("c", chunk) is None
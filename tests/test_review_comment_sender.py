@@ -0,0 +1,26 @@
+from types import SimpleNamespace
+
+from services.git_services.get_pr_details import PRDetails
+from services.git_services.git_review_comment_sender import create_review_comment
+
+
+class FakePR:
+    def __init__(self):
+        self.reviews = []
+
+    def create_review(self, body, event, comments=None):
+        self.reviews.append(SimpleNamespace(id=len(self.reviews) + 1, body=body, event=event, comments=comments))
+        return self.reviews[-1]
+
+    def get_reviews(self):
+        return list(self.reviews)
+
+
+def test_review_body_is_the_summary_not_the_last_comment():
+    pr = FakePR()
+    comments = [{"path": "a.py", "line": 1, "body": "first"}, {"path": "b.py", "line": 2, "body": "second"}]
+
+    create_review_comment(PRDetails("o", "r", 1, "t", "d", pr_obj=pr), comments, body="summary")
+
+    assert pr.reviews[0].body == "summary"
+    assert [c["body"] for c in pr.reviews[0].comments] == ["first", "second"]
@@ -0,0 +1,77 @@
+from States.state import ReviewState
+from nodes.get_next_chunk import get_next_chunk
+from services.git_services.get_pr_details import PRDetails
+from utils.github_utils.diff_parser import parse_diff
+from utils.github_utils.review_body import build_review_body, find_head_marker, format_review_body
+from utils.review_deadline import ReviewDeadline
+from utils.run_store import RunContext, register_run
+
+DIFF = """diff --git a/a.py b/a.py
+--- a/a.py
++++ b/a.py
+@@ -1,1 +1,2 @@
+ import os
++import sys
+@@ -30,1 +31,2 @@
+ def f():
++    return 2
+diff --git a/b.py b/b.py
+--- a/b.py
++++ b/b.py
+@@ -1,1 +1,2 @@
+ x = 1
++y = 2
+"""
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _state(deadline):
+    return ReviewState(
+        run_id=register_run(RunContext(
+            pr_details=PRDetails(owner="o", repo="r", pull_number=1, title="", description=""),
+            files=parse_diff(DIFF),
+            review_deadline=deadline,
+        )),
+        comments=[],
+    )
+
+
+def test_deadline_is_near_within_margin():
+    clock = FakeClock()
+    deadline = ReviewDeadline(600, 120, clock=clock)
+    assert not deadline.near()
+    clock.now += 481
+    assert deadline.near()
+
+
+def test_deadline_from_env(monkeypatch):
+    monkeypatch.delenv("REVIEW_DEADLINE", raising=False)
+    assert ReviewDeadline.from_env() is None
+    monkeypatch.setenv("REVIEW_DEADLINE", "60")
+    assert ReviewDeadline.from_env().margin == 60
+
+
+def test_chunks_after_the_deadline_are_listed_as_not_covered():
+    clock = FakeClock()
+    deadline = ReviewDeadline(600, 120, clock=clock)
+    state = get_next_chunk(_state(deadline))
+    assert not state.done and state.current_chunk_index == 0
+
+    clock.now += 500
+    state.current_chunk_index += 1
+    state = get_next_chunk(state)
+    assert state.done
+    assert deadline.uncovered == {"a.py": 1, "b.py": 1}
+    assert "- `a.py` (1 hunks)\n- `b.py` (1 hunks)" in build_review_body(state)
+
+
+def test_head_is_not_marked_reviewed_when_hunks_ran_out_of_time():
+    assert find_head_marker(format_review_body("abc1234")) == "abc1234"
+    assert find_head_marker(format_review_body("abc1234", deadline_uncovered={"a.py": 1})) is None
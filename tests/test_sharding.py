@@ -0,0 +1,57 @@
+from utils.github_utils.diff_parser import parse_diff
+from utils.github_utils.review_body import format_review_body
+from utils.sharding import ShardResult, assign_shards, file_weight, iter_shard_files, load_shard_results, \
+    write_shard_result
+
+
+def _diff(sizes):
+    parts = []
+    for i, size in enumerate(sizes):
+        added = "".join(f"+line {n}\n" for n in range(size))
+        parts.append(f"diff --git a/f{i}.py b/f{i}.py\n--- a/f{i}.py\n+++ b/f{i}.py\n"
+                     f"@@ -1,1 +1,{size + 1} @@\n ctx\n{added}")
+    return "".join(parts)
+
+
+def test_shards_are_disjoint_balanced_and_deterministic():
+    files = parse_diff(_diff([300, 10, 10, 10, 120, 100, 90, 5, 5, 80]))
+    count = 3
+    shards = [[f.to_file for f in iter_shard_files(files, index, count)] for index in range(count)]
+
+    assert sorted(path for shard in shards for path in shard) == sorted(f.to_file for f in files)
+    assert sum(len(shard) for shard in shards) == len(files)
+    assert assign_shards(files, count) == assign_shards(parse_diff(_diff([300, 10, 10, 10, 120, 100, 90, 5, 5, 80])),
+                                                        count)
+
+    by_path = {f.to_file: file_weight(f) for f in files}
+    loads = [sum(by_path[path] for path in shard) for shard in shards]
+    # The 300-line file gets a shard of its own and sets the floor; the others share the rest evenly
+    assert ["b/f0.py"] in shards
+    assert max(loads) == by_path["b/f0.py"]
+    assert min(loads) >= 0.9 * sum(loads) / count
+
+
+def test_load_reports_missing_and_stale_shards(tmp_path):
+    write_shard_result(ShardResult(head_sha="abc", shard_index=0, shard_count=3,
+                                   comments=[{"path": "a.py", "line": 1, "body": "x"}]), str(tmp_path))
+    write_shard_result(ShardResult(head_sha="old", shard_index=2, shard_count=3), str(tmp_path))
+
+    results, missing = load_shard_results(3, "abc", str(tmp_path))
+
+    assert [r.shard_index for r in results] == [0]
+    assert results[0].comments == [{"path": "a.py", "line": 1, "body": "x"}]
+    assert missing == [1, 2]
+
+
+def test_merged_body_names_missing_shards():
+    body = format_review_body("abc123", missing_shards=[1, 2])
+
+    assert "Review shards 1, 2 did not report" in body
+
+
+def test_output_dir_set_after_import_is_used(tmp_path, monkeypatch):
+    monkeypatch.setenv("SHARD_OUTPUT_DIR", str(tmp_path))
+    path = write_shard_result(ShardResult(head_sha="abc", shard_index=0, shard_count=1))
+
+    assert path.parent == tmp_path
+    assert [r.shard_index for r in load_shard_results(1, "abc")[0]] == [0]
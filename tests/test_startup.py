@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+# Cold import of main measured by -X importtime; about 0.5s here, 3s before imports were deferred.
+# Generous so a slow CI runner passes; the deferred modules below are what keep it low.
+IMPORT_BUDGET_SECONDS = 2.5
+# Imported only once a review runs, and provider SDKs only for the configured provider
+DEFERRED_MODULES = ["graph", "langgraph", "github", "openai", "anthropic", "langchain_openai", "langchain_anthropic",
+                    "langchain_google_genai", "langchain_ollama", "langchain_community", "chromadb",
+                    "sentence_transformers"]
+
+
+def _import_main():
+    env = {**os.environ, "OPENAI_API_KEY": "startup-test", "LOG_LEVEL": "ERROR"}
+    script = f"import sys, main; print(','.join(sorted(m for m in {DEFERRED_MODULES!r} if m in sys.modules)))"
+    return subprocess.run([sys.executable, "-X", "importtime", "-c", script], cwd=ROOT, env=env,
+                          capture_output=True, text=True, check=True)
+
+
+def test_importing_main_defers_sdks_and_the_graph():
+    assert _import_main().stdout.strip() == ""
+
+
+def _imported_modules(importtime_log):
+    """Cumulative microseconds per module imported, from the ``-X importtime`` log."""
+    modules = {}
+    for line in importtime_log.splitlines():
+        if line.startswith("import time:") and "|" in line and "cumulative" not in line:
+            _, cumulative, name = line.split("|")
+            modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def test_importing_main_stays_within_budget():
+    timings = []
+    for _ in range(3):
+        modules = _imported_modules(_import_main().stderr)
+        heavy = sorted({name for name in modules if name.split(".")[0] in DEFERRED_MODULES})
+        assert heavy == [], f"import main pulled in {heavy}"
+        timings.append(modules["main"] / 1e6)
+    # Best of three, so a busy machine does not fail the test
+    assert min(timings) < IMPORT_BUDGET_SECONDS, f"import main took {min(timings):.2f}s"
@@ -0,0 +1,205 @@
+# utils/diff_cache.py
+import base64
+import gzip
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from States.state import Chunk, File
+from services.git_services.get_pr_details import PRDetails
+from utils.logger import get_logger
+
+log = get_logger()
+
+# Bump when the parsed File/Chunk layout changes so stale entries are ignored
+PARSED_FORMAT_VERSION = "3"
+RAW_SUFFIX = ".diff.gz"
+PARSED_SUFFIX = ".files.jsonl"
+# Entries of earlier versions, only ever evicted
+LEGACY_SUFFIXES = (".files.pkl",)
+ARRAY_COLUMNS = ("line_starts", "line_ends", "line_numbers", "diff_positions")
+CHUNK_FIELDS = ("start", "end", "guidelines", "source_start", "source_length", "target_start", "target_length")
+
+
+def _encode_array(values: array) -> str:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return base64.b64encode(values.tobytes()).decode("ascii")
+
+
+def _decode_array(text: str) -> array:
+    values = array("I")
+    values.frombytes(base64.b64decode(text))
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def file_to_json(file: File) -> str:
+    """
+    One line of a parsed entry: the file's paths and status, its diff buffers once each (the
+    chunks of a file share one) and per chunk the offsets into them, arrays as little-endian bytes.
+    """
+    buffers: List[str] = []
+    buffer_index: Dict[int, int] = {}
+    chunks = []
+    for chunk in file.chunks:
+        index = buffer_index.setdefault(id(chunk.buffer), len(buffers))
+        if index == len(buffers):
+            buffers.append(chunk.buffer)
+        entry: Dict[str, Any] = {"buffer": index}
+        entry.update((name, getattr(chunk, name)) for name in CHUNK_FIELDS)
+        entry.update((name, _encode_array(getattr(chunk, name))) for name in ARRAY_COLUMNS)
+        chunks.append(entry)
+    return json.dumps({"from_file": file.from_file, "to_file": file.to_file, "status": file.status,
+                       "buffers": buffers, "chunks": chunks})
+
+
+def file_from_json(line: str) -> File:
+    data = json.loads(line)
+    buffers = data["buffers"]
+    chunks = []
+    for entry in data["chunks"]:
+        fields = {name: entry[name] for name in CHUNK_FIELDS}
+        fields.update((name, _decode_array(entry[name])) for name in ARRAY_COLUMNS)
+        chunks.append(Chunk(buffer=buffers[entry["buffer"]], **fields))
+    return File(from_file=data["from_file"], to_file=data["to_file"], status=data["status"], chunks=chunks)
+
+
+class DiffCache:
+    """
+    Content-addressed on-disk cache of PR diffs keyed by repository, base SHA and head SHA.
+
+    Stores the raw diff gzip-compressed and the parsed files as JSON lines (never pickled: the
+    directory may be a shared cache others can write to), and evicts the least recently used
+    entries once the directory grows past ``max_bytes``.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> Optional["DiffCache"]:
+        root = os.getenv("DIFF_CACHE_DIR", "")
+        if not root:
+            return None
+        max_bytes = int(float(os.getenv("DIFF_CACHE_MAX_MB", "512")) * 1024 * 1024)
+        return cls(root, max_bytes)
+
+    @staticmethod
+    def key(pr_details: PRDetails) -> Optional[str]:
+        if not pr_details.base_sha or not pr_details.head_sha:
+            return None
+        identity = f"{pr_details.owner}/{pr_details.repo}:{pr_details.base_sha}:{pr_details.head_sha}"
+        return hashlib.sha256(identity.encode()).hexdigest()
+
+    @staticmethod
+    def parse_key(settings: str) -> str:
+        """Parsed output also depends on parser settings such as path filters."""
+        return hashlib.sha256(f"{PARSED_FORMAT_VERSION}:{settings}".encode()).hexdigest()[:16]
+
+    def _path(self, key: str, suffix: str) -> Path:
+        return self.root / f"{key}{suffix}"
+
+    def _touch(self, path: Path) -> None:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def load_files(self, key: str, parse_key: str) -> Optional[List[File]]:
+        path = self._path(key, f".{parse_key}{PARSED_SUFFIX}")
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as handle:
+                files = [file_from_json(line) for line in handle]
+        except Exception as e:
+            log.warning(f"Discarding unreadable diff cache entry {path.name}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+        self._touch(path)
+        log.info(f"Diff cache hit: {len(files)} parsed files from {path.name}")
+        return files
+
+    def record_files(self, key: str, parse_key: str, files: Iterable[File]) -> Iterator[File]:
+        """
+        Passes ``files`` through, serializing each one before the caller can modify it, and
+        commits the entry once the iterator has been fully consumed.
+        """
+        path = self._path(key, f".{parse_key}{PARSED_SUFFIX}")
+        fd, tmp_name = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        count = 0
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                for file in files:
+                    handle.write(file_to_json(file))
+                    handle.write("\n")
+                    count += 1
+                    yield file
+            os.replace(tmp_name, path)
+        finally:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+        log.info(f"Stored {count} parsed files in diff cache {path.name}")
+        self.evict()
+
+    def load_raw_lines(self, key: str) -> Optional[Iterator[str]]:
+        path = self._path(key, RAW_SUFFIX)
+        if not path.exists():
+            return None
+        self._touch(path)
+        log.info(f"Diff cache hit: raw diff {path.name}")
+        return self._read_raw_lines(path)
+
+    @staticmethod
+    def _read_raw_lines(path: Path) -> Iterator[str]:
+        with gzip.open(path, "rt", encoding="utf-8", newline="\n") as handle:
+            for line in handle:
+                yield line.rstrip("\n")
+
+    def record_raw_lines(self, key: str, lines: Iterable[str]) -> Iterator[str]:
+        """Passes ``lines`` through while compressing them into the cache, committing at the end."""
+        path = self._path(key, RAW_SUFFIX)
+        fd, tmp_name = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, \
+                    gzip.open(raw, "wt", compresslevel=6, encoding="utf-8", newline="\n") as handle:
+                for line in lines:
+                    handle.write(line)
+                    handle.write("\n")
+                    yield line
+            os.replace(tmp_name, path)
+        finally:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+        log.info(f"Stored raw diff in diff cache {path.name}")
+        self.evict()
+
+    def evict(self) -> None:
+        """Deletes least recently used entries until the cache fits in ``max_bytes``."""
+        entries = []
+        for path in self.root.iterdir():
+            if not path.name.endswith((RAW_SUFFIX, PARSED_SUFFIX) + LEGACY_SUFFIXES):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            log.debug(f"Evicted diff cache entry {path.name}")
@@ -1,28 +1,119 @@
 # utils/file_filter.py
 import os
-import fnmatch
-from typing import List
+import re
+from typing import List, Optional
 from States.state import File
 from utils.logger import get_logger
+from utils.path_utils import normalize_file_path
 
 log = get_logger()
 
 
-def get_exclude_patterns_from_env(env_var: str = "INPUT_EXCLUDE") -> List[str]:
+def _get_patterns_from_env(env_var: str, kind: str) -> List[str]:
     raw = os.environ.get(env_var, "")
     if raw.strip():
         patterns = [p.strip() for p in raw.split(",") if p.strip()]
-        log.debug(f"Processed exclude file patterns: {patterns}")
+        log.debug(f"Processed {kind} file patterns: {patterns}")
         return patterns
     return []
 
 
-def filter_files_by_exclude_patterns(files: List[File],exclude_patterns:List[str]=get_exclude_patterns_from_env()) -> List[File]:
+def get_exclude_patterns_from_env(env_var: str = "INPUT_EXCLUDE") -> List[str]:
+    return _get_patterns_from_env(env_var, "exclude")
+
+
+def get_include_patterns_from_env(env_var: str = "INPUT_INCLUDE") -> List[str]:
+    return _get_patterns_from_env(env_var, "include")
+
+
+def glob_to_regex(pattern: str) -> str:
+    """
+    Translates a gitignore-style glob into a regular expression.
+
+    ``*`` and ``?`` stay within one path segment and ``**`` spans directories. A pattern
+    without a ``/`` matches a file or directory name at any depth, while a pattern with
+    one is anchored at the repository root. A matched directory covers everything below it.
+    """
+    pattern = pattern.strip()
+    anchored = "/" in pattern.rstrip("/")
+    pattern = pattern.strip("/")
+
+    parts = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+            continue
+        if char == "*":
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                parts.append(re.escape(char))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                parts.append(f"[{body}]")
+                i = end
+        else:
+            parts.append(re.escape(char))
+        i += 1
+
+    body = "".join(parts)
+    prefix = "" if anchored else "(?:.*/)?"
+    return f"{prefix}{body}(?:/.*)?"
+
+
+class PathMatcher:
+    """Decides which files get reviewed, using exclude and include globs compiled into one regex each."""
+
+    def __init__(self, exclude_patterns: Optional[List[str]] = None, include_patterns: Optional[List[str]] = None):
+        self.exclude_patterns = list(exclude_patterns or [])
+        self.include_patterns = list(include_patterns or [])
+        self._exclude = self._compile(self.exclude_patterns)
+        self._include = self._compile(self.include_patterns)
+
+    @staticmethod
+    def _compile(patterns: List[str]) -> Optional[re.Pattern]:
+        if not patterns:
+            return None
+        return re.compile("|".join(f"(?:{glob_to_regex(p)})" for p in patterns))
+
+    def should_review(self, file_path: str) -> bool:
+        path = normalize_file_path(file_path) or ""
+        if self._exclude is not None and self._exclude.fullmatch(path):
+            return False
+        if self._include is not None and not self._include.fullmatch(path):
+            return False
+        return True
+
+    def __bool__(self) -> bool:
+        return bool(self.exclude_patterns or self.include_patterns)
+
+
+def get_path_matcher_from_env() -> PathMatcher:
+    """Builds the matcher from INPUT_EXCLUDE/INPUT_INCLUDE as they are set at call time."""
+    return PathMatcher(get_exclude_patterns_from_env(), get_include_patterns_from_env())
+
+
+def filter_files_by_exclude_patterns(files: List[File], exclude_patterns: Optional[List[str]] = None) -> List[File]:
+    if exclude_patterns is None:
+        exclude_patterns = get_exclude_patterns_from_env()
+    matcher = PathMatcher(exclude_patterns)
+
     filtered = []
     for file in files:
         file_path = file.to_file
-        should_exclude = any(fnmatch.fnmatch(file_path, pattern) for pattern in exclude_patterns)
-        if should_exclude:
+        if not matcher.should_review(file_path):
             log.debug(f"Excluding file: {file_path}")
             continue
         filtered.append(file)
@@ -30,5 +121,3 @@ def filter_files_by_exclude_patterns(files: List[File],exclude_patterns:List[str
 
     log.debug(f"Files to analyze after filtering: {[f.to_file for f in filtered]}")
     return filtered
-
-
@@ -1,65 +1,251 @@
 # services/diff_parser.py
 
 import re
-from typing import List
+from typing import Iterable, Iterator, List, Optional, Tuple
 
-from States.state import File,Change,Chunk
+from States.state import File,Chunk
+from utils.file_filters import PathMatcher
 from utils.logger import get_logger
 from utils.path_utils import normalize_file_path
 
 log = get_logger()
 
-def parse_diff(diff_text: str) -> List[File]:
-    files = []
-    current_file = None
-    current_chunk = None
-    target_line_number = 0
 
-    log.info(
-        "\n---------------------------------------------------------------------------STARTED PARSING DIFF---------------------------------------------------------\n")
-    lines = diff_text.splitlines()
-    line_index = 0
+def _iter_text_lines(diff_text: str) -> Iterator[str]:
+    """Yields the lines of a diff string without building a second full copy of it."""
+    start = 0
+    length = len(diff_text)
+    while start < length:
+        end = diff_text.find("\n", start)
+        if end == -1:
+            end = length
+        yield diff_text[start:end].rstrip("\r")
+        start = end + 1
+
+
+_QUOTED_PATH_RE = re.compile(r'"((?:[^"\\]|\\.)*)"')
+_C_ESCAPES = {"a": "\a", "b": "\b", "t": "\t", "n": "\n", "v": "\v", "f": "\f", "r": "\r",
+              '"': '"', "\\": "\\"}
+_NEEDS_QUOTING_RE = re.compile(r'[\x00-\x1f"\\\x7f]')
+
+
+def quote_diff_path(path: str) -> str:
+    """Quotes a path of a diff header the way git does when it holds quotes, backslashes or control characters."""
+    if not _NEEDS_QUOTING_RE.search(path):
+        return path
+    reverse = {value: key for key, value in _C_ESCAPES.items()}
+    escaped = "".join(f"\\{reverse[c]}" if c in reverse else f"\\{ord(c):03o}" if ord(c) < 0x20 or c == "\x7f" else c
+                      for c in path)
+    return f'"{escaped}"'
+
+
+def unquote_diff_path(text: str) -> str:
+    """Reverses git's C-style quoting of a path (octal escapes are UTF-8 bytes); unquoted text is returned as is."""
+    if not (len(text) >= 2 and text[0] == text[-1] == '"'):
+        return text
+    out = bytearray()
+    body = text[1:-1]
+    index = 0
+    while index < len(body):
+        char = body[index]
+        if char == "\\" and index + 1 < len(body):
+            escape = body[index + 1]
+            if escape in "01234567":
+                out.append(int(body[index + 1:index + 4], 8))
+                index += 4
+                continue
+            out.extend(_C_ESCAPES.get(escape, escape).encode())
+            index += 2
+            continue
+        out.extend(char.encode())
+        index += 1
+    return out.decode("utf-8", errors="replace")
+
+
+def _split_git_header(rest: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    The a/ and b/ paths of a ``diff --git`` header. git only quotes unusual paths, so unquoted ones
+    may hold spaces: the header splits where both sides name the same file, else at the first " b/".
+    """
+    quoted = [match.group(0) for match in _QUOTED_PATH_RE.finditer(rest)]
+    if rest.startswith('"'):
+        source = quoted[0]
+        target = rest[len(source):].strip()
+        return unquote_diff_path(source), unquote_diff_path(target)
+    if rest.endswith('"') and quoted:
+        target = quoted[-1]
+        return rest[:-len(target)].strip(), unquote_diff_path(target)
+    half = (len(rest) - 1) // 2
+    if len(rest) % 2 == 1 and rest[half] == " " and rest[2:half] == rest[half + 3:]:
+        return rest[:half], rest[half + 1:]
+    source, separator, target = rest.partition(" b/")
+    return source, ("b/" + target) if separator else None
+
+
+# File kinds whose comments could never land on an added line, so reviewing them is wasted work
+UNREVIEWABLE_STATUSES = ("deleted", "binary")
+
+
+class _FileBuilder:
+    """Accumulates one file's hunk lines into a single buffer while chunks record offsets into it."""
+
+    def __init__(self):
+        self.file = File()
+        self.lines: List[str] = []
+        self.offset = 0
+        self.position = 0
+        self.chunk: Optional[Chunk] = None
+        self.chunk_has_additions = False
+        self.dropped_chunks = 0
+
+    def classify(self, line: str) -> None:
+        """Reads the extended git header lines that describe what kind of change the file is."""
+        if line.startswith("new file mode"):
+            self.file.status = "added"
+        elif line.startswith("deleted file mode"):
+            self.file.status = "deleted"
+        elif line.startswith(("rename from", "rename to")):
+            self.file.status = "renamed"
+        elif line.startswith(("copy from", "copy to")):
+            self.file.status = "copied"
+        elif line.startswith(("old mode", "new mode")) and self.file.status == "modified":
+            self.file.status = "mode_change"
+
+    def append_line(self, line: str) -> int:
+        start = self.offset
+        self.lines.append(line)
+        self.offset += len(line) + 1
+        return start
+
+    def start_chunk(self, header: str) -> Chunk:
+        self.close_chunk()
+        self.position += 1
+        self.chunk = Chunk(start=self.append_line(header))
+        self.chunk.end = self.chunk.start + len(header)
+        self.chunk_has_additions = False
+        return self.chunk
+
+    def add_line(self, line: str, line_number: Optional[int] = None, is_change: bool = True) -> None:
+        start = self.append_line(line)
+        self.chunk.end = start + len(line)
+        if is_change:
+            self.chunk_has_additions = self.chunk_has_additions or line.startswith("+")
+            self.position += 1
+            self.chunk.line_starts.append(start)
+            self.chunk.line_ends.append(start + len(line))
+            self.chunk.line_numbers.append(line_number or 0)
+            self.chunk.diff_positions.append(self.position)
+
+    def close_chunk(self) -> None:
+        # Hunks without added lines are dropped; diff positions keep counting them as GitHub does
+        if self.chunk:
+            if self.chunk_has_additions:
+                self.file.chunks.append(self.chunk)
+            else:
+                self.dropped_chunks += 1
+            self.chunk = None
+
+    def is_reviewable(self) -> bool:
+        path = normalize_file_path(self.file.to_file)
+        if not self.file.to_file:
+            return False
+        if self.file.status in UNREVIEWABLE_STATUSES:
+            log.debug(f"Dropping {self.file.status} file: {path}")
+            return False
+        if not self.file.chunks:
+            log.debug(f"Dropping {self.file.status} file without added lines: {path}")
+            return False
+        return True
+
+    def finish(self) -> File:
+        self.close_chunk()
+        buffer = "\n".join(self.lines)
+        self.lines = []
+        for chunk in self.file.chunks:
+            chunk.buffer = buffer
+
+        log.debug(f"File: {normalize_file_path(self.file.to_file)} ({self.file.status}) with "
+                  f"{len(self.file.chunks)} chunks, {self.dropped_chunks} without added lines dropped")
+        return self.file
+
+
+def iter_parse_diff(lines: Iterable[str], path_filter: Optional[PathMatcher] = None) -> Iterator[File]:
+    """
+    Parses a unified diff incrementally.
+
+    Consumes ``lines`` one at a time (e.g. a streamed HTTP response) and yields each
+    ``File`` as soon as its last hunk has been read. Files rejected by ``path_filter``
+    are skipped as soon as their header is read, without building any of their hunks.
+
+    Deleted, binary, pure-rename and mode-only files are dropped, as are hunks without any
+    added line: review comments can only be placed on added lines, so they would be discarded.
+    """
+    builder = None
+    target_line_number = 0
     in_binary_file = False
+    skipping_file = False
+    file_count = 0
+    skipped_count = 0
+    dropped_count = 0
 
-    while line_index < len(lines):
-        line = lines[line_index]
+    # Once per page when the files listing is parsed, so not at info level
+    log.debug("Started parsing diff")
 
+    for line in lines:
         if line.startswith("Binary files") or line.startswith("GIT binary patch"):
             in_binary_file = True
+            if builder:
+                builder.file.status = "binary"
             log.debug(f"Skipping binary file content: {line}")
-            line_index += 1
             continue
 
         if line.startswith("diff --git"):
             in_binary_file = False
-            if current_file:
-                if current_chunk:
-                    current_file.chunks.append(current_chunk)
-                    current_chunk = None
-                files.append(current_file)
-                log.debug(f"Added file to list: {current_file.to_file} with {len(current_file.chunks)} chunks")
+            skipping_file = False
+            if builder:
+                current_file = builder.finish()
+                if builder.is_reviewable():
+                    file_count += 1
+                    yield current_file
+                else:
+                    dropped_count += 1
 
             #Starting New File
-            current_file = File()
-            parts = line.split()
-            if len(parts) >= 3:
-                if parts[2].startswith("a/"):
-                    current_file.from_file = parts[2]
-                if len(parts) > 3 and parts[3].startswith("b/"):
-                    current_file.to_file = parts[3]
+            builder = _FileBuilder()
+            from_file, to_file = _split_git_header(line[len("diff --git "):])
+            if from_file and from_file.startswith("a/"):
+                builder.file.from_file = from_file
+            if to_file and to_file.startswith("b/"):
+                builder.file.to_file = to_file
+
+            if path_filter and builder.file.to_file and not path_filter.should_review(builder.file.to_file):
+                log.debug(f"Excluding file: {builder.file.to_file}")
+                skipping_file = True
+                skipped_count += 1
+                builder = None
+
+        elif skipping_file:
+            continue
         #Adding From and To File
-        elif line.startswith("--- ") and current_file:
-            current_file.from_file = line[4:].strip()
+        elif line.startswith("--- ") and builder:
+            builder.file.from_file = unquote_diff_path(line[4:].strip())
 
-        elif line.startswith("+++ ") and current_file:
-            current_file.to_file = line[4:].strip()
+        elif line.startswith("+++ ") and builder:
+            builder.file.to_file = unquote_diff_path(line[4:].strip())
+            if builder.file.to_file == "/dev/null":
+                log.debug(f"Dropping deleted file: {normalize_file_path(builder.file.from_file)}")
+                skipping_file = True
+                dropped_count += 1
+                builder = None
+            elif path_filter and not builder.chunk and not path_filter.should_review(builder.file.to_file):
+                log.debug(f"Excluding file: {builder.file.to_file}")
+                skipping_file = True
+                skipped_count += 1
+                builder = None
         #Adding Some File Related Information
         #Adding New Chunk
-        elif line.startswith("@@") and not in_binary_file and current_file:
-            if current_chunk:
-                current_file.chunks.append(current_chunk)
-            current_chunk = Chunk()
-            current_chunk.content = line
+        elif line.startswith("@@") and not in_binary_file and builder:
+            current_chunk = builder.start_chunk(line)
 
             match = re.match(r'@@ -(\d+)(?:,\d+)? \+(\d+)(?:,\d+)? @@', line)
             if match:
@@ -70,40 +256,29 @@ def parse_diff(diff_text: str) -> List[File]:
                 current_chunk.source_start = 1
                 current_chunk.target_start = 1
                 target_line_number = 1
+        elif builder and not builder.chunk:
+            builder.classify(line)
         #Adding Changes to Chunk
-        elif current_chunk and current_file and not in_binary_file:
-            current_chunk.content += "\n" + line
-
+        elif builder and builder.chunk and not in_binary_file:
             if line.startswith(" ") or line.startswith("+"):
-                change = Change(content=line, line_number=target_line_number)
-                current_chunk.changes.append(change)
-                current_chunk.formatted_chunk.append(f"{target_line_number}{line}")
+                builder.add_line(line, target_line_number)
                 target_line_number += 1
             elif line.startswith("-"):
-                change = Change(content=line)
-                current_chunk.changes.append(change)
-                current_chunk.formatted_chunk.append(f"{line}")
-
-        line_index += 1
-
-    if current_file:
-        if current_chunk:
-            current_file.chunks.append(current_chunk)
-        files.append(current_file)
+                builder.add_line(line)
+            else:
+                builder.add_line(line, is_change=False)
 
-    files = [f for f in files if f.to_file]
+    if builder:
+        current_file = builder.finish()
+        if builder.is_reviewable():
+            file_count += 1
+            yield current_file
+        else:
+            dropped_count += 1
 
-    # Assign diff positions
-    for file in files:
-        position_counter = 0
-        for chunk in file.chunks:
-            position_counter += 1
-            for change in chunk.changes:
-                position_counter += 1
-                change.diff_position = position_counter
+    log.debug(f"Diff parsing complete. Found {file_count} files, excluded {skipped_count}, "
+              f"dropped {dropped_count} deleted/renamed/mode-only/binary files.")
 
-    log.debug(f"Diff parsing complete. Found {len(files)} files.")
-    for file in files:
-        log.debug(f"File: {normalize_file_path(file.to_file)} with {len(file.chunks)} chunks")
 
-    return files
+def parse_diff(diff_text: str) -> List[File]:
+    return list(iter_parse_diff(_iter_text_lines(diff_text)))
@@ -0,0 +1,93 @@
+# utils/github_utils/review_body.py
+import re
+from typing import Any, Dict, List, Optional
+
+DEFAULT_REVIEW_BODY = "Code review by OpenAI"
+# Hidden marker recording the head SHA a review covered, read back by the next incremental run
+HEAD_MARKER_RE = re.compile(r"<!-- ai-reviewer:reviewed-head=([0-9a-f]{7,40}) -->")
+
+
+def format_head_marker(head_sha: str) -> str:
+    return f"<!-- ai-reviewer:reviewed-head={head_sha} -->"
+
+
+def find_head_marker(body: Optional[str]) -> Optional[str]:
+    match = HEAD_MARKER_RE.search(body or "")
+    return match.group(1) if match else None
+
+
+def format_skipped_files(skipped_files: List[Dict[str, Any]]) -> str:
+    if not skipped_files:
+        return ""
+    hunks = sum(f.get("hunks", 0) for f in skipped_files)
+    lines = [f"Skipped {len(skipped_files)} generated, vendored or minified files "
+             f"({hunks} hunks not sent for review):"]
+    lines.extend(f"- `{f['path']}`: {f['reason']}" for f in skipped_files)
+    return "\n".join(lines)
+
+
+def format_budget_skipped(skipped: List[Dict[str, Any]]) -> str:
+    if not skipped:
+        return ""
+    lines = [f"The review budget for this PR was reached; {len(skipped)} hunks were not reviewed:"]
+    lines.extend(f"- `{s['path']}` line {s['line']}" for s in skipped)
+    return "\n".join(lines)
+
+
+def format_deadline_uncovered(uncovered: Dict[str, int]) -> str:
+    if not uncovered:
+        return ""
+    lines = [f"The review ran out of time; {sum(uncovered.values())} hunks in these files were not reviewed:"]
+    lines.extend(f"- `{path}` ({hunks} hunks)" for path, hunks in uncovered.items())
+    return "\n".join(lines)
+
+
+def format_rate_limited(unreviewed: Dict[str, int]) -> str:
+    if not unreviewed:
+        return ""
+    lines = [f"The LLM provider kept rate limiting the review; {sum(unreviewed.values())} hunks in these files "
+             f"were not reviewed:"]
+    lines.extend(f"- `{path}` ({hunks} hunks)" for path, hunks in unreviewed.items())
+    return "\n".join(lines)
+
+
+def format_review_body(head_sha: Optional[str], skipped_files: List[Dict[str, Any]] = (),
+                       budget_skipped: List[Dict[str, Any]] = (), deadline_uncovered: Optional[Dict[str, int]] = None,
+                       incremental_base_sha: Optional[str] = None, missing_shards: List[int] = (),
+                       rate_limited: Optional[Dict[str, int]] = None) -> str:
+    """Builds the summary text posted with the PR review."""
+    sections = [DEFAULT_REVIEW_BODY]
+
+    for section in (format_skipped_files(skipped_files), format_budget_skipped(budget_skipped),
+                    format_deadline_uncovered(deadline_uncovered or {}), format_rate_limited(rate_limited or {})):
+        if section:
+            sections.append(section)
+
+    if missing_shards:
+        shards = ", ".join(str(index) for index in missing_shards)
+        label = "shard" if len(missing_shards) == 1 else "shards"
+        sections.append(f"Review {label} {shards} did not report; the files assigned to them were not reviewed.")
+
+    if incremental_base_sha:
+        sections.append(f"Incremental review of the changes since `{incremental_base_sha[:12]}`.")
+
+    # Hunks left unreviewed keep the head unmarked, so the next incremental run still covers them
+    if head_sha and not budget_skipped and not deadline_uncovered and not rate_limited:
+        sections.append(format_head_marker(head_sha))
+
+    return "\n\n".join(sections)
+
+
+def build_review_body(state, rate_limited: Optional[Dict[str, int]] = None) -> str:
+    """
+    Builds the summary text posted with the PR review from the final graph state and the hunks,
+    per file, the LLM provider's rate limits left unreviewed.
+    """
+    return format_review_body(
+        state.pr_details.head_sha,
+        skipped_files=state.skipped_files,
+        budget_skipped=state.review_budget.skipped if state.review_budget is not None else [],
+        deadline_uncovered=state.review_deadline.uncovered if state.review_deadline is not None else {},
+        incremental_base_sha=state.incremental_base_sha,
+        rate_limited=rate_limited,
+    )
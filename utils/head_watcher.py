@@ -0,0 +1,74 @@
+# utils/head_watcher.py
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from services.git_services.get_pr_details import PRDetails, get_head_sha
+from utils.logger import get_logger
+
+log = get_logger()
+
+
+class HeadWatcher:
+    """
+    Notices a newer push to the PR while it is being reviewed, so the run stops instead of posting
+    a review of a stale head.
+
+    The head is fetched at most once every ``interval`` seconds, by whichever chunk asks first;
+    the other chunks get the last answer without an API call. A failed fetch counts as not
+    superseded, and once superseded the answer no longer changes.
+    """
+
+    def __init__(self, head_sha: str, fetch_head: Callable[[], str], interval: float, clock=time.monotonic):
+        self.head_sha = head_sha
+        self.fetch_head = fetch_head
+        self.interval = interval
+        self.clock = clock
+        self.latest_sha: Optional[str] = None
+        self.fetches = 0
+        self.skipped = 0
+        # The head was just read with the PR details
+        self._checked_at = clock()
+        self._fetch_lock = threading.Lock()
+        self._skip_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, pr_details: PRDetails) -> Optional["HeadWatcher"]:
+        interval = float(os.getenv("SUPERSEDE_CHECK_INTERVAL", "30"))
+        if interval <= 0 or not pr_details.head_sha:
+            return None
+        return cls(pr_details.head_sha, lambda: get_head_sha(pr_details), interval)
+
+    def superseded(self) -> bool:
+        if self.latest_sha is not None:
+            return True
+        if self.clock() - self._checked_at < self.interval:
+            return False
+        if not self._fetch_lock.acquire(blocking=False):
+            # Another chunk is fetching right now
+            return False
+        try:
+            if self.clock() - self._checked_at < self.interval:
+                return self.latest_sha is not None
+            self._checked_at = self.clock()
+            self.fetches += 1
+            try:
+                head_sha = self.fetch_head()
+            except Exception as e:
+                log.warning(f"Could not check the PR head, continuing the review: {e}")
+                return False
+            if head_sha and head_sha != self.head_sha:
+                log.info(f"PR head moved from {self.head_sha[:12]} to {head_sha[:12]}, stopping this review")
+                self.latest_sha = head_sha
+        finally:
+            self._fetch_lock.release()
+        return self.latest_sha is not None
+
+    def skip(self) -> None:
+        with self._skip_lock:
+            self.skipped += 1
+
+    def stats(self) -> str:
+        state = f"superseded by {self.latest_sha[:12]}" if self.latest_sha else "current"
+        return f"head {state}, {self.fetches} checks, {self.skipped} hunks not reviewed"
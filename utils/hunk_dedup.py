@@ -0,0 +1,87 @@
+# utils/hunk_dedup.py
+import hashlib
+import keyword
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from States.state import Chunk, ReviewComment, ReviewResponse
+from utils.logger import get_logger
+
+log = get_logger()
+
+IDENTIFIER_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+KEYWORDS = frozenset(keyword.kwlist)
+
+
+def _mask_identifiers(text: str, names: Dict[str, str]) -> str:
+    """Renames identifiers to placeholders in order of first appearance, leaving keywords alone."""
+    def rename(match):
+        word = match.group(0)
+        if word in KEYWORDS:
+            return word
+        return names.setdefault(word, f"v{len(names)}")
+    return IDENTIFIER_RE.sub(rename, text)
+
+
+def hunk_fingerprint(chunk: Chunk, file_path: str, mask_identifiers: bool = False) -> str:
+    """
+    Fingerprint of a hunk that ignores where it is: line numbers are dropped and whitespace is
+    collapsed. With ``mask_identifiers`` names are replaced consistently, so hunks that only
+    differ in identifiers (e.g. a rename applied to many files) share a fingerprint.
+    """
+    digest = hashlib.sha256(os.path.splitext(file_path)[1].lower().encode())
+    names: Dict[str, str] = {}
+    for index in range(len(chunk.line_starts)):
+        text = " ".join(chunk.line_text(index).split())
+        if chunk.member_paths:
+            text = os.path.splitext(chunk.line_path(index))[1] + text
+        if mask_identifiers:
+            text = _mask_identifiers(text, names)
+        digest.update(f"\0{text}".encode())
+    return digest.hexdigest()
+
+
+class HunkDeduplicator:
+    """
+    Groups the hunks of one PR by fingerprint as they are reached: the first hunk of a group is
+    reviewed and its comments are projected onto the matching lines of every later member.
+    """
+
+    def __init__(self, mask_identifiers: bool = False):
+        self.mask_identifiers = mask_identifiers
+        # fingerprint -> (line index of each comment of the reviewed hunk, comment text)
+        self._reviewed: Dict[str, List[Tuple[int, str]]] = {}
+        self.reviewed_groups = 0
+        self.projected_hunks = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["HunkDeduplicator"]:
+        if os.getenv("DEDUP_HUNKS", "true").lower() == "false":
+            return None
+        return cls(mask_identifiers=os.getenv("DEDUP_MASK_IDENTIFIERS", "false").lower() == "true")
+
+    def fingerprint(self, chunk: Chunk, file_path: str) -> str:
+        return hunk_fingerprint(chunk, file_path, self.mask_identifiers)
+
+    def lookup(self, fingerprint: str, chunk: Chunk) -> Optional[ReviewResponse]:
+        """The group's review projected onto ``chunk``, or None if the group was not reviewed yet."""
+        reviewed = self._reviewed.get(fingerprint)
+        if reviewed is None:
+            return None
+        # Members have the same lines in the same order, so lines map by index
+        reviews = [ReviewComment(lineNumber=chunk.line_numbers[index], filePath=chunk.line_path(index),
+                                 reviewComment=body)
+                   for index, body in reviewed if index < len(chunk.line_numbers)]
+        self.projected_hunks += 1
+        return ReviewResponse(reviews=reviews)
+
+    def record(self, fingerprint: str, chunk: Chunk, response: ReviewResponse) -> None:
+        if fingerprint not in self._reviewed:
+            indexed = [(chunk.index_of(review.lineNumber, review.filePath), review.reviewComment)
+                       for review in response.reviews]
+            self._reviewed[fingerprint] = [(index, body) for index, body in indexed if index is not None]
+            self.reviewed_groups += 1
+
+    def stats(self) -> str:
+        return f"{self.reviewed_groups} hunk groups reviewed, {self.projected_hunks} duplicate hunks reused their review"
@@ -0,0 +1,122 @@
+# utils/hunk_packer.py
+import os
+from array import array
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from States.state import Change, Chunk, File, ReviewResponse
+from utils.logger import get_logger
+from utils.path_utils import normalize_file_path
+
+log = get_logger()
+
+# Rough characters per token, good enough to fill a budget without a tokenizer
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(chunk: Chunk) -> int:
+    return sum(len(line) + 1 for line in chunk.formatted_chunk) // CHARS_PER_TOKEN + 1
+
+
+def pack_chunks(members: List[Tuple[str, Chunk]]) -> Chunk:
+    """Packs small hunks into one chunk whose lines remember the hunk (and path) they came from."""
+    paths: List[str] = []
+    changes: List[Change] = []
+    line_members = array("I")
+    for path, chunk in members:
+        paths.append(path)
+        for change in chunk.iter_changes():
+            changes.append(change)
+            line_members.append(len(paths) - 1)
+    first = members[0][1]
+    packed = Chunk(
+        content="\n".join(f"=== {path} ===\n{chunk.content}" for path, chunk in members),
+        changes=changes,
+        source_start=first.source_start,
+        target_start=first.target_start,
+    )
+    packed.member_paths = paths
+    packed.member_chunks = [chunk for _, chunk in members]
+    packed.line_members = line_members
+    return packed
+
+
+def split_packed_review(chunk: Chunk, response: ReviewResponse) -> List[Tuple[str, Chunk, ReviewResponse]]:
+    """
+    (path, hunk, review) of every member of a packed chunk, its review holding the comments on
+    its lines, so each hunk can be cached and deduplicated on its own.
+    """
+    per_member = [[] for _ in chunk.member_chunks]
+    for review in response.reviews:
+        index = chunk.index_of(review.lineNumber, review.filePath)
+        if index is not None:
+            per_member[chunk.line_members[index]].append(review.model_copy(update={"filePath": None}))
+    return [(path, member, ReviewResponse(reviews=reviews))
+            for path, member, reviews in zip(chunk.member_paths, chunk.member_chunks, per_member)]
+
+
+def iter_pack_small_hunks(files: Iterable[File],
+                          has_review: Optional[Callable[[str, Chunk], bool]] = None) -> Iterator[File]:
+    """
+    Collects hunks of at most PACK_MAX_HUNK_LINES lines, within and across files, into packed
+    chunks of up to PACK_TOKEN_BUDGET estimated tokens so they share one reviewer prompt.
+
+    Larger hunks stay in their file, and so do those ``has_review`` says already have a review
+    to reuse (cached, or of an identical hunk earlier in the PR): packed, their review would
+    depend on their neighbours. A file holding such a hunk comes after the pending pack, so the
+    hunk it duplicates is reviewed first. Packs are yielded as extra files holding one packed
+    chunk, named after their first hunk's file. Disabled by PACK_HUNKS=false.
+    """
+    if os.getenv("PACK_HUNKS", "true").lower() == "false":
+        yield from files
+        return
+    max_hunk_lines = int(os.getenv("PACK_MAX_HUNK_LINES", "20"))
+    token_budget = int(os.getenv("PACK_TOKEN_BUDGET", "1500"))
+
+    pending: List[Tuple[str, Chunk]] = []
+    pending_file: File = None
+    pending_tokens = 0
+    packed_hunks = packs = 0
+
+    def flush() -> Iterator[File]:
+        nonlocal pending, pending_tokens, packed_hunks, packs
+        if not pending:
+            return
+        chunk = pending[0][1] if len(pending) == 1 else pack_chunks(pending)
+        if len(pending) > 1:
+            packed_hunks += len(pending)
+            packs += 1
+        yield File(from_file=pending_file.from_file, to_file=pending_file.to_file,
+                   status=pending_file.status, chunks=[chunk])
+        pending, pending_tokens = [], 0
+
+    for file in files:
+        if file.skip_reason:
+            yield file
+            continue
+        path = normalize_file_path(file.to_file)
+        kept = []
+        reuses_review = False
+        for chunk in file.chunks:
+            if has_review is not None and has_review(path, chunk):
+                kept.append(chunk)
+                reuses_review = True
+                continue
+            if len(chunk.line_starts) > max_hunk_lines:
+                kept.append(chunk)
+                continue
+            tokens = estimate_tokens(chunk)
+            if pending and pending_tokens + tokens > token_budget:
+                yield from flush()
+            if not pending:
+                pending_file = file
+            pending.append((path, chunk))
+            pending_tokens += tokens
+        if kept:
+            if reuses_review:
+                yield from flush()
+            file.chunks = kept
+            yield file
+    yield from flush()
+
+    if packs:
+        log.info(f"Packed {packed_hunks} small hunks into {packs} reviewer prompts")
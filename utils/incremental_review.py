@@ -0,0 +1,156 @@
+# utils/incremental_review.py
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from States.state import File
+from utils.logger import get_logger
+from utils.path_utils import normalize_file_path
+
+log = get_logger()
+
+HUNK_HEADER_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+# How far from its old position a comment on moved code is still recognised by its line text
+MOVED_COMMENT_WINDOW = 20
+
+
+class FileDelta:
+    """What changed in one file between the last reviewed commit and the new head."""
+
+    def __init__(self, old_path: Optional[str] = None):
+        self.old_path = old_path
+        # (old_start, old_length, new_start, new_length) per hunk, in order
+        self.hunks: List[Tuple[int, int, int, int]] = []
+        self.added_lines = set()
+        self.removed_lines = set()
+        # Old -> new line numbers of the context lines inside the hunks
+        self.context_lines: Dict[int, int] = {}
+
+    def map_line(self, old_line: int) -> Optional[int]:
+        """Maps a line of the last reviewed commit to the new head, or None if it was removed."""
+        if old_line in self.removed_lines:
+            return None
+        if old_line in self.context_lines:
+            return self.context_lines[old_line]
+        shift = 0
+        for old_start, old_length, new_start, new_length in self.hunks:
+            if old_start + old_length > old_line:
+                break
+            shift = (new_start + new_length) - (old_start + old_length)
+        return old_line + shift
+
+
+class IncrementalScope:
+    """
+    The interdiff between the last reviewed head and the current head.
+
+    Narrows the PR's files to the hunks that add lines touched since the last review and maps
+    lines of earlier review comments onto the new head so they are not repeated.
+    """
+
+    def __init__(self, base_sha: str, head_sha: str, files: Optional[Dict[str, FileDelta]] = None):
+        self.base_sha = base_sha
+        self.head_sha = head_sha
+        self.files = files or {}
+        self._renamed = {delta.old_path: path for path, delta in self.files.items() if delta.old_path}
+
+    @classmethod
+    def from_diff_lines(cls, lines: Iterable[str], base_sha: str, head_sha: str) -> "IncrementalScope":
+        files: Dict[str, FileDelta] = {}
+        delta = None
+        old_path = None
+        old_line = new_line = 0
+        for line in lines:
+            if line.startswith("diff --git "):
+                delta, old_path = None, None
+            elif line.startswith("--- ") and delta is None:
+                old_path = normalize_file_path(line[4:].split("\t")[0])
+            elif line.startswith("+++ ") and delta is None:
+                path = normalize_file_path(line[4:].split("\t")[0])
+                if path == "/dev/null":
+                    continue
+                renamed_from = old_path if old_path not in (None, "/dev/null", path) else None
+                delta = files[path] = FileDelta(renamed_from)
+            elif delta is None:
+                continue
+            elif line.startswith("@@"):
+                match = HUNK_HEADER_RE.match(line)
+                if not match:
+                    continue
+                old_line, new_line = int(match.group(1)), int(match.group(3))
+                old_length = int(match.group(2)) if match.group(2) is not None else 1
+                new_length = int(match.group(4)) if match.group(4) is not None else 1
+                # An empty side names the line before the hunk; normalize to the line after it
+                old_line += old_length == 0
+                new_line += new_length == 0
+                delta.hunks.append((old_line, old_length, new_line, new_length))
+            elif line.startswith("+"):
+                delta.added_lines.add(new_line)
+                new_line += 1
+            elif line.startswith("-"):
+                delta.removed_lines.add(old_line)
+                old_line += 1
+            elif line.startswith(" ") or line == "":
+                delta.context_lines[old_line] = new_line
+                old_line += 1
+                new_line += 1
+        return cls(base_sha, head_sha, files)
+
+    def map_line(self, path: str, line: int) -> Tuple[str, Optional[int]]:
+        """Maps ``path:line`` at the last reviewed head onto the new head."""
+        path = self._renamed.get(path, path)
+        delta = self.files.get(path)
+        if delta is None:
+            return path, line
+        return path, delta.map_line(line)
+
+    def iter_filter_files(self, files: Iterable[File]) -> Iterator[File]:
+        """Yields only the files, and of those only the chunks, with lines added since the last review."""
+        unchanged_files = dropped_chunks = 0
+        for file in files:
+            delta = self.files.get(normalize_file_path(file.to_file))
+            if delta is None or not delta.added_lines:
+                unchanged_files += 1
+                continue
+            kept = []
+            for chunk in file.chunks:
+                if any(chunk.line_numbers[i] in delta.added_lines and chunk.line_text(i).startswith("+")
+                       for i in range(len(chunk.line_starts))):
+                    kept.append(chunk)
+            dropped_chunks += len(file.chunks) - len(kept)
+            if not kept:
+                unchanged_files += 1
+                continue
+            file.chunks = kept
+            yield file
+        log.info(f"Incremental review since {self.base_sha[:12]}: skipped {unchanged_files} unchanged files "
+                 f"and {dropped_chunks} unchanged hunks")
+
+
+def is_duplicate_comment(path: str, line: int, line_text: str, previous_comments: List[Dict[str, Any]]) -> bool:
+    """
+    True when an earlier review already commented on this line.
+
+    A previous comment matches on the line it maps to in the new head. One whose line no longer
+    exists there (the code moved or was rewritten) also matches the same line text in the same
+    file within ``MOVED_COMMENT_WINDOW`` lines of where it was, so common lines such as ``}`` or
+    ``return None`` elsewhere in the file are still reviewed.
+    """
+    text = line_text.strip()
+    for previous in previous_comments:
+        if previous["path"] != path:
+            continue
+        if previous.get("line") == line:
+            return True
+        if previous.get("line") is not None or not text or previous.get("text", "").strip() != text:
+            continue
+        original_line = previous.get("original_line")
+        if original_line is not None and abs(original_line - line) <= MOVED_COMMENT_WINDOW:
+            return True
+    return False
+
+
+def comment_line_text(diff_hunk: str) -> str:
+    """The commented line is the last line of a review comment's ``diff_hunk``."""
+    lines = (diff_hunk or "").rstrip("\n").split("\n")
+    last = lines[-1] if lines else ""
+    return last[1:] if last[:1] in ("+", "-", " ") else last
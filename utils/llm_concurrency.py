@@ -0,0 +1,18 @@
+# utils/llm_concurrency.py
+import asyncio
+import os
+import weakref
+
+# Upper bound on LLM calls in flight at once in the async pipeline
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def llm_slot() -> asyncio.Semaphore:
+    """The semaphore capping concurrent LLM calls on the running event loop; use as ``async with llm_slot():``."""
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(LLM_CONCURRENCY)
+    return semaphore
@@ -1,13 +1,13 @@
 import logging
 import sys
 import os
-import inspect
 from dotenv import load_dotenv
 
-load_dotenv()  # Load .env if present
+load_dotenv()  # Load .env if present; every module imports the logger first, so this is the only place
 
 def get_logger() -> logging.Logger:
-    caller = inspect.stack()[1].frame.f_globals["__name__"]
+    # Not inspect.stack(), which reads the source lines of every frame on the stack
+    caller = sys._getframe(1).f_globals["__name__"]
     logger = logging.getLogger(caller)
 
     if not logger.handlers:
@@ -0,0 +1,75 @@
+# utils/model_cascade.py
+import os
+import threading
+from typing import Dict, Optional
+
+from States.state import Chunk, ReviewFeedback, ReviewResponse
+from llm_config import llm_settings, role_stats
+from utils.logger import get_logger
+from utils.risk_scorer import score_chunk
+
+log = get_logger()
+
+
+class ModelCascade:
+    """
+    Reviews hunks with a cheap model first and escalates to the configured one only when needed.
+
+    A hunk below ``risk_threshold`` (see ``utils.risk_scorer``) gets one review and one feedback
+    check from the cheap model. It is escalated to the full reviewer/feedback loop when that review
+    flags issues, the check is not satisfied or less confident than ``min_confidence``, or the
+    cheap review failed; otherwise the cheap review (no comments) is accepted. Hunks at or above
+    the threshold start with the full model.
+    """
+
+    def __init__(self, risk_threshold: float, min_confidence: float):
+        self.risk_threshold = risk_threshold
+        self.min_confidence = min_confidence
+        self.started = {"cheap": 0, "full": 0}
+        self.escalations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional["ModelCascade"]:
+        if not os.getenv("CASCADE_MODEL_NAME"):
+            return None
+        return cls(float(os.getenv("CASCADE_RISK_THRESHOLD", "6")), float(os.getenv("CASCADE_MIN_CONFIDENCE", "0.7")))
+
+    def start_tier(self, path: str, chunk: Chunk) -> str:
+        tier = "cheap" if score_chunk(path, chunk) < self.risk_threshold else "full"
+        with self._lock:
+            self.started[tier] += 1
+        return tier
+
+    def escalation_reason(self, review: Optional[ReviewResponse], feedback: ReviewFeedback) -> Optional[str]:
+        """Why the cheap review of a hunk is not accepted, or None to accept it."""
+        if review is not None and review.reviews:
+            return "issues flagged"
+        if not feedback.satisfied:
+            return "feedback not satisfied"
+        if feedback.confidence is not None and feedback.confidence < self.min_confidence:
+            return "low confidence"
+        return None
+
+    def escalated(self, reason: str) -> None:
+        with self._lock:
+            self.escalations[reason] = self.escalations.get(reason, 0) + 1
+
+    def stats(self) -> str:
+        calls = role_stats()
+        cheap = calls.get("cascade", {"calls": 0, "seconds": 0.0})
+        full = {"calls": 0, "seconds": 0.0}
+        for role, counts in calls.items():
+            if role != "cascade":
+                full["calls"] += counts["calls"]
+                full["seconds"] += counts["seconds"]
+
+        def tier(name: str, counts: Dict[str, float], settings) -> str:
+            average = counts["seconds"] / counts["calls"] if counts["calls"] else 0.0
+            return (f"{name} tier ({settings[1]}): {self.started[name]} hunks started, {counts['calls']} calls, "
+                    f"{counts['seconds']:.1f}s ({average:.2f}s per call)")
+
+        escalated = sum(self.escalations.values())
+        reasons = ", ".join(f"{reason}: {count}" for reason, count in self.escalations.items()) or "none"
+        return (f"{tier('cheap', cheap, llm_settings('cascade'))}; {tier('full', full, llm_settings('reviewer'))}; "
+                f"{escalated} escalated ({reasons})")
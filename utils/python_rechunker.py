@@ -0,0 +1,154 @@
+# utils/python_rechunker.py
+import ast
+import os
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from States.state import Change, Chunk, File
+from utils.logger import get_logger
+from utils.path_utils import normalize_file_path
+
+log = get_logger()
+
+Range = Tuple[int, int]
+
+
+def _max_chunk_lines() -> int:
+    return int(os.getenv("RECHUNK_MAX_LINES", "200"))
+
+
+def _max_merge_gap() -> int:
+    return int(os.getenv("RECHUNK_MAX_GAP", "40"))
+
+
+def definition_ranges(source: str) -> Optional[List[Range]]:
+    """(first line, last line) of every function and class, decorators included; None if it does not parse."""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+    ranges = []
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            start = min([node.lineno] + [decorator.lineno for decorator in node.decorator_list])
+            ranges.append((start, node.end_lineno))
+    return sorted(ranges)
+
+
+def _innermost(ranges: List[Range], line: int) -> Optional[Range]:
+    enclosing = [r for r in ranges if r[0] <= line <= r[1]]
+    return min(enclosing, key=lambda r: r[1] - r[0]) if enclosing else None
+
+
+def _first_line(chunk: Chunk) -> int:
+    return next((n for n in chunk.line_numbers if n), chunk.target_start)
+
+
+def _last_line(chunk: Chunk) -> int:
+    return max(chunk.line_numbers, default=0) or chunk.target_start
+
+
+def _has_additions(chunk: Chunk, start: int, end: int) -> bool:
+    return any(chunk.buffer.startswith("+", chunk.line_starts[i]) for i in range(start, end))
+
+
+def merge_chunks(first: Chunk, second: Chunk, source_lines: List[str]) -> Chunk:
+    """One chunk covering both hunks and the unchanged lines between them, taken from the new file."""
+    gap = [Change(content=f" {source_lines[number - 1]}", line_number=number)
+           for number in range(_last_line(first) + 1, _first_line(second))]
+    content = "\n".join([first.content] + [change.content for change in gap] + [second.content])
+    return Chunk(
+        content=content,
+        changes=first.changes + gap + second.changes,
+        guidelines=first.guidelines,
+        source_start=first.source_start,
+        target_start=first.target_start,
+    )
+
+
+def _slice_chunk(chunk: Chunk, start: int, end: int) -> Chunk:
+    """Lines ``start:end`` of ``chunk`` as a chunk sharing its buffer."""
+    return Chunk(
+        buffer=chunk.buffer,
+        start=chunk.start if start == 0 else chunk.line_starts[start],
+        end=chunk.line_ends[end - 1],
+        line_starts=chunk.line_starts[start:end],
+        line_ends=chunk.line_ends[start:end],
+        line_numbers=chunk.line_numbers[start:end],
+        diff_positions=chunk.diff_positions[start:end],
+        guidelines=chunk.guidelines,
+        source_start=chunk.source_start,
+        target_start=next((n for n in chunk.line_numbers[start:end] if n), chunk.target_start),
+    )
+
+
+def split_chunk(chunk: Chunk, ranges: List[Range], max_lines: int) -> List[Chunk]:
+    """Splits an oversized chunk before definitions; parts without added lines are dropped."""
+    if len(chunk.line_starts) <= max_lines:
+        return [chunk]
+    boundaries = {start for start, _ in ranges}
+    cuts = [0]
+    last_boundary = None
+    for index, number in enumerate(chunk.line_numbers):
+        if index > cuts[-1] and number in boundaries:
+            last_boundary = index
+        if index - cuts[-1] >= max_lines:
+            cuts.append(last_boundary if last_boundary and last_boundary > cuts[-1] else index)
+            last_boundary = None
+    cuts.append(len(chunk.line_starts))
+    return [_slice_chunk(chunk, start, end) for start, end in zip(cuts, cuts[1:])
+            if _has_additions(chunk, start, end)]
+
+
+def rechunk_python_file(file: File, source: str) -> bool:
+    """
+    Merges hunks that fall in the same function or class and splits oversized ones at definition
+    boundaries, using the new file ``source``. Returns False, leaving the file as is, if it does not parse.
+    """
+    ranges = definition_ranges(source)
+    if ranges is None:
+        return False
+    source_lines = source.splitlines()
+    max_lines = _max_chunk_lines()
+
+    merged: List[Chunk] = []
+    for chunk in file.chunks:
+        if merged:
+            previous = merged[-1]
+            scope = _innermost(ranges, _first_line(chunk))
+            gap = _first_line(chunk) - _last_line(previous) - 1
+            if (scope and scope[0] <= _last_line(previous) and 0 <= gap <= _max_merge_gap()
+                    and _first_line(chunk) - 1 <= len(source_lines)
+                    and len(previous.line_starts) + gap + len(chunk.line_starts) <= max_lines):
+                merged[-1] = merge_chunks(previous, chunk, source_lines)
+                continue
+        merged.append(chunk)
+
+    rechunked = [part for chunk in merged for part in split_chunk(chunk, ranges, max_lines)]
+    if len(rechunked) != len(file.chunks):
+        log.debug(f"Re-chunked {normalize_file_path(file.to_file)}: {len(file.chunks)} -> {len(rechunked)} chunks")
+    file.chunks = rechunked
+    return True
+
+
+def iter_rechunk_python_files(files: Iterable[File], load_source: Callable[[str], Optional[str]]) -> Iterator[File]:
+    """
+    Re-chunks ``.py`` files along function and class boundaries as they stream past.
+
+    The new file content is only fetched (via ``load_source``) for files with several hunks or
+    an oversized one. Disabled by RECHUNK_PYTHON=false.
+    """
+    enabled = os.getenv("RECHUNK_PYTHON", "true").lower() != "false"
+    max_lines = _max_chunk_lines()
+    before = after = 0
+    for file in files:
+        path = normalize_file_path(file.to_file)
+        if (enabled and not file.skip_reason and path.endswith(".py")
+                and (len(file.chunks) > 1 or any(len(c.line_starts) > max_lines for c in file.chunks))):
+            count = len(file.chunks)
+            source = load_source(path)
+            if source is not None and rechunk_python_file(file, source):
+                before += count
+                after += len(file.chunks)
+        yield file
+    if before:
+        log.info(f"Re-chunked Python files along definitions: {before} hunks -> {after} chunks")
@@ -0,0 +1,234 @@
+# utils/rate_limiter.py
+import asyncio
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from utils.logger import get_logger
+
+log = get_logger()
+
+# Completion tokens charged up front for a call; corrected by the usage reported on its response
+COMPLETION_TOKENS_ESTIMATE = 256
+MAX_BACKOFF_SECONDS = 60.0
+
+
+class RateLimitExceeded(Exception):
+    """The provider kept answering 429 after every retry."""
+
+
+class _Bucket:
+    """Token bucket refilled at ``per_minute / 60`` per second; reservations may run it negative."""
+
+    def __init__(self, per_minute: int, now: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Takes ``amount`` and returns the seconds until the bucket is back in credit."""
+        self._refill(now)
+        # A call bigger than the bucket only waits for a full one
+        self.level -= min(amount, self.capacity)
+        return max(0.0, -self.level / self.rate)
+
+    def charge(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level = min(self.capacity, self.level - amount)
+
+
+def rate_limit_delay(error: BaseException) -> Optional[float]:
+    """
+    None unless ``error`` is a provider's 429; otherwise the seconds its Retry-After header asks
+    for, or 0.0 when it sent none.
+    """
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    if status != 429 and type(error).__name__ not in ("RateLimitError", "ResourceExhausted", "TooManyRequests"):
+        return None
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        retry_after = headers.get("retry-after")
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        pass
+    return 0.0
+
+
+def estimate_tokens(prompt: Any) -> int:
+    """Rough token count of a prompt (value, message list or string): four characters a token."""
+    if hasattr(prompt, "to_string"):
+        text = prompt.to_string()
+    elif isinstance(prompt, list):
+        text = "".join(str(getattr(message, "content", message)) for message in prompt)
+    else:
+        text = str(prompt)
+    return len(text) // 4 + COMPLETION_TOKENS_ESTIMATE
+
+
+def response_tokens(response: Any) -> Optional[int]:
+    usage = getattr(response, "usage_metadata", None)
+    if usage and usage.get("total_tokens"):
+        return usage["total_tokens"]
+    token_usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+    return token_usage.get("total_tokens")
+
+
+class RateLimiter:
+    """
+    Process-wide limit on LLM requests and tokens per minute, shared by every chain and thread.
+
+    Each call reserves one request and its estimated tokens and waits until both buckets are in
+    credit; the estimate is corrected by the usage the response reports. A 429 pauses every caller
+    for the provider's Retry-After (or an exponential backoff) and the call is retried with jitter,
+    at most ``max_retries`` times, before ``RateLimitExceeded`` is raised.
+    """
+
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0, max_retries: int = 5,
+                 clock=time.monotonic):
+        self.clock = clock
+        now = clock()
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self._requests = _Bucket(requests_per_minute, now) if requests_per_minute > 0 else None
+        self._tokens = _Bucket(tokens_per_minute, now) if tokens_per_minute > 0 else None
+        self._paused_until = now
+        self._lock = threading.Lock()
+        # Counters for tuning REVIEW_CONCURRENCY/LLM_CONCURRENCY against the provider quota
+        self.calls = 0
+        self.tokens = 0
+        self.waits = 0
+        self.waited_seconds = 0.0
+        self.throttled = 0
+        self.retries = 0
+        self.failures = 0
+        # Hunks whose review failed on rate limits, per file, for the review summary
+        self.unreviewed: Dict[str, int] = {}
+
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        return cls(int(os.getenv("LLM_REQUESTS_PER_MINUTE", "0")), int(os.getenv("LLM_TOKENS_PER_MINUTE", "0")),
+                   int(os.getenv("LLM_RATE_LIMIT_RETRIES", "5")))
+
+    def reserve(self, tokens: int) -> float:
+        """Reserves a call of about ``tokens`` tokens; returns the seconds to wait before making it."""
+        with self._lock:
+            now = self.clock()
+            wait = self._paused_until - now
+            if self._requests is not None:
+                wait = max(wait, self._requests.reserve(1, now))
+            if self._tokens is not None:
+                wait = max(wait, self._tokens.reserve(tokens, now))
+            self.calls += 1
+            if wait > 0:
+                self.waits += 1
+                self.waited_seconds += wait
+            return max(0.0, wait)
+
+    def record(self, response: Any, estimated: int) -> None:
+        actual = response_tokens(response)
+        with self._lock:
+            self.tokens += actual if actual is not None else estimated
+            if actual is not None and self._tokens is not None:
+                self._tokens.charge(actual - estimated, self.clock())
+
+    def _throttled(self, error: BaseException, retry_after: float, attempt: int) -> float:
+        """Pauses every caller after a 429; returns this caller's delay before its retry."""
+        backoff = retry_after or min(MAX_BACKOFF_SECONDS, 2.0 ** attempt)
+        with self._lock:
+            self.throttled += 1
+            self._paused_until = max(self._paused_until, self.clock() + backoff)
+            if attempt >= self.max_retries:
+                self.failures += 1
+            else:
+                self.retries += 1
+        if attempt >= self.max_retries:
+            raise RateLimitExceeded(f"Rate limited after {attempt + 1} attempts: {error}") from error
+        log.warning(f"LLM rate limited, retrying in {backoff:.1f}s (attempt {attempt + 1}/{self.max_retries})")
+        # Jitter so the callers paused together do not all retry at the same instant
+        return random.uniform(0, min(backoff, MAX_BACKOFF_SECONDS) / 2)
+
+    def call(self, fn: Callable[[], Any], tokens: int) -> Any:
+        for attempt in range(self.max_retries + 1):
+            wait = self.reserve(tokens)
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                response = fn()
+            except Exception as error:
+                retry_after = rate_limit_delay(error)
+                if retry_after is None:
+                    raise
+                time.sleep(self._throttled(error, retry_after, attempt))
+                continue
+            self.record(response, tokens)
+            return response
+
+    async def acall(self, fn: Callable[[], Awaitable[Any]], tokens: int) -> Any:
+        for attempt in range(self.max_retries + 1):
+            wait = self.reserve(tokens)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                response = await fn()
+            except Exception as error:
+                retry_after = rate_limit_delay(error)
+                if retry_after is None:
+                    raise
+                await asyncio.sleep(self._throttled(error, retry_after, attempt))
+                continue
+            self.record(response, tokens)
+            return response
+
+    def skip(self, path: str) -> None:
+        with self._lock:
+            self.unreviewed[path] = self.unreviewed.get(path, 0) + 1
+
+    def counters(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self.calls, "tokens": self.tokens, "waits": self.waits,
+                "waited_seconds": round(self.waited_seconds, 1), "throttled": self.throttled,
+                "retries": self.retries, "failures": self.failures,
+            }
+
+    def stats(self) -> str:
+        counters = self.counters()
+        return (f"{counters['calls']} calls, {counters['tokens']} tokens, waited {counters['waited_seconds']}s "
+                f"in {counters['waits']} calls, {counters['throttled']} throttled, {counters['retries']} retried, "
+                f"{counters['failures']} failed (limits: {self.requests_per_minute or 'none'} requests, "
+                f"{self.tokens_per_minute or 'none'} tokens per minute)")
+
+
+@lru_cache(maxsize=None)
+def get_rate_limiter() -> RateLimiter:
+    """The process-wide limiter, configured from the environment on first use."""
+    return RateLimiter.from_env()
+
+
+def share_rate_limits(process_count: int) -> None:
+    """
+    Gives this process its share of the configured limits when ``process_count`` processes use the
+    same key, e.g. the workers of local sharding, which would each allow the full quota otherwise.
+    """
+    for name in ("LLM_REQUESTS_PER_MINUTE", "LLM_TOKENS_PER_MINUTE"):
+        limit = int(os.getenv(name, "0"))
+        if limit > 0:
+            os.environ[name] = str(max(1, limit // process_count))
+    get_rate_limiter.cache_clear()
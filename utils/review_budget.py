@@ -0,0 +1,76 @@
+# utils/review_budget.py
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from States.state import Chunk
+from utils.logger import get_logger
+from utils.risk_scorer import score_chunk
+
+log = get_logger()
+
+
+class ReviewBudget(BaseCallbackHandler):
+    """
+    Per-PR limit on LLM tokens and requests.
+
+    Passed as a callback in the graph config, it counts every LLM request and the token usage
+    reported on its response. Once a limit is reached no further chunk is started; chunks
+    already in their review loop finish. Skipped chunks are kept for the review summary.
+    """
+
+    def __init__(self, max_tokens: int = 0, max_requests: int = 0):
+        super().__init__()
+        self.max_tokens = max_tokens
+        self.max_requests = max_requests
+        self.tokens = 0
+        self.requests = 0
+        self.skipped: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional["ReviewBudget"]:
+        max_tokens = int(os.getenv("REVIEW_TOKEN_BUDGET", "0"))
+        max_requests = int(os.getenv("REVIEW_REQUEST_BUDGET", "0"))
+        if max_tokens <= 0 and max_requests <= 0:
+            return None
+        return cls(max_tokens, max_requests)
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], **kwargs: Any) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], **kwargs: Any) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    tokens += usage.get("total_tokens", 0)
+        if not tokens:
+            tokens = ((response.llm_output or {}).get("token_usage") or {}).get("total_tokens", 0)
+        with self._lock:
+            self.tokens += tokens
+
+    def exhausted(self) -> bool:
+        return ((self.max_tokens > 0 and self.tokens >= self.max_tokens)
+                or (self.max_requests > 0 and self.requests >= self.max_requests))
+
+    def skip(self, path: str, chunk: Chunk) -> None:
+        # First added line, so the summary points at the change rather than its context
+        line = next((chunk.line_numbers[index] for index in range(len(chunk.line_starts))
+                     if chunk.line_text(index).startswith("+")), chunk.target_start)
+        with self._lock:
+            self.skipped.append({"path": path, "line": line, "score": score_chunk(path, chunk)})
+
+    def stats(self) -> str:
+        return (f"{self.tokens} tokens / {self.max_tokens or 'unlimited'}, "
+                f"{self.requests} requests / {self.max_requests or 'unlimited'}, "
+                f"{len(self.skipped)} chunks skipped")
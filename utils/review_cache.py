@@ -0,0 +1,137 @@
+# utils/review_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from States.state import Chunk, ReviewComment, ReviewResponse
+from llm_config import llm_settings
+from utils.logger import get_logger
+
+log = get_logger()
+
+# Bump whenever the reviewer or feedback prompts change so old results are not reused
+REVIEW_PROMPT_VERSION = "3"
+
+
+def guideline_settings(guidelines_store) -> str:
+    """The guideline source, part of every cache key: reviews made with other guidelines differ."""
+    return "vectorstore" if guidelines_store is not None else "none"
+
+
+class ReviewCache:
+    """
+    Persistent SQLite cache of final review responses keyed by a hash of the hunk and review settings.
+
+    Comments are stored against the index of their line in the hunk, so a hit on the same hunk
+    at another position (rerun, rebase, cherry-pick) is rebased onto the new lines.
+    Entries expire after ``ttl_seconds``; beyond ``max_entries`` the least recently used go first.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float, max_entries: int):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS reviews ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS reviews_last_used ON reviews (last_used)")
+        self._db.commit()
+        self.evict()
+
+    @classmethod
+    def from_env(cls) -> Optional["ReviewCache"]:
+        path = os.getenv("REVIEW_CACHE_PATH", "")
+        if not path:
+            return None
+        ttl_seconds = float(os.getenv("REVIEW_CACHE_TTL_DAYS", "30")) * 24 * 3600
+        max_entries = int(os.getenv("REVIEW_CACHE_MAX_ENTRIES", "50000"))
+        return cls(path, ttl_seconds, max_entries)
+
+    @staticmethod
+    def key(chunk: Chunk, file_path: str, settings: str = "") -> str:
+        """
+        Hashes the hunk with line numbers made relative and trailing whitespace dropped, plus the
+        file type, model, temperature, loop limit, prompt version and ``settings``.
+        """
+        digest = hashlib.sha256()
+        digest.update(REVIEW_PROMPT_VERSION.encode())
+        reviewer = llm_settings("reviewer")
+        for value in (*reviewer, os.getenv("MAX_LOOP", "2")):
+            digest.update(f"\0{str(value).lower()}".encode())
+        feedback = llm_settings("feedback")
+        if feedback != reviewer:
+            digest.update(f"\0{feedback}".encode())
+        if os.getenv("CASCADE_MODEL_NAME"):
+            digest.update(f"\0{llm_settings('cascade')}\0{os.getenv('CASCADE_RISK_THRESHOLD', '6')}"
+                          f"\0{os.getenv('CASCADE_MIN_CONFIDENCE', '0.7')}".encode())
+        digest.update(f"\0{os.path.splitext(file_path)[1].lower()}\0{settings}\0".encode())
+        for index in range(len(chunk.line_starts)):
+            line_number = chunk.line_numbers[index]
+            offset = line_number - chunk.target_start if line_number else ""
+            member = os.path.splitext(chunk.line_path(index) or "")[1]
+            digest.update(f"{member}{offset}{chunk.line_text(index).rstrip()}\n".encode())
+        return digest.hexdigest()
+
+    def contains(self, key: str) -> bool:
+        """Whether ``key`` has an unexpired entry; unlike ``get`` it is not counted as a hit or miss."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT 1 FROM reviews WHERE key = ? AND created > ?", (key, time.time() - self.ttl_seconds)
+            ).fetchone()
+        return row is not None
+
+    def get(self, key: str, chunk: Chunk) -> Optional[ReviewResponse]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT response FROM reviews WHERE key = ? AND created > ?", (key, now - self.ttl_seconds)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._db.execute("UPDATE reviews SET last_used = ? WHERE key = ?", (now, key))
+            self._db.commit()
+        reviews = [ReviewComment(lineNumber=chunk.line_numbers[index], filePath=chunk.line_path(index),
+                                 reviewComment=body)
+                   for index, body in json.loads(row[0]) if index < len(chunk.line_numbers)]
+        return ReviewResponse(reviews=reviews)
+
+    def put(self, key: str, chunk: Chunk, response: ReviewResponse) -> None:
+        # Comments on lines outside the hunk could not be placed anyway and are not kept
+        indexed = [(chunk.index_of(review.lineNumber, review.filePath), review.reviewComment)
+                   for review in response.reviews]
+        relative = [(index, body) for index, body in indexed if index is not None]
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO reviews (key, response, created, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(relative), now, now),
+            )
+            self._db.commit()
+
+    def evict(self) -> None:
+        """Drops expired entries, then the least recently used ones beyond ``max_entries``."""
+        with self._lock:
+            self._db.execute("DELETE FROM reviews WHERE created <= ?", (time.time() - self.ttl_seconds,))
+            self._db.execute(
+                "DELETE FROM reviews WHERE key NOT IN (SELECT key FROM reviews ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            self._db.commit()
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        rate = f"{self.hits / total:.0%}" if total else "n/a"
+        return f"{self.hits} hits, {self.misses} misses (hit rate {rate})"
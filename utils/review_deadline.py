@@ -0,0 +1,49 @@
+# utils/review_deadline.py
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from States.state import Chunk
+from utils.logger import get_logger
+
+log = get_logger()
+
+
+class ReviewDeadline:
+    """
+    Wall-clock limit of one review, so comments are posted before the CI job is killed.
+
+    Once less than ``margin`` seconds are left no new chunk is sent to the LLM and the feedback
+    loop accepts the reviewer's current response; the margin covers the calls still in flight
+    and posting the review. Chunks not reviewed are counted per file for the review summary.
+    """
+
+    def __init__(self, seconds: float, margin: float, clock=time.monotonic):
+        self.clock = clock
+        self.expires_at = clock() + seconds
+        self.margin = margin
+        self.uncovered: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional["ReviewDeadline"]:
+        seconds = float(os.getenv("REVIEW_DEADLINE", "0"))
+        if seconds <= 0:
+            return None
+        margin = float(os.getenv("REVIEW_DEADLINE_MARGIN", "120"))
+        return cls(seconds, min(margin, seconds))
+
+    def remaining(self) -> float:
+        return self.expires_at - self.clock()
+
+    def near(self) -> bool:
+        return self.remaining() <= self.margin
+
+    def skip(self, path: str, chunk: Chunk) -> None:
+        with self._lock:
+            self.uncovered[path] = self.uncovered.get(path, 0) + 1
+
+    def stats(self) -> str:
+        hunks = sum(self.uncovered.values())
+        return f"{self.remaining():.0f}s left, {hunks} hunks in {len(self.uncovered)} files not reviewed"
@@ -0,0 +1,93 @@
+# utils/risk_scorer.py
+import math
+import os
+import re
+from typing import Iterable, List
+
+from States.state import Chunk, File
+from utils.file_filters import PathMatcher
+from utils.logger import get_logger
+from utils.path_utils import normalize_file_path
+
+log = get_logger()
+
+CODE_EXTENSIONS = {
+    ".py", ".js", ".jsx", ".ts", ".tsx", ".go", ".java", ".kt", ".scala", ".rb", ".php", ".c", ".h",
+    ".cc", ".cpp", ".hpp", ".cs", ".rs", ".swift", ".m", ".sh", ".bash", ".sql", ".pl", ".lua",
+}
+CONFIG_EXTENSIONS = {".yml", ".yaml", ".json", ".toml", ".ini", ".cfg", ".conf", ".tf", ".xml", ".gradle"}
+DOC_EXTENSIONS = {".md", ".rst", ".txt", ".adoc"}
+CONFIG_NAMES = {"dockerfile", "makefile", "jenkinsfile", "procfile"}
+
+TEST_PATH_PATTERNS = [
+    "test/", "tests/", "__tests__/", "spec/", "test_*.py", "*_test.py", "*_test.go",
+    "*.test.*", "*.spec.*", "conftest.py",
+]
+# Added lines touching these are where review finds the costly bugs
+SECURITY_KEYWORDS_RE = re.compile(
+    r"passw(or)?d|secret|token|api[_-]?key|credential|auth|crypt|hash|\beval\b|\bexec\b|subprocess|"
+    r"os\.system|shell\s*=\s*True|pickle|yaml\.load|deserializ|\bsql\b|execute\(|raw\(|permission|"
+    r"\bsudo\b|chmod|jwt|session|cookie|csrf|cors|ssl|verify\s*=\s*False|random|\.innerHTML|dangerously",
+    re.IGNORECASE,
+)
+
+_test_paths = PathMatcher(TEST_PATH_PATTERNS)
+
+
+def _type_weight(path: str) -> float:
+    name = os.path.basename(path).lower()
+    extension = os.path.splitext(name)[1]
+    if extension in CODE_EXTENSIONS:
+        return 1.0
+    if extension in CONFIG_EXTENSIONS or name in CONFIG_NAMES:
+        return 0.7
+    if extension in DOC_EXTENSIONS:
+        return 0.1
+    return 0.5
+
+
+def is_test_path(path: str) -> bool:
+    return not _test_paths.should_review(path)
+
+
+def score_chunk(path: str, chunk: Chunk) -> float:
+    """
+    Risk of a hunk from its file type, number of added lines and security-sensitive keywords on
+    them; tests weigh less than production code. Higher means review first.
+    """
+    keywords = set()
+    added = 0
+    for index in range(len(chunk.line_starts)):
+        text = chunk.line_text(index)
+        if not text.startswith("+"):
+            continue
+        added += 1
+        keywords.update(match.group(0).lower() for match in SECURITY_KEYWORDS_RE.finditer(text))
+    if chunk.member_paths:
+        # Packed chunk: score by its first hunk's file
+        path = chunk.member_paths[0]
+    score = _type_weight(path) * (1 + math.log1p(added)) * (1 + min(len(keywords), 5))
+    if is_test_path(path):
+        score *= 0.4
+    return round(score, 3)
+
+
+def prioritize_files(files: Iterable[File]) -> List[File]:
+    """
+    Reads all files and returns their chunks ordered by descending risk, one chunk per file entry,
+    so the review walks the riskiest hunks first. Skipped files come first, unchanged.
+    """
+    skipped, scored = [], []
+    for file in files:
+        if file.skip_reason:
+            skipped.append(file)
+            continue
+        path = normalize_file_path(file.to_file)
+        for chunk in file.chunks:
+            scored.append((score_chunk(path, chunk), len(scored), file, chunk))
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    log.info(f"Prioritized {len(scored)} chunks by risk")
+    return skipped + [
+        File(from_file=file.from_file, to_file=file.to_file, status=file.status, chunks=[chunk])
+        for _, _, file, chunk in scored
+    ]
@@ -0,0 +1,130 @@
+# utils/run_store.py
+import hashlib
+import re
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from uuid import uuid4
+
+from utils.logger import get_logger
+
+log = get_logger()
+
+
+class RunContext:
+    """
+    What one graph run reads but never checkpoints: the PR (with its PyGithub handle), the parsed
+    diff and its stream, the earlier AI comments, and the guideline store, review cache, dedup,
+    budget, deadline, head watcher and model cascade handles. ``ReviewState`` holds only the id it is registered under.
+    """
+
+    def __init__(self, pr_details: Any, files: Optional[List[Any]] = None, diff_stream: Optional[Iterator] = None,
+                 previous_comments: Optional[List[Dict[str, Any]]] = None, guidelines_store: Any = None,
+                 review_cache: Any = None, hunk_dedup: Any = None, review_budget: Any = None,
+                 review_deadline: Any = None, head_watcher: Any = None, model_cascade: Any = None,
+                 shard: Optional[Tuple[int, int]] = None):
+        self.pr_details = pr_details
+        self.files = files if files is not None else []
+        # Iterator of File objects still being parsed from the streamed diff; drained by get_next_chunk
+        self.diff_stream = diff_stream
+        self.previous_comments = previous_comments or []
+        self.guidelines_store = guidelines_store
+        self.review_cache = review_cache
+        self.hunk_dedup = hunk_dedup
+        self.review_budget = review_budget
+        self.review_deadline = review_deadline
+        self.head_watcher = head_watcher
+        self.model_cascade = model_cascade
+        # (index, count) when this run reviews one shard of the PR and hands its comments to a merge step
+        self.shard = shard
+        self._stream_lock = threading.Lock()
+        # Chunk key -> (file index, chunk index), built on the first lookup by key
+        self._chunk_positions: Optional[Dict[str, Tuple[int, int]]] = None
+        self._positions_lock = threading.Lock()
+
+    def has_file(self, index: int) -> bool:
+        """Pulls files from the diff stream until ``index`` is available or the stream is exhausted."""
+        with self._stream_lock:
+            while index >= len(self.files) and self.diff_stream is not None:
+                next_file = next(self.diff_stream, None)
+                if next_file is None:
+                    self.diff_stream = None
+                    break
+                self.files.append(next_file)
+        return index < len(self.files)
+
+    def find_chunk(self, key: str) -> Optional[Tuple[int, int]]:
+        """(file index, chunk index) of the chunk with ``chunk_key`` ``key``, reading the whole diff if needed."""
+        with self._positions_lock:
+            if self._chunk_positions is None:
+                while self.has_file(len(self.files)):
+                    pass
+                self._chunk_positions = {chunk_key(file, chunk): (file_index, chunk_index)
+                                         for file_index, file in enumerate(self.files)
+                                         for chunk_index, chunk in enumerate(file.chunks)}
+            return self._chunk_positions.get(key)
+
+    def chunk_run(self, key: str) -> "RunContext":
+        """A context sharing every handle of this one, over one file holding just the chunk ``key``."""
+        position = self.find_chunk(key)
+        if position is None:
+            log.error(f"Chunk {key} is not in the diff of this head, it is not reviewed")
+        return self.chunk_run_at(*position) if position is not None else self._with_files([])
+
+    def chunk_run_at(self, file_index: int, chunk_index: int) -> "RunContext":
+        """Like ``chunk_run``, for a chunk of a file already read from the diff stream."""
+        file = self.files[file_index]
+        return self._with_files([file.model_copy(update={"chunks": [file.chunks[chunk_index]]})])
+
+    def _with_files(self, files: List[Any]) -> "RunContext":
+        return RunContext(self.pr_details, files, None, self.previous_comments, self.guidelines_store,
+                          self.review_cache, self.hunk_dedup, self.review_budget, self.review_deadline,
+                          self.head_watcher, self.model_cascade)
+
+
+_runs: Dict[str, RunContext] = {}
+_lock = threading.Lock()
+CHUNK_RUN_RE = re.compile(r"^(?P<parent>.+)/chunk/(?P<key>[0-9a-f]+)$")
+
+
+def chunk_key(file: Any, chunk: Any) -> str:
+    """
+    Identifies a chunk by its file and hunk text rather than its position, so a resumed run finds
+    it even when the re-downloaded diff lists the files in another order.
+    """
+    return hashlib.sha1(f"{file.to_file}\0{chunk.content}".encode()).hexdigest()[:16]
+
+
+def chunk_run_id(run_id: str, key: str) -> str:
+    """Id of the run reviewing the chunk ``key`` of ``run_id``; resolved by ``get_run`` on first use."""
+    return f"{run_id}/chunk/{key}"
+
+
+def register_run(context: RunContext, run_id: Optional[str] = None) -> str:
+    run_id = run_id or uuid4().hex
+    with _lock:
+        _runs[run_id] = context
+    return run_id
+
+
+def get_run(run_id: str) -> RunContext:
+    """
+    Looks the run up, deriving chunk runs from their parent. Chunk runs are never registered
+    up front, so the chunk reviews of a run resumed from a checkpoint find their context too.
+    """
+    context = _runs.get(run_id)
+    if context is not None:
+        return context
+    match = CHUNK_RUN_RE.match(run_id)
+    if match is None:
+        raise KeyError(f"No run registered under {run_id!r}; it was released or never registered")
+    context = get_run(match["parent"]).chunk_run(match["key"])
+    register_run(context, run_id)
+    return context
+
+
+def release_run(run_id: str) -> None:
+    """Drops the run and the per-chunk runs registered under ``run_id/...``."""
+    prefix = f"{run_id}/"
+    with _lock:
+        for key in [key for key in _runs if key == run_id or key.startswith(prefix)]:
+            del _runs[key]
@@ -0,0 +1,100 @@
+# utils/sharding.py
+import heapq
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from States.state import File
+from utils.logger import get_logger
+from utils.path_utils import normalize_file_path
+
+log = get_logger()
+
+# Every hunk pays the reviewer/feedback prompts on top of its own lines
+HUNK_OVERHEAD_LINES = 20
+
+
+class ShardResult(BaseModel):
+    """What one shard of a review hands to the merge step, written as JSON to SHARD_OUTPUT_DIR."""
+    head_sha: Optional[str] = None
+    shard_index: int
+    shard_count: int
+    comments: List[Dict[str, Any]] = Field(default_factory=list)
+    skipped_files: List[Dict[str, Any]] = Field(default_factory=list)
+    budget_skipped: List[Dict[str, Any]] = Field(default_factory=list)
+    deadline_uncovered: Dict[str, int] = Field(default_factory=dict)
+    rate_limited: Dict[str, int] = Field(default_factory=dict)
+    incremental_base_sha: Optional[str] = None
+
+
+def shard_from_env() -> Tuple[int, Optional[int]]:
+    """(SHARD_COUNT, SHARD_INDEX); no index means every shard is run here, in a process pool."""
+    count = int(os.getenv("SHARD_COUNT", "1"))
+    index = os.getenv("SHARD_INDEX", "")
+    if index and not 0 <= int(index) < count:
+        raise ValueError(f"SHARD_INDEX={index} is outside 0..{count - 1}")
+    return count, int(index) if index else None
+
+
+def shard_output_dir() -> str:
+    """SHARD_OUTPUT_DIR, read on each use so a value set after import (tests, worker processes) applies."""
+    return os.getenv("SHARD_OUTPUT_DIR", "review-shards")
+
+
+def file_weight(file: File) -> int:
+    if file.skip_reason:
+        return 0
+    return sum(len(chunk.line_starts) + HUNK_OVERHEAD_LINES for chunk in file.chunks)
+
+
+def assign_shards(files: List[File], shard_count: int) -> List[int]:
+    """
+    Shard of each file: heaviest first, each to the lightest shard so far (ties broken by path and
+    shard index), so every runner computes the same split from the same diff.
+    """
+    order = sorted(range(len(files)), key=lambda i: (-file_weight(files[i]), normalize_file_path(files[i].to_file)))
+    loads = [(0, shard) for shard in range(shard_count)]
+    assignment = [0] * len(files)
+    for i in order:
+        load, shard = heapq.heappop(loads)
+        assignment[i] = shard
+        heapq.heappush(loads, (load + file_weight(files[i]), shard))
+    return assignment
+
+
+def iter_shard_files(files: Iterable[File], shard_index: int, shard_count: int) -> Iterator[File]:
+    """Reads the whole diff and yields the files of one shard, in diff order."""
+    files = list(files)
+    assignment = assign_shards(files, shard_count)
+    mine = [file for file, shard in zip(files, assignment) if shard == shard_index]
+    log.info(f"Shard {shard_index + 1}/{shard_count}: {len(mine)} of {len(files)} files, "
+             f"weight {sum(map(file_weight, mine))} of {sum(map(file_weight, files))}")
+    return iter(mine)
+
+
+def shard_result_path(shard_index: int, shard_count: int, directory: Optional[str] = None) -> Path:
+    return Path(directory or shard_output_dir()) / f"shard-{shard_index}-of-{shard_count}.json"
+
+
+def write_shard_result(result: ShardResult, directory: Optional[str] = None) -> Path:
+    path = shard_result_path(result.shard_index, result.shard_count, directory)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(result.model_dump_json())
+    log.info(f"Wrote {len(result.comments)} comments of shard {result.shard_index + 1}/{result.shard_count} to {path}")
+    return path
+
+
+def load_shard_results(shard_count: int, head_sha: Optional[str],
+                       directory: Optional[str] = None) -> Tuple[List[ShardResult], List[int]]:
+    """The results of this head's shards, and the indices of the shards that did not report."""
+    results, missing = [], []
+    for index in range(shard_count):
+        path = shard_result_path(index, shard_count, directory)
+        result = ShardResult.model_validate_json(path.read_text()) if path.exists() else None
+        if result is None or result.head_sha != head_sha:
+            missing.append(index)
+            continue
+        results.append(result)
+    return results, missing